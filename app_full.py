@@ -3,13 +3,20 @@ import json
 from datetime import datetime, timedelta
 from flask import Flask, render_template, request, jsonify, send_file
 from src.shopify_service import ShopifyService
+from src.order_store import OrderStore
+from src.order_sync import OrderSync
+from src.webhook_ingest import WebhookIngestor, WEBHOOK_TOPICS, verify_webhook
 from src.shopify_analytics import ShopifyAnalytics
 from src.conversational_insights import ConversationalInsights
 from src.shopify_report_generator import ShopifyReportGenerator
 from src.email_service import ConversationalEmailService
 from src.feedback_database import FeedbackDatabase
 from src.reply_processor import ReplyProcessor
+from src.report_pipeline import build_report_graph
+from src.stage_graph import StageError
 from src.scheduler import ShopifyScheduler
+from src.parallel_analytics import start_process_pool
+from src.location_registry import get_location_registry
 import pandas as pd
 
 app = Flask(__name__)
@@ -33,9 +40,10 @@ email_service = None
 feedback_db = None
 reply_processor = None
 scheduler = None
+webhook_ingestor = None
 
 def init_services():
-    global shopify_service, analytics, insights, report_generator, email_service, feedback_db, reply_processor, scheduler
+    global shopify_service, analytics, insights, report_generator, email_service, feedback_db, reply_processor, scheduler, webhook_ingestor
     
     try:
         shopify_service = ShopifyService()
@@ -45,6 +53,14 @@ def init_services():
         shopify_service = None
         analytics = None
     
+    try:
+        # Webhooks only need the local store, not a working Shopify session
+        order_store = shopify_service.order_store if shopify_service else OrderStore()
+        webhook_ingestor = WebhookIngestor(order_store, shopify_service) if order_store else None
+    except Exception as e:
+        print(f"Warning: Could not initialize webhook ingestion: {e}")
+        webhook_ingestor = None
+    
     try:
         insights = ConversationalInsights()
     except Exception as e:
@@ -107,31 +123,29 @@ def generate_report():
         start_date = datetime.strptime(week_start, '%Y-%m-%d')
         end_date = datetime.strptime(week_end, '%Y-%m-%d')
         
-        # Generate report (disable trends for now to prevent timeouts)
-        print("Fetching analytics data...")
-        try:
-            weekly_data = analytics.analyze_weekly_data(start_date, include_trends=False)
-        except Exception as e:
-            print(f"Error fetching analytics: {str(e)}")
-            return jsonify({'success': False, 'error': f'Failed to fetch analytics data: {str(e)}'}), 500
-            
-        # Get feedback context for recipient
-        feedback_context = feedback_db.get_feedback_context_for_email(recipient_email)
-        
-        print("Generating AI insights...")
-        try:
-            conversational_report = insights.generate_insights(
-                weekly_data, 
-                recipient_name,
-                feedback_context
-            )
-        except Exception as e:
-            print(f"Error generating insights: {str(e)}")
-            # Use fallback insights if AI generation fails
-            conversational_report = {
+        # Analytics, feedback and memory load in parallel; the AI insights
+        # start once they are all in. Trends come from the order store's rollups
+        print("Fetching analytics data and generating AI insights...")
+        graph = build_report_graph(
+            analytics, insights, feedback_db, recipient_email,
+            recipient_name=recipient_name,
+            week_start=start_date,
+            insights_fallback={
                 'insights_text': 'Unable to generate AI insights at this time.',
                 'questions': []
             }
+        )
+        try:
+            results = graph.run()
+        except StageError as e:
+            if e.stage != 'analytics':
+                raise
+            print(f"Error fetching analytics: {str(e.error)}")
+            return jsonify({'success': False, 'error': f'Failed to fetch analytics data: {str(e.error)}'}), 500
+        
+        weekly_data = results['analytics']
+        conversational_report = results['insights']
+        print(f"Report stages: {graph.summary()}")
         
         # Skip PDF generation to avoid timeouts
         pdf_path = None
@@ -150,7 +164,7 @@ def generate_report():
         )
         
         print("Report sent successfully!")
-        return jsonify({'success': True, 'message': 'Report sent successfully!'})
+        return jsonify({'success': True, 'message': 'Report sent successfully!', 'stage_timings': graph.timings})
         
     except Exception as e:
         print(f"Error in generate_report: {str(e)}")
@@ -191,6 +205,50 @@ def process_replies():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/sync-orders', methods=['POST'])
+def sync_orders():
+    """Manually sync Shopify orders into the local order store"""
+    if not shopify_service:
+        init_services()
+    
+    try:
+        if not shopify_service.order_store:
+            return jsonify({'success': False, 'error': 'Order store is disabled'}), 400
+        
+        written = OrderSync(shopify_service).sync()
+        return jsonify({
+            'success': True,
+            'orders_written': written,
+            'watermark': shopify_service.order_store.get_watermark(),
+            'orders_in_store': shopify_service.order_store.count_orders()
+        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/webhooks/<resource>/<event>', methods=['POST'])
+def shopify_webhook(resource, event):
+    """Receive Shopify order/refund webhooks and queue them for the order store"""
+    topic = f"{resource}/{event}"
+    if topic not in WEBHOOK_TOPICS:
+        return jsonify({'success': False, 'error': f'Unsupported topic {topic}'}), 404
+    
+    body = request.get_data()
+    if not verify_webhook(body, request.headers.get('X-Shopify-Hmac-Sha256'), os.environ.get('SHOPIFY_WEBHOOK_SECRET')):
+        return jsonify({'success': False, 'error': 'Invalid webhook signature'}), 401
+    
+    if not webhook_ingestor:
+        init_services()
+    if not webhook_ingestor:
+        return jsonify({'success': False, 'error': 'Order store is not available'}), 503
+    
+    try:
+        webhook_ingestor.enqueue(topic, json.loads(body))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # Acknowledge immediately; Shopify retries anything slower than 5s
+    return jsonify({'success': True})
+
 @app.route('/health')
 def health():
     """Health check endpoint"""
@@ -211,6 +269,7 @@ def test_analytics():
         # Get basic analytics without trends
         print("Testing analytics fetch...")
         weekly_data = analytics.analyze_weekly_data(week_start, include_trends=False)
+        registry = get_location_registry()
         
         # Extract key metrics
         summary = {
@@ -218,8 +277,10 @@ def test_analytics():
             'week': weekly_data['week_start'],
             'total_revenue': weekly_data['total_revenue'],
             'total_orders': weekly_data['total_orders'],
-            'charleston_orders': weekly_data['current_week_by_location']['charleston']['order_count'],
-            'boston_orders': weekly_data['current_week_by_location']['boston']['order_count'],
+            **{
+                f'{key}_orders': weekly_data['current_week_by_location'][key]['order_count']
+                for key in registry.stores
+            },
             'product_categories': {
                 cat: {'revenue': data['revenue'], 'items': data['count']}
                 for cat, data in weekly_data.get('product_categories', {}).items()
@@ -246,19 +307,19 @@ def test_shopify():
         start_date = end_date - timedelta(days=365)  # Look back 1 year instead of 30 days
         
         print(f"Testing Shopify connection for date range: {start_date} to {end_date}")
-        orders = shopify_service.get_orders_for_period(start_date, end_date)
+        # One count call keeps a full year inside the request timeout
+        orders_found = shopify_service.get_orders_count(start_date, end_date)
         
         # Also try to get a count of all orders
         try:
-            import shopify
-            order_count = shopify.Order.count()
+            order_count = shopify_service.get_orders_count()
             print(f"Total orders in store: {order_count}")
         except Exception as count_error:
             order_count = f"Error: {str(count_error)}"
         
         return jsonify({
             'success': True,
-            'orders_found': len(orders),
+            'orders_found': orders_found,
             'date_range': {
                 'start': start_date.isoformat(),
                 'end': end_date.isoformat()
@@ -322,15 +383,13 @@ def analyze_locations():
         # Try to get location details
         location_details = []
         try:
-            import shopify
-            locations = shopify.Location.find()
-            for loc in locations:
+            for loc in shopify_service.get_locations():
                 location_details.append({
-                    'id': str(loc.id),
-                    'name': loc.name,
-                    'city': getattr(loc, 'city', 'N/A'),
-                    'province': getattr(loc, 'province', 'N/A'),
-                    'active': getattr(loc, 'active', True)
+                    'id': str(loc['id']),
+                    'name': loc.get('name'),
+                    'city': loc.get('city', 'N/A'),
+                    'province': loc.get('province', 'N/A'),
+                    'active': loc.get('active', True)
                 })
         except Exception as e:
             print(f"Could not fetch location details: {e}")
@@ -365,23 +424,23 @@ def test_quick_report():
         
         print("Testing quick analytics fetch...")
         weekly_data = analytics.analyze_weekly_data(week_start, include_trends=False)
+        registry = get_location_registry()
         
-        # Create a simple text summary without AI
+        # Create a simple text summary without AI, one section per store
         summary = f"""
 Weekly Summary for {weekly_data['week_start']} to {weekly_data['week_end']}
 
 Total Revenue: ${weekly_data['total_revenue']:,.2f}
 Total Orders: {weekly_data['total_orders']}
 Average Order Value: ${weekly_data['avg_order_value']:.2f}
-
-Charleston:
-- Orders: {weekly_data['current_week_by_location']['charleston']['order_count']}
-- Revenue: ${weekly_data['current_week_by_location']['charleston']['total_revenue']:,.2f}
-
-Boston:
-- Orders: {weekly_data['current_week_by_location']['boston']['order_count']}
-- Revenue: ${weekly_data['current_week_by_location']['boston']['total_revenue']:,.2f}
-        """
+"""
+        for key in registry.stores:
+            location_data = weekly_data['current_week_by_location'][key]
+            summary += f"""
+{registry.by_key[key].name}:
+- Orders: {location_data['order_count']}
+- Revenue: ${location_data['total_revenue']:,.2f}
+"""
         
         return f"<pre>{summary}</pre>"
         
@@ -542,6 +601,14 @@ def test_email_response():
             'traceback': traceback.format_exc()
         }), 500
 
+# The 'process' analytics backend forks its workers, which is only safe
+# before the scheduler or any service thread has started
+if os.getenv('ANALYTICS_BACKEND') == 'process':
+    try:
+        start_process_pool()
+    except Exception as e:
+        print(f"Warning: Could not start analytics workers: {e}")
+
 # Initialize on module load for gunicorn
 try:
     from src.auto_setup import setup_automatic_operations
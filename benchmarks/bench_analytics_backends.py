@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Benchmark: the loop and NumPy analytics accumulators over the same orders.
+
+Builds OrderColumns from synthetic orders at each size (counted in line
+items), splits them into the Charleston/Boston/online buckets the weekly
+report uses, and times both backends. Each run also checks that the two
+backends agree to the cent.
+
+    python -m benchmarks.bench_analytics_backends [line_items ...]
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_raw_orders
+from src.analytics_engine import ACCUMULATORS, classify_items
+from src.order_columns import OrderColumns
+from src.shopify_schema import build_order_dict
+
+SIZES = [10_000, 100_000, 1_000_000]
+TRACK_ITEMS = ['Match', 'Workshop']
+
+
+def make_columns(line_items: int) -> OrderColumns:
+    # make_raw_orders averages 3 line items per order
+    raw = make_raw_orders(line_items // 3, days=28)
+    columns = OrderColumns.from_orders([build_order_dict(order) for order in raw])
+    # Classified up front, as ShopifyAnalytics does from the product index
+    classify_items(columns)
+    return columns
+
+
+def location_buckets(columns: OrderColumns) -> np.ndarray:
+    buckets = np.full(len(columns), 2, dtype=np.int64)
+    buckets[columns.location_mask(10719053)] = 0
+    buckets[columns.location_mask(71781154968)] = 1
+    return buckets
+
+
+def same_totals(a, b) -> bool:
+    # Money is in integer cents, so the backends must agree exactly
+    for mine, theirs in zip(a, b):
+        for name, value in vars(mine).items():
+            other = getattr(theirs, name)
+            if name == 'category_titles':
+                value, other = [dict(c) for c in value], [dict(c) for c in other]
+            if value != other:
+                return False
+    return True
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    for size in sizes:
+        columns = make_columns(size)
+        buckets = location_buckets(columns)
+        print(f"{len(columns.item_order):,} line items in {len(columns):,} orders")
+
+        results, baseline = {}, None
+        for name, accumulate in ACCUMULATORS.items():
+            started = time.perf_counter()
+            results[name] = accumulate(columns, buckets, 3, TRACK_ITEMS)
+            seconds = time.perf_counter() - started
+            baseline = baseline or seconds
+            print(f"  {name:<8} {seconds * 1000:9.1f} ms   {baseline / seconds:5.1f}x")
+
+        print(f"  backends agree: {same_totals(results['loop'], results['numpy'])}")
+
+
+if __name__ == '__main__':
+    main()
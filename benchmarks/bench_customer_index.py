@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: classifying a week's customers as new or returning.
+
+With an OrderStore holding a year of synthetic orders this times, for
+the customers of the last week:
+
+  rescan  the first order of every customer, read from the stored
+          order history
+  index   OrderStore.get_customer_profiles over the customer index
+
+Both must classify every customer the same way.
+
+    python -m benchmarks.bench_customer_index [orders]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from benchmarks.synthetic import make_raw_orders
+from src.order_store import OrderStore
+from src.shopify_schema import build_order_dict
+
+ORDERS = 100_000
+START = datetime(2024, 1, 1)
+WEEK_START = '2024-12-23'
+
+
+def rescan(store: OrderStore, emails):
+    conn = store._connect()
+    rows = conn.execute(
+        'SELECT customer_email, MIN(created_at) FROM orders WHERE customer_email IS NOT NULL GROUP BY customer_email'
+    ).fetchall()
+    conn.close()
+    first = {email: created_at[:10] for email, created_at in rows}
+    return [first[email] < WEEK_START for email in emails]
+
+
+def with_index(store: OrderStore, emails):
+    profiles = store.get_customer_profiles(emails)
+    return [profiles[email]['first_order_day'] < WEEK_START for email in emails]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ORDERS
+    orders = [build_order_dict(raw) for raw in make_raw_orders(count, start=START, days=366)]
+    store = OrderStore(os.path.join(tempfile.mkdtemp(), 'orders.db'))
+    store.upsert_orders(orders)
+    emails = sorted({
+        order['customer_email'] for order in orders
+        if order.get('customer_email') and order['created_at'][:10] >= WEEK_START
+    })
+    print(f"{len(orders):,} orders over a year, {len(emails):,} customers in the last week")
+
+    expected, rescan_seconds = timed(rescan, store, emails)
+    result, index_seconds = timed(with_index, store, emails)
+    print(f"  rescan  {rescan_seconds * 1000:9.1f} ms")
+    print(f"  index   {index_seconds * 1000:9.1f} ms   {rescan_seconds / index_seconds:6.1f}x")
+    print(f"  returning: {sum(result):,} of {len(result):,}; same classification: {expected == result}")
+
+
+if __name__ == '__main__':
+    main()
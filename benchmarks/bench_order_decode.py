@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: decoding an orders.json page into analytics order dicts.
+
+Compares the old get_orders_for_period loop (ShopifyAPI resource objects,
+attribute reads into a dict) with response.json() + build_order_dict and
+the decode_orders_page fast path.
+
+    python -m benchmarks.bench_order_decode [orders_per_page] [pages]
+"""
+import json
+import sys
+import timeit
+
+from benchmarks.synthetic import make_raw_orders
+from src.shopify_schema import build_order_dict, decode_orders_page
+
+
+def legacy_loop(body: bytes):
+    """The pre-fast-path loop from ShopifyService.get_orders_for_period"""
+    import shopify
+    orders = []
+    for order in [shopify.Order(raw) for raw in json.loads(body)['orders']]:
+        order_data = {
+            'id': order.id,
+            'created_at': order.created_at,
+            'total_price': float(order.total_price),
+            'subtotal_price': float(order.subtotal_price),
+            'total_tax': float(order.total_tax),
+            'customer_email': order.email,
+            'customer_name': f"{order.customer.first_name} {order.customer.last_name}" if order.customer else "Guest",
+            'line_items': [],
+            'tags': order.tags.split(', ') if order.tags else [],
+            'note': order.note,
+            'financial_status': order.financial_status,
+            'source_name': getattr(order, 'source_name', ''),
+            'location_id': getattr(order, 'location_id', '')
+        }
+        for item in order.line_items:
+            order_data['line_items'].append({
+                'title': item.title,
+                'variant_title': item.variant_title,
+                'quantity': item.quantity,
+                'price': float(item.price),
+                'sku': item.sku,
+                'product_id': item.product_id
+            })
+        orders.append(order_data)
+    return orders
+
+
+def json_then_build(body: bytes):
+    return [build_order_dict(raw) for raw in json.loads(body)['orders']]
+
+
+def main():
+    per_page = int(sys.argv[1]) if len(sys.argv) > 1 else 250
+    pages = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    body = json.dumps({'orders': make_raw_orders(per_page)}).encode('utf-8')
+
+    candidates = [('json + build_order_dict', json_then_build), ('decode_orders_page', decode_orders_page)]
+    try:
+        import shopify
+        shopify.ShopifyResource.set_site('https://bench.myshopify.com/admin/api/2023-07')
+        candidates.insert(0, ('ShopifyAPI resource loop', legacy_loop))
+    except ImportError:
+        print("ShopifyAPI not installed; skipping the resource-object baseline")
+
+    print(f"{pages} pages x {per_page} orders ({len(body) / 1024:.0f} KiB per page)")
+    baseline = None
+    for name, func in candidates:
+        seconds = min(timeit.repeat(lambda: func(body), number=pages, repeat=3))
+        baseline = baseline or seconds
+        print(f"  {name:<26} {seconds * 1000:8.1f} ms   {baseline / seconds:5.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-location analytics in worker processes vs in-process.
+
+Builds OrderColumns for synthetic orders spread over 10 store locations
+(plus online), partitions them with a LocationRegistry, and times the
+NumPy accumulator against the process-pool one at each size (counted in
+line items). The first parallel run includes starting the worker pool,
+so it is reported separately. Each run also checks that both agree.
+
+    python -m benchmarks.bench_parallel_locations [line_items ...]
+"""
+import sys
+import time
+
+from benchmarks.bench_analytics_backends import TRACK_ITEMS, same_totals
+from benchmarks.synthetic import make_raw_orders
+from src.analytics_engine import accumulate_vectorized, classify_items
+from src.location_registry import LocationRegistry
+from src.order_columns import OrderColumns
+from src.parallel_analytics import WORKERS, accumulate_parallel, start_process_pool
+from src.shopify_schema import build_order_dict
+
+SIZES = [100_000, 1_000_000, 3_000_000]
+LOCATIONS = [
+    {'key': f'store{number}', 'id': str(90000 + number), 'channel': 'pos'}
+    for number in range(10)
+]
+
+
+def make_columns(line_items: int) -> OrderColumns:
+    # make_raw_orders averages 3 line items per order
+    location_ids = [location['id'] for location in LOCATIONS] + [None]
+    raw = make_raw_orders(line_items // 3, days=28, location_ids=location_ids)
+    columns = OrderColumns.from_orders([build_order_dict(order) for order in raw])
+    classify_items(columns)
+    return columns
+
+
+def timed(func, *args, **kwargs):
+    started = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    registry = LocationRegistry(LOCATIONS)
+    bucket_count = len(registry.bucket_names)
+    workers = max(WORKERS, 2)
+    print(f"{len(registry.stores)} stores + online, {workers} workers")
+
+    _, startup = timed(start_process_pool, workers)
+    print(f"  pool startup {startup * 1000:.1f} ms")
+
+    for size in sizes:
+        columns = make_columns(size)
+        buckets = registry.buckets(columns)
+        print(f"{len(columns.item_order):,} line items in {len(columns):,} orders")
+
+        serial, serial_seconds = timed(accumulate_vectorized, columns, buckets, bucket_count, TRACK_ITEMS)
+        parallel, parallel_seconds = timed(
+            accumulate_parallel, columns, buckets, bucket_count, TRACK_ITEMS, workers=workers
+        )
+        print(f"  numpy    {serial_seconds * 1000:9.1f} ms")
+        print(f"  process  {parallel_seconds * 1000:9.1f} ms   {serial_seconds / parallel_seconds:5.1f}x")
+        print(f"  backends agree: {same_totals(serial, parallel)}")
+
+
+if __name__ == '__main__':
+    main()
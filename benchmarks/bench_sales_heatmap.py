@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark: a year's hour-of-day by day-of-week sales heatmap per location.
+
+Over a year of synthetic orders spread across the default locations this
+times:
+
+  per order  datetime.fromisoformat per order into per-location 7x24 grids
+  columns    the bincount accumulate_vectorized runs over OrderColumns
+             (timestamps already parsed, as they are for every report)
+  rollups    OrderStore's hourly rollups for the year, summed by SQLite,
+             as ShopifyAnalytics.analyze_sales_heatmap reads them
+
+All three must produce the same order counts.
+
+    python -m benchmarks.bench_sales_heatmap [orders]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.synthetic import make_raw_orders
+from src.analytics_engine import HEATMAP_CELLS, accumulate_hourly_totals
+from src.location_registry import DEFAULT_LOCATIONS, LocationRegistry
+from src.order_columns import OrderColumns
+from src.order_store import OrderStore
+from src.shopify_schema import build_order_dict
+
+ORDERS = 200_000
+START = datetime(2024, 1, 1)
+
+
+def per_order(orders, registry):
+    grids = [[0] * HEATMAP_CELLS for _ in registry.bucket_names]
+    for order in orders:
+        created = datetime.fromisoformat(order['created_at'])
+        grids[registry.bucket_of(order.get('location_id'))][created.weekday() * 24 + created.hour] += 1
+    return grids
+
+
+def with_columns(columns, buckets, bucket_count):
+    keys = buckets * HEATMAP_CELLS + columns.weekday.astype(np.int64) * 24 + columns.hours()
+    cells = np.bincount(keys, minlength=bucket_count * HEATMAP_CELLS).tolist()
+    return [cells[index * HEATMAP_CELLS:(index + 1) * HEATMAP_CELLS] for index in range(bucket_count)]
+
+
+def with_rollups(store, registry):
+    rows = store.get_hourly_totals('2024-01-01', '2024-12-31')
+    totals = accumulate_hourly_totals(rows, registry.bucket_of, len(registry.bucket_names))
+    return [bucket.hour_orders for bucket in totals]
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else ORDERS
+    registry = LocationRegistry(DEFAULT_LOCATIONS)
+    location_ids = [location.id for location in registry.locations] + [None]
+    orders = [
+        build_order_dict(raw)
+        for raw in make_raw_orders(count, start=START, days=366, location_ids=location_ids)
+    ]
+    columns = OrderColumns.from_orders(orders)
+    buckets = registry.buckets(columns)
+    store = OrderStore(os.path.join(tempfile.mkdtemp(), 'orders.db'))
+    store.upsert_orders(orders)
+    print(f"{len(orders):,} orders over a year, {len(registry.bucket_names)} locations")
+
+    expected, loop_seconds = timed(per_order, orders, registry)
+    from_columns, column_seconds = timed(with_columns, columns, buckets, len(registry.bucket_names))
+    from_rollups, rollup_seconds = timed(with_rollups, store, registry)
+    print(f"  per order  {loop_seconds * 1000:9.1f} ms")
+    print(f"  columns    {column_seconds * 1000:9.1f} ms   {loop_seconds / column_seconds:6.1f}x")
+    print(f"  rollups    {rollup_seconds * 1000:9.1f} ms   {loop_seconds / rollup_seconds:6.1f}x")
+    print(f"  same heatmaps: {expected == from_columns == from_rollups}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark: bucketing order timestamps by weekday, hour and week.
+
+Over synthetic created_at strings this times:
+
+  per order  datetime.fromisoformat per timestamp, then the weekday, hour
+             and UTC week read off each datetime (as OrderColumns and the
+             fetched multi-week trends used to)
+  columns    time_buckets.parse_timestamps once, then integer arithmetic
+
+Both must give the same buckets.
+
+    python -m benchmarks.bench_timestamps [orders]
+"""
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from benchmarks.synthetic import make_raw_orders
+from src import time_buckets
+
+ORDERS = 1_000_000
+WEEK_START = datetime(2024, 1, 1)
+
+
+def per_order(timestamps):
+    start = WEEK_START.replace(tzinfo=timezone.utc)
+    weekday, hour, week = [], [], []
+    for timestamp in timestamps:
+        parsed = datetime.fromisoformat(timestamp)
+        weekday.append(parsed.weekday())
+        hour.append(parsed.hour)
+        week.append((parsed.astimezone(timezone.utc) - start).days // 7)
+    return np.array(weekday), np.array(hour), np.array(week)
+
+
+def columns(timestamps):
+    created_ts, local_ts = time_buckets.parse_timestamps(timestamps)
+    return (
+        time_buckets.weekdays(local_ts), time_buckets.hours(local_ts),
+        time_buckets.week_index(created_ts, WEEK_START)
+    )
+
+
+def timed(func, *args):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else ORDERS
+    timestamps = [order['created_at'] for order in make_raw_orders(orders, days=91)]
+    print(f"{len(timestamps):,} timestamps")
+
+    expected, loop_seconds = timed(per_order, timestamps)
+    result, column_seconds = timed(columns, timestamps)
+    print(f"  per order  {loop_seconds * 1000:9.1f} ms")
+    print(f"  columns    {column_seconds * 1000:9.1f} ms   {loop_seconds / column_seconds:5.1f}x")
+    print(f"  same buckets: {all((a == b).all() for a, b in zip(expected, result))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ranking products, customers and category items for the report.
+
+Over a synthetic window (500k line items by default) this times:
+
+  legacy     the original per-category item lists ranked with list.count
+  full sort  sorted() over the accumulated per-title and per-customer totals
+  top-k      top_k's bounded heap over the same totals
+
+The last two must agree exactly, ties included.
+
+    python -m benchmarks.bench_top_k [line_items]
+"""
+import sys
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import make_raw_orders
+from src.analytics_engine import CATEGORY_NAMES, accumulate_vectorized, classify_items
+from src.order_columns import OrderColumns
+from src.shopify_schema import build_order_dict
+from src.top_k import top_counts
+
+LINE_ITEMS = 500_000
+
+
+def legacy_categories(columns: OrderColumns):
+    """Top five titles per category the way _analyze_product_categories used to find them"""
+    titles = columns.titles.values
+    items = {category: [] for category in CATEGORY_NAMES}
+    for title_code, category in zip(columns.item_title.tolist(), columns.item_category.tolist()):
+        items[CATEGORY_NAMES[category]].append(titles[title_code])
+    ranked = {}
+    for category, category_items in items.items():
+        unique_items = list(set(category_items))
+        counts = [(item, category_items.count(item)) for item in unique_items]
+        ranked[category] = sorted(counts, key=lambda x: x[1], reverse=True)[:5]
+    return ranked
+
+
+def full_sort(totals):
+    return (
+        sorted(totals.product_cents.items(), key=lambda x: x[1], reverse=True)[:10],
+        sorted(totals.customer_cents.items(), key=lambda x: x[1], reverse=True)[:5],
+        [sorted(counts.items(), key=lambda x: x[1], reverse=True)[:5] for counts in totals.category_titles],
+    )
+
+
+def with_top_k(totals):
+    return (
+        top_counts(totals.product_cents, 10),
+        top_counts(totals.customer_cents, 5),
+        [top_counts(counts, 5) for counts in totals.category_titles],
+    )
+
+
+def timed(func, *args, repeat: int = 5):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(*args)
+        seconds = time.perf_counter() - started
+        best = seconds if best is None else min(best, seconds)
+    return result, best
+
+
+def main():
+    line_items = int(sys.argv[1]) if len(sys.argv) > 1 else LINE_ITEMS
+    # make_raw_orders averages 3 line items per order
+    raw = make_raw_orders(line_items // 3, days=91)
+    columns = OrderColumns.from_orders([build_order_dict(order) for order in raw])
+    classify_items(columns)
+    totals = accumulate_vectorized(columns, np.zeros(len(columns), dtype=np.int64), 1)[0]
+    print(
+        f"{len(columns.item_order):,} line items, {len(totals.product_cents):,} products, "
+        f"{len(totals.customer_cents):,} customers"
+    )
+
+    _, legacy_seconds = timed(legacy_categories, columns, repeat=1)
+    sorted_result, sort_seconds = timed(full_sort, totals)
+    top_result, top_seconds = timed(with_top_k, totals)
+
+    print(f"  legacy     {legacy_seconds * 1000:10.1f} ms")
+    print(f"  full sort  {sort_seconds * 1000:10.1f} ms")
+    print(f"  top-k      {top_seconds * 1000:10.1f} ms   {sort_seconds / top_seconds:5.1f}x vs full sort")
+    print(f"  same rankings: {sorted_result == top_result}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Synthetic Shopify data for the benchmark scripts"""
+import random
+from datetime import datetime, timedelta
+
+
+TITLES = (
+    ['Candlefish No. %d' % i for i in range(1, 120)]
+    + ['Match Bar Refill', 'Match Bar Tin', 'Long Matches']
+    + ['Candle Making Workshop', 'Pour Your Own Class', 'Date Night Workshop']
+    + ['Gift Card', 'Wick Trimmer', 'Candle Snuffer', 'Gift Box']
+)
+LOCATION_IDS = [10719053, 71781154968, None]
+
+
+def make_raw_orders(count: int, line_items_per_order: int = 3, seed: int = 7,
+                    start: datetime = datetime(2024, 1, 1), days: int = 7,
+                    location_ids=None):
+    """Raw Shopify order JSON dicts shaped like a fields=-projected orders.json page"""
+    rng = random.Random(seed)
+    location_ids = location_ids or LOCATION_IDS
+    orders = []
+    for i in range(count):
+        created = start + timedelta(seconds=rng.randrange(days * 86400))
+        line_items = []
+        for _ in range(rng.randint(1, 2 * line_items_per_order - 1)):
+            title = rng.choice(TITLES)
+            line_items.append({
+                'title': title,
+                'variant_title': None,
+                'quantity': rng.randint(1, 3),
+                'price': '%.2f' % rng.choice([8, 12.5, 24, 38, 45, 65]),
+                'sku': 'cf%07d' % TITLES.index(title) if title.startswith('Candlefish') else None,
+                'product_id': 1000 + TITLES.index(title),
+            })
+        total = sum(float(item['price']) * item['quantity'] for item in line_items)
+        orders.append({
+            'id': 5000000 + i,
+            'created_at': created.strftime('%Y-%m-%dT%H:%M:%S-05:00'),
+            'updated_at': created.strftime('%Y-%m-%dT%H:%M:%S-05:00'),
+            'total_price': '%.2f' % (total * 1.09),
+            'subtotal_price': '%.2f' % total,
+            'total_tax': '%.2f' % (total * 0.09),
+            'email': 'customer%d@example.com' % rng.randrange(max(1, count // 2)),
+            'customer': {'first_name': 'Pat', 'last_name': 'Doe%d' % (i % 97)},
+            'line_items': line_items,
+            'tags': '',
+            'note': None,
+            'financial_status': 'paid',
+            'source_name': 'pos',
+            'location_id': rng.choice(location_ids),
+        })
+    return orders
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""Post a recorded Shopify webhook payload to a running app, signed like Shopify would"""
+
+import argparse
+import base64
+import hashlib
+import hmac
+import os
+import sys
+
+import requests
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('topic', help="Webhook topic, e.g. orders/create, orders/updated, refunds/create")
+    parser.add_argument('payload', help="Path to a JSON payload recorded from Shopify")
+    parser.add_argument('--url', default=os.getenv('APP_URL', 'http://localhost:5000'),
+                        help="Base URL of the running app")
+    args = parser.parse_args()
+
+    secret = os.getenv('SHOPIFY_WEBHOOK_SECRET')
+    if not secret:
+        print("❌ SHOPIFY_WEBHOOK_SECRET is not set")
+        sys.exit(1)
+
+    with open(args.payload, 'rb') as f:
+        body = f.read()
+
+    signature = base64.b64encode(hmac.new(secret.encode('utf-8'), body, hashlib.sha256).digest()).decode('utf-8')
+
+    response = requests.post(
+        f"{args.url.rstrip('/')}/webhooks/{args.topic}",
+        data=body,
+        headers={
+            'Content-Type': 'application/json',
+            'X-Shopify-Topic': args.topic,
+            'X-Shopify-Hmac-Sha256': signature
+        },
+        timeout=10
+    )
+
+    print(f"{'✅' if response.ok else '❌'} {response.status_code}: {response.text.strip()}")
+    sys.exit(0 if response.ok else 1)
+
+
+if __name__ == '__main__':
+    main()
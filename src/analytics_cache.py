@@ -0,0 +1,102 @@
+import copy
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .order_store import add_change_listener
+
+
+class AnalyticsCache:
+    """
+    LRU cache of analyze_weekly_data results.
+
+    Keys carry the week, options, location config and the source data
+    version, so a result read from a changed store is never served. Each
+    entry also remembers the store-local days it was computed from, and
+    entries covering days that OrderStore rewrites are dropped straight
+    away. Results computed from the Shopify API have no data version and
+    expire after `unversioned_ttl` seconds instead.
+    """
+
+    def __init__(self, max_entries: int = None, unversioned_ttl: float = None):
+        self.max_entries = max_entries or int(os.getenv('ANALYTICS_CACHE_SIZE', '32'))
+        if unversioned_ttl is None:
+            unversioned_ttl = float(os.getenv('ANALYTICS_CACHE_TTL', '900'))
+        self.unversioned_ttl = unversioned_ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple) -> Optional[Dict]:
+        """A copy of the cached result for key, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires_at'] is not None and entry['expires_at'] < time.monotonic():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry['value']
+        # Callers add their own keys to the result, so each gets its own copy
+        return copy.deepcopy(value)
+
+    def put(self, key: Tuple, value: Dict, day_ranges: List[Tuple[str, str]], versioned: bool = True):
+        """Cache a result computed from the store-local days in day_ranges (inclusive YYYY-MM-DD pairs)"""
+        entry = {
+            'value': copy.deepcopy(value),
+            'day_ranges': day_ranges,
+            'expires_at': None if versioned else time.monotonic() + self.unversioned_ttl
+        }
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate_days(self, days: Iterable[str]) -> int:
+        """Drop every entry computed from any of these days; returns how many"""
+        days = sorted(set(days))
+        if not days:
+            return 0
+        with self._lock:
+            stale = [
+                key for key, entry in self._entries.items()
+                if any(_overlaps(days, start, end) for start, end in entry['day_ranges'])
+            ]
+            for key in stale:
+                del self._entries[key]
+        return len(stale)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'hits': self.hits, 'misses': self.misses}
+
+
+def _overlaps(sorted_days: List[str], start: str, end: str) -> bool:
+    index = bisect_left(sorted_days, start)
+    return index < len(sorted_days) and sorted_days[index] <= end
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_analytics_cache() -> AnalyticsCache:
+    """Return the cache shared by every ShopifyAnalytics in this process"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = AnalyticsCache()
+            add_change_listener(_cache.invalidate_days)
+        return _cache
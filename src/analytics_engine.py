@@ -0,0 +1,560 @@
+import re
+from collections import defaultdict
+from datetime import date
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from .order_columns import Interner, OrderColumns
+from .workshop_classifier import mentions_workshop
+
+
+# Product categories reported by _analyze_product_categories, in index order
+CATEGORY_NAMES = ['candle_library', 'match_bar', 'workshops', 'gift_products']
+
+# Trend buckets reported by _identify_trends, in index order
+TREND_NAMES = ['candles', 'workshops', 'gifts']
+
+# Sales heatmap cells, indexed weekday * 24 + hour (store-local, Monday == 0)
+HEATMAP_CELLS = 7 * 24
+
+
+def product_category(title: str, sku: str) -> int:
+    """Index into CATEGORY_NAMES for a line item's title and SKU"""
+    # Categorize based on SKU patterns and product names
+    if re.match(r'cf\d+', sku.lower()) or 'candlefish no' in title.lower():
+        # Candle library items (cf1020203 format)
+        return 0
+    elif 'match' in title.lower() or 'match bar' in title.lower():
+        # Match bar items
+        return 1
+    elif 'workshop' in title.lower() or 'class' in title.lower():
+        # Workshop items
+        return 2
+    # Gift products from third party providers
+    return 3
+
+
+def is_workshop_title(title: str) -> bool:
+    """Line items counted as workshop seats within a workshop booking"""
+    title = title.lower()
+    return 'workshop' in title or 'class' in title
+
+
+def trend_category(title: str) -> Optional[str]:
+    """Bucket a product title for the trend summary"""
+    title = title.lower()
+    if 'candle' in title:
+        return 'candles'
+    elif 'workshop' in title or 'class' in title:
+        return 'workshops'
+    elif 'gift' in title:
+        return 'gifts'
+    return None
+
+
+class BucketTotals:
+    """
+    Every aggregate the weekly analysis reads, for one bucket of orders.
+    Money is kept in whole cents (the *_cents fields) so every backend
+    sums exactly and they agree to the cent; ShopifyAnalytics converts
+    to dollars when it builds the report.
+    """
+
+    def __init__(self):
+        self.order_count = 0
+        self.revenue_cents = 0
+        self.items = 0
+        # Keyed by customer code in the batch's customer interner
+        self.customer_orders = defaultdict(int)
+        self.customer_cents = defaultdict(int)
+        # Keyed by product title
+        self.product_cents = defaultdict(int)
+        self.product_quantity = defaultdict(int)
+        self.product_lines = defaultdict(int)
+        # Indexed like CATEGORY_NAMES
+        self.category_cents = [0] * len(CATEGORY_NAMES)
+        self.category_count = [0] * len(CATEGORY_NAMES)
+        self.category_titles = [defaultdict(int) for _ in CATEGORY_NAMES]
+        # Monday == 0
+        self.weekday_cents = [0] * 7
+        self.weekday_orders = [0] * 7
+        # weekday * 24 + hour, store-local
+        self.hour_cents = [0] * HEATMAP_CELLS
+        self.hour_orders = [0] * HEATMAP_CELLS
+        self.trend_quantity = defaultdict(int)
+        # Tracked item -> number of orders containing it
+        self.tracked_orders = defaultdict(int)
+        # Workshop bookings, and their workshop line items keyed by title
+        self.workshop_orders = 0
+        self.workshop_lines = defaultdict(int)
+        self.workshop_cents = defaultdict(int)
+        self.workshop_quantity = defaultdict(int)
+
+    @classmethod
+    def merged(cls, buckets: Sequence['BucketTotals']) -> 'BucketTotals':
+        """Combine buckets accumulated from the same batch"""
+        total = cls()
+        for bucket in buckets:
+            total.order_count += bucket.order_count
+            total.revenue_cents += bucket.revenue_cents
+            total.items += bucket.items
+            total.workshop_orders += bucket.workshop_orders
+            for mine, theirs in (
+                (total.customer_orders, bucket.customer_orders),
+                (total.customer_cents, bucket.customer_cents),
+                (total.product_cents, bucket.product_cents),
+                (total.product_quantity, bucket.product_quantity),
+                (total.product_lines, bucket.product_lines),
+                (total.trend_quantity, bucket.trend_quantity),
+                (total.tracked_orders, bucket.tracked_orders),
+                (total.workshop_lines, bucket.workshop_lines),
+                (total.workshop_cents, bucket.workshop_cents),
+                (total.workshop_quantity, bucket.workshop_quantity),
+            ):
+                for key, value in theirs.items():
+                    mine[key] += value
+            for index in range(len(CATEGORY_NAMES)):
+                total.category_cents[index] += bucket.category_cents[index]
+                total.category_count[index] += bucket.category_count[index]
+                for title, count in bucket.category_titles[index].items():
+                    total.category_titles[index][title] += count
+            for day in range(7):
+                total.weekday_cents[day] += bucket.weekday_cents[day]
+                total.weekday_orders[day] += bucket.weekday_orders[day]
+            for cell in range(HEATMAP_CELLS):
+                total.hour_cents[cell] += bucket.hour_cents[cell]
+                total.hour_orders[cell] += bucket.hour_orders[cell]
+        return total
+
+
+class ProductClass(NamedTuple):
+    """Everything the analytics derive from a product's title and SKU"""
+    category: int   # index into CATEGORY_NAMES
+    trend: int      # index into TREND_NAMES, or -1
+    workshop: bool  # its orders are workshop bookings
+    seat: bool      # a workshop seat, within a workshop booking
+
+
+def classify_by_rules(title: str, sku: str) -> ProductClass:
+    trend = trend_category(title)
+    return ProductClass(
+        product_category(title, sku), TREND_NAMES.index(trend) if trend else -1,
+        mentions_workshop(title), is_workshop_title(title)
+    )
+
+
+def classify_items(orders: OrderColumns, classify: Callable[[int, str, str], ProductClass] = None):
+    """
+    Fill the item_category, item_trend and item_seat columns, calling
+    classify(product_id, sku, title) once per distinct title/SKU pair
+    (see ProductClassifier). Defaults to the keyword rules.
+    """
+    if classify is None:
+        classify = lambda product_id, sku, title: classify_by_rules(title, sku)
+    titles, skus = orders.titles.values, orders.skus.values
+    sku_count = max(len(orders.skus), 1)
+    item_count = len(orders.item_order)
+
+    pairs, item_pair = _groups(
+        orders.item_title.astype(np.int64) * sku_count + orders.item_sku, max(len(orders.titles), 1) * sku_count
+    )
+    # Each pair's first line item; minimum.at is defined for repeated indices
+    first_item = np.full(len(pairs), item_count, dtype=np.intp)
+    np.minimum.at(first_item, item_pair, np.arange(item_count, dtype=np.intp))
+    classes = [
+        classify(product_id, skus[pair % sku_count], titles[pair // sku_count])
+        for pair, product_id in zip(pairs.tolist(), orders.item_product_id[first_item].tolist())
+    ]
+
+    orders.item_category = np.array([c.category for c in classes], dtype=np.int8)[item_pair]
+    orders.item_trend = np.array([c.trend for c in classes], dtype=np.int8)[item_pair]
+    orders.item_seat = np.array([c.seat for c in classes], dtype=bool)[item_pair]
+
+
+def ensure_classified(orders: OrderColumns):
+    """Classify the batch's line items by the rules unless that's been done"""
+    if orders.item_category is None:
+        classify_items(orders)
+
+
+def accumulate(orders: OrderColumns, bucket_of_order: np.ndarray, bucket_count: int,
+               track_items: Sequence[str] = (), workshop_mask: np.ndarray = None) -> List[BucketTotals]:
+    """
+    Fill every aggregate for every bucket in one pass over the orders and
+    one over their line items. bucket_of_order gives each order's bucket
+    index; orders in bucket -1 are skipped. workshop_mask marks the orders
+    that are workshop bookings (see WorkshopClassifier).
+    """
+    buckets = [BucketTotals() for _ in range(bucket_count)]
+    order_bucket = bucket_of_order.tolist()
+    ensure_classified(orders)
+    if workshop_mask is None:
+        workshop_mask = np.zeros(len(orders), dtype=bool)
+    is_workshop_order = workshop_mask.tolist()
+
+    # Order-level pass
+    for bucket_index, customer, cents, weekday, hour, workshop in zip(
+        order_bucket, orders.customer.tolist(), orders.total_cents.tolist(), orders.weekday.tolist(),
+        orders.hours().tolist(), is_workshop_order
+    ):
+        if bucket_index < 0:
+            continue
+        bucket = buckets[bucket_index]
+        bucket.order_count += 1
+        bucket.revenue_cents += cents
+        bucket.customer_orders[customer] += 1
+        bucket.customer_cents[customer] += cents
+        bucket.weekday_cents[weekday] += cents
+        bucket.weekday_orders[weekday] += 1
+        bucket.hour_cents[weekday * 24 + hour] += cents
+        bucket.hour_orders[weekday * 24 + hour] += 1
+        if workshop:
+            bucket.workshop_orders += 1
+
+    # Tracked item matches are worked out once per title
+    titles = orders.titles.values
+    lowered_tracking = [(item, item.lower()) for item in track_items]
+    title_tracked = {}
+    tracked_orders = [set() for _ in range(bucket_count)]
+
+    # Line-item pass
+    for order_index, title_code, quantity, cents, category, trend, workshop_title in zip(
+        orders.item_order.tolist(), orders.item_title.tolist(), orders.item_quantity.tolist(),
+        orders.item_cents.tolist(), orders.item_category.tolist(), orders.item_trend.tolist(),
+        orders.item_seat.tolist()
+    ):
+        bucket_index = order_bucket[order_index]
+        if bucket_index < 0:
+            continue
+        bucket = buckets[bucket_index]
+
+        title = titles[title_code]
+        tracked = title_tracked.get(title_code)
+        if tracked is None:
+            tracked = title_tracked[title_code] = [item for item, lowered in lowered_tracking if lowered in title.lower()]
+
+        line_cents = cents * quantity
+        bucket.items += quantity
+        bucket.product_cents[title] += line_cents
+        bucket.product_quantity[title] += quantity
+        bucket.product_lines[title] += 1
+        bucket.category_cents[category] += line_cents
+        bucket.category_count[category] += quantity
+        bucket.category_titles[category][title] += 1
+        if trend >= 0:
+            bucket.trend_quantity[TREND_NAMES[trend]] += quantity
+        for item in tracked:
+            tracked_orders[bucket_index].add((item, order_index))
+        if workshop_title and is_workshop_order[order_index]:
+            bucket.workshop_lines[title] += 1
+            bucket.workshop_cents[title] += line_cents
+            bucket.workshop_quantity[title] += quantity
+
+    for bucket, tracked in zip(buckets, tracked_orders):
+        for item, _ in tracked:
+            bucket.tracked_orders[item] += 1
+
+    return buckets
+
+
+def _groups(keys: np.ndarray, key_space: int):
+    """
+    Distinct keys (all below key_space) in order of first appearance, plus
+    each element's group number, so dicts built from the groups iterate
+    like the loop's would. Dense tables avoid sorting the elements unless
+    the key space is much larger than the input.
+    """
+    if key_space > 4 * len(keys) + 1024:
+        unique, first, inverse = np.unique(keys, return_index=True, return_inverse=True)
+        order = np.argsort(first, kind='stable')
+        rank = np.empty(len(order), dtype=np.intp)
+        rank[order] = np.arange(len(order))
+        return unique[order], rank[inverse.reshape(-1)]
+
+    first = np.full(key_space, len(keys), dtype=np.int64)
+    # Each key's first position (plain assignment with repeated indices
+    # doesn't guarantee which write wins)
+    np.minimum.at(first, keys, np.arange(len(keys), dtype=np.int64))
+    present = np.flatnonzero(first < len(keys))
+    unique = present[np.argsort(first[present], kind='stable')]
+    group_of_key = np.empty(key_space, dtype=np.intp)
+    group_of_key[unique] = np.arange(len(unique))
+    return unique, group_of_key[keys]
+
+
+def _group_sums(group: np.ndarray, group_count: int, weights: np.ndarray = None) -> List:
+    """Per-group counts, or totals of integer weights (exact below 2**53)"""
+    if weights is None:
+        return np.bincount(group, minlength=group_count).tolist()
+    totals = np.bincount(group, weights=weights, minlength=group_count)
+    return np.rint(totals).astype(np.int64).tolist()
+
+
+def accumulate_vectorized(orders: OrderColumns, bucket_of_order: np.ndarray, bucket_count: int,
+                          track_items: Sequence[str] = (), workshop_mask: np.ndarray = None) -> List[BucketTotals]:
+    """
+    Same totals as accumulate(), computed with NumPy group-bys over the
+    flattened columns. Python only runs per distinct key (customer,
+    title, title/SKU pair), never per line item.
+    """
+    buckets = [BucketTotals() for _ in range(bucket_count)]
+    bucket_of_order = np.asarray(bucket_of_order, dtype=np.int64)
+    ensure_classified(orders)
+    if workshop_mask is None:
+        workshop_mask = np.zeros(len(orders), dtype=bool)
+
+    # Order-level group-bys
+    kept = np.flatnonzero(bucket_of_order >= 0)
+    order_bucket = bucket_of_order[kept]
+    order_cents = orders.total_cents[kept]
+    order_counts = np.bincount(order_bucket, minlength=bucket_count).tolist()
+    revenue_cents = _group_sums(order_bucket, bucket_count, order_cents)
+    workshop_orders = np.bincount(order_bucket[workshop_mask[kept]], minlength=bucket_count).tolist()
+    for index, bucket in enumerate(buckets):
+        bucket.order_count = order_counts[index]
+        bucket.revenue_cents = revenue_cents[index]
+        bucket.workshop_orders = workshop_orders[index]
+
+    day_keys = order_bucket * 7 + orders.weekday[kept]
+    day_orders = np.bincount(day_keys, minlength=bucket_count * 7).tolist()
+    day_cents = _group_sums(day_keys, bucket_count * 7, order_cents)
+    for index, bucket in enumerate(buckets):
+        bucket.weekday_orders = day_orders[index * 7:(index + 1) * 7]
+        bucket.weekday_cents = day_cents[index * 7:(index + 1) * 7]
+
+    cell_keys = order_bucket * HEATMAP_CELLS + orders.weekday[kept].astype(np.int64) * 24 + orders.hours()[kept]
+    cell_orders = np.bincount(cell_keys, minlength=bucket_count * HEATMAP_CELLS).tolist()
+    cell_cents = _group_sums(cell_keys, bucket_count * HEATMAP_CELLS, order_cents)
+    for index, bucket in enumerate(buckets):
+        bucket.hour_orders = cell_orders[index * HEATMAP_CELLS:(index + 1) * HEATMAP_CELLS]
+        bucket.hour_cents = cell_cents[index * HEATMAP_CELLS:(index + 1) * HEATMAP_CELLS]
+
+    if len(kept):
+        customer_count = max(len(orders.customers), 1)
+        keys, group = _groups(order_bucket * customer_count + orders.customer[kept], bucket_count * customer_count)
+        counts = _group_sums(group, len(keys))
+        cents = _group_sums(group, len(keys), order_cents)
+        for key, count, total in zip(keys.tolist(), counts, cents):
+            bucket = buckets[key // customer_count]
+            bucket.customer_orders[key % customer_count] = count
+            bucket.customer_cents[key % customer_count] = total
+
+    # Line-item group-bys
+    item_bucket = bucket_of_order[orders.item_order] if len(orders.item_order) else np.empty(0, dtype=np.int64)
+    kept = np.flatnonzero(item_bucket >= 0)
+    if not len(kept):
+        return buckets
+    item_bucket = item_bucket[kept]
+    item_order = orders.item_order[kept]
+    item_title = orders.item_title[kept].astype(np.int64)
+    item_quantity = orders.item_quantity[kept]
+    item_cents = orders.item_cents[kept] * item_quantity
+
+    items = _group_sums(item_bucket, bucket_count, item_quantity)
+    for index, bucket in enumerate(buckets):
+        bucket.items = items[index]
+
+    titles = orders.titles.values
+    title_count = max(len(orders.titles), 1)
+    item_category = orders.item_category[kept].astype(np.int64)
+
+    # Per-title products and trends
+    keys, group = _groups(item_bucket * title_count + item_title, bucket_count * title_count)
+    quantities = _group_sums(group, len(keys), item_quantity)
+    cents = _group_sums(group, len(keys), item_cents)
+    lines = _group_sums(group, len(keys))
+    for key, quantity, total, count in zip(keys.tolist(), quantities, cents, lines):
+        bucket, title = buckets[key // title_count], titles[key % title_count]
+        bucket.product_cents[title] = total
+        bucket.product_quantity[title] = quantity
+        bucket.product_lines[title] = count
+
+    item_trend = orders.item_trend[kept].astype(np.int64)
+    trending = np.flatnonzero(item_trend >= 0)
+    if len(trending):
+        keys, group = _groups(item_bucket[trending] * len(TREND_NAMES) + item_trend[trending], bucket_count * len(TREND_NAMES))
+        quantities = _group_sums(group, len(keys), item_quantity[trending])
+        for key, quantity in zip(keys.tolist(), quantities):
+            buckets[key // len(TREND_NAMES)].trend_quantity[TREND_NAMES[key % len(TREND_NAMES)]] = quantity
+
+    # Categories
+    category_keys = item_bucket * len(CATEGORY_NAMES) + item_category
+    category_size = bucket_count * len(CATEGORY_NAMES)
+    category_counts = _group_sums(category_keys, category_size, item_quantity)
+    category_cents = _group_sums(category_keys, category_size, item_cents)
+    for index, bucket in enumerate(buckets):
+        for category in range(len(CATEGORY_NAMES)):
+            bucket.category_count[category] = category_counts[index * len(CATEGORY_NAMES) + category]
+            bucket.category_cents[category] = category_cents[index * len(CATEGORY_NAMES) + category]
+
+    keys, group = _groups(category_keys * title_count + item_title, category_size * title_count)
+    lines = _group_sums(group, len(keys))
+    for key, count in zip(keys.tolist(), lines):
+        category_key, title = divmod(key, title_count)
+        bucket_index, category = divmod(category_key, len(CATEGORY_NAMES))
+        buckets[bucket_index].category_titles[category][titles[title]] = count
+
+    # Tracked items, counted once per order
+    for item in track_items:
+        lowered = item.lower()
+        matching_titles = np.array([lowered in title.lower() for title in titles], dtype=bool)
+        matched_orders = np.unique(item_order[matching_titles[item_title]])
+        counts = np.bincount(bucket_of_order[matched_orders], minlength=bucket_count).tolist()
+        for bucket, count in zip(buckets, counts):
+            if count:
+                bucket.tracked_orders[item] = count
+
+    # Workshop line items within workshop bookings
+    seats = np.flatnonzero(orders.item_seat[kept] & workshop_mask[item_order])
+    if len(seats):
+        keys, group = _groups(item_bucket[seats] * title_count + item_title[seats], bucket_count * title_count)
+        lines = _group_sums(group, len(keys))
+        quantities = _group_sums(group, len(keys), item_quantity[seats])
+        cents = _group_sums(group, len(keys), item_cents[seats])
+        for key, count, quantity, total in zip(keys.tolist(), lines, quantities, cents):
+            bucket, title = buckets[key // title_count], titles[key % title_count]
+            bucket.workshop_lines[title] = count
+            bucket.workshop_quantity[title] = quantity
+            bucket.workshop_cents[title] = total
+
+    return buckets
+
+
+def accumulate_rollups(rollups: Dict[str, List[Dict]], bucket_of: Callable[[str, str], int], bucket_count: int,
+                       customers: Interner, track_items: Sequence[str] = ()) -> List[BucketTotals]:
+    """
+    BucketTotals from OrderStore.get_rollups() rows instead of raw orders.
+    bucket_of(day, location_id) picks each row's bucket (-1 to skip), and
+    the rows' customer keys are coded through `customers`. Tracked items are
+    counted from the 'titles' rows (get_rollups(with_titles=True)), once
+    per order however many of its titles match.
+    """
+    buckets = [BucketTotals() for _ in range(bucket_count)]
+
+    for row in rollups['locations']:
+        bucket_index = bucket_of(row['day'], row['location_id'])
+        if bucket_index < 0:
+            continue
+        bucket = buckets[bucket_index]
+        cents = row['revenue_cents']
+        weekday = date.fromisoformat(row['day']).weekday()
+        bucket.order_count += row['orders']
+        bucket.revenue_cents += cents
+        bucket.items += row['items']
+        bucket.weekday_cents[weekday] += cents
+        bucket.weekday_orders[weekday] += row['orders']
+        bucket.workshop_orders += row['workshop_orders']
+
+    for row in rollups['hours']:
+        bucket_index = bucket_of(row['day'], row['location_id'])
+        if bucket_index < 0:
+            continue
+        bucket = buckets[bucket_index]
+        cell = date.fromisoformat(row['day']).weekday() * 24 + row['hour']
+        bucket.hour_cents[cell] += row['revenue_cents']
+        bucket.hour_orders[cell] += row['orders']
+
+    for row in rollups['customers']:
+        bucket_index = bucket_of(row['day'], row['location_id'])
+        if bucket_index < 0:
+            continue
+        bucket = buckets[bucket_index]
+        customer = customers.code(row['customer'])
+        bucket.customer_orders[customer] += row['orders']
+        bucket.customer_cents[customer] += row['revenue_cents']
+
+    for row in rollups['products']:
+        bucket_index = bucket_of(row['day'], row['location_id'])
+        if bucket_index < 0:
+            continue
+        bucket = buckets[bucket_index]
+        title, category, quantity = row['title'], row['category'], row['quantity']
+        line_cents = row['revenue_cents']
+        bucket.product_cents[title] += line_cents
+        bucket.product_quantity[title] += quantity
+        bucket.product_lines[title] += row['lines']
+        bucket.category_cents[category] += line_cents
+        bucket.category_count[category] += quantity
+        bucket.category_titles[category][title] += row['lines']
+        if row['trend'] >= 0:
+            bucket.trend_quantity[TREND_NAMES[row['trend']]] += quantity
+        if row['workshop'] and row['seat']:
+            bucket.workshop_lines[title] += row['lines']
+            bucket.workshop_cents[title] += line_cents
+            bucket.workshop_quantity[title] += quantity
+
+    if track_items:
+        lowered_tracking = [(item, item.lower()) for item in track_items]
+        title_tracked = {}
+        tracked_orders = [set() for _ in range(bucket_count)]
+        for row in rollups['titles']:
+            bucket_index = bucket_of(row['day'], row['location_id'])
+            if bucket_index < 0:
+                continue
+            title = row['title']
+            tracked = title_tracked.get(title)
+            if tracked is None:
+                tracked = title_tracked[title] = [item for item, lowered in lowered_tracking if lowered in title.lower()]
+            for item in tracked:
+                tracked_orders[bucket_index].add((item, row['order_id']))
+        for bucket, tracked in zip(buckets, tracked_orders):
+            for item, _ in tracked:
+                bucket.tracked_orders[item] += 1
+
+    return buckets
+
+
+def accumulate_weekly_rollups(rollups: Dict[str, List[Dict]], bucket_of: Callable[[int, str], int],
+                              bucket_count: int) -> List[BucketTotals]:
+    """
+    BucketTotals from OrderStore.get_weekly_rollups() rows, with
+    bucket_of(week, location_id) picking each row's bucket. Only the order,
+    revenue, item and product totals that trend series need are filled.
+    """
+    buckets = [BucketTotals() for _ in range(bucket_count)]
+
+    for row in rollups['locations']:
+        bucket_index = bucket_of(row['week'], row['location_id'])
+        if bucket_index < 0:
+            continue
+        bucket = buckets[bucket_index]
+        bucket.order_count += row['orders']
+        bucket.revenue_cents += row['revenue_cents']
+        bucket.items += row['items']
+
+    for row in rollups['products']:
+        bucket_index = bucket_of(row['week'], row['location_id'])
+        if bucket_index < 0:
+            continue
+        bucket, title = buckets[bucket_index], row['title']
+        bucket.product_cents[title] += row['revenue_cents']
+        bucket.product_quantity[title] += row['quantity']
+        bucket.product_lines[title] += row['lines']
+
+    return buckets
+
+
+def accumulate_hourly_totals(rows: List[Dict], bucket_of: Callable[[str], int], bucket_count: int) -> List[BucketTotals]:
+    """
+    BucketTotals holding only the sales heatmap, from
+    OrderStore.get_hourly_totals() rows; bucket_of(location_id) picks
+    each row's bucket
+    """
+    buckets = [BucketTotals() for _ in range(bucket_count)]
+    for row in rows:
+        bucket_index = bucket_of(row['location_id'])
+        if bucket_index < 0:
+            continue
+        bucket = buckets[bucket_index]
+        cell = row['weekday'] * 24 + row['hour']
+        bucket.hour_cents[cell] += row['revenue_cents']
+        bucket.hour_orders[cell] += row['orders']
+    return buckets
+
+
+# Selectable with ANALYTICS_BACKEND or ShopifyAnalytics(backend=...)
+ACCUMULATORS = {
+    'loop': accumulate,
+    'numpy': accumulate_vectorized,
+}
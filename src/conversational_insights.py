@@ -1,10 +1,16 @@
 import os
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 import anthropic
 import json
 import re
 from datetime import datetime
 
+from .location_registry import get_location_registry
+
+# Weeks of the multi-week trend series the prompt sees; the full series
+# stays in the analytics for the PDF and API
+PROMPT_TREND_WEEKS = int(os.getenv('PROMPT_TREND_WEEKS', '8'))
+
 
 class ConversationalInsights:
     def __init__(self):
@@ -31,19 +37,19 @@ class ConversationalInsights:
         with open(history_file, 'w') as f:
             json.dump(self.conversation_history[-10:], f)  # Keep last 10 conversations
     
-    def generate_insights(self, analytics_data: Dict, recipient_name: str, feedback_context: Dict = None) -> Dict[str, Any]:
-        """Generate conversational insights using Claude"""
-        
-        # Build enhanced context from memory service
+    def load_memory_context(self, recipient_name: str, recipient_email: str = None) -> Optional[str]:
+        """
+        Prompt context from the memory service (past emails, replies,
+        topics, performance trend), or None if it couldn't be loaded.
+        Independent of the week's analytics, so it can load alongside them.
+        """
+        recipient_email = recipient_email or f'{recipient_name.lower()}@candlefish.com'
         context = ""
-        memory_context = {}
         
         try:
             from .memory_service import MemoryService
             memory = MemoryService()
-            memory_context = memory.get_conversation_context(
-                analytics_data.get('recipient_email', f'{recipient_name.lower()}@candlefish.com')
-            )
+            memory_context = memory.get_conversation_context(recipient_email)
             
             # Build rich context for Sophie
             if memory_context['past_emails']:
@@ -62,15 +68,33 @@ class ConversationalInsights:
                 context += f"\n\nTOPICS {recipient_name.upper()} CARES ABOUT: {', '.join(memory_context['topics_discussed'])}"
             
             # Get performance trends
-            trends = memory.get_performance_trends(analytics_data.get('recipient_email', f'{recipient_name.lower()}@candlefish.com'))
+            trends = memory.get_performance_trends(recipient_email)
             if trends['revenue_trend'] and len(trends['revenue_trend']) > 1:
                 context += f"\n\nPERFORMANCE TREND:"
                 context += f"\n- Last week: ${trends['revenue_trend'][-2]['total']:,.0f}"
                 context += f"\n- This week: ${trends['revenue_trend'][-1]['total']:,.0f}"
+            
+            return context
                 
         except Exception as e:
             print(f"Could not load enhanced memory context: {e}")
+            return None
+    
+    def generate_insights(self, analytics_data: Dict, recipient_name: str, feedback_context: Dict = None,
+                          memory_context: str = None) -> Dict[str, Any]:
+        """
+        Generate conversational insights using Claude. memory_context is
+        load_memory_context()'s result if the caller already loaded it.
+        """
+        
+        # Build enhanced context from memory service
+        context = memory_context
+        if context is None:
+            context = self.load_memory_context(recipient_name, analytics_data.get('recipient_email'))
+        
+        if context is None:
             # Fall back to basic context
+            context = ""
             if feedback_context:
                 context = f"\nPast feedback from {recipient_name}: {json.dumps(feedback_context, indent=2)}"
             
@@ -119,7 +143,7 @@ class ConversationalInsights:
         - Workshop occupancy targets: Charleston 75%, Boston 60%
         
         THIS WEEK'S DATA:
-        {json.dumps(analytics_data, indent=2)}
+        {json.dumps(self._prompt_data(analytics_data), indent=2)}
         
         {context}
         {event_context}
@@ -215,39 +239,34 @@ class ConversationalInsights:
                     # Show the actual Shopify data Sophie had access to
                     print(f"\nSOURCE DATA (from Shopify API):")
                     current_week = analytics_data.get('current_week_by_location', {})
-                    charleston_data = current_week.get('charleston', {})
-                    boston_data = current_week.get('boston', {})
                     all_data = current_week.get('all', {})
+                    registry = get_location_registry()
                     
-                    print(f"  Charleston: ${charleston_data.get('total_revenue', 0):.2f} revenue, {charleston_data.get('order_count', 0)} orders")
-                    print(f"  Boston: ${boston_data.get('total_revenue', 0):.2f} revenue, {boston_data.get('order_count', 0)} orders")
+                    for key in registry.stores:
+                        store_data = current_week.get(key, {})
+                        print(f"  {registry.by_key[key].name}: ${store_data.get('total_revenue', 0):.2f} revenue, {store_data.get('order_count', 0)} orders")
                     print(f"  Combined: ${all_data.get('total_revenue', 0):.2f} revenue, {all_data.get('order_count', 0)} orders")
                     
                     # Show YoY data
                     yoy_changes = analytics_data.get('yoy_changes', {})
                     if yoy_changes:
                         print(f"\nYEAR-OVER-YEAR DATA (from Shopify API):")
-                        charleston_yoy = yoy_changes.get('charleston', {})
-                        boston_yoy = yoy_changes.get('boston', {})
-                        all_yoy = yoy_changes.get('all', {})
-                        print(f"  Charleston revenue change: {charleston_yoy.get('total_revenue_change', 'N/A')}%")
-                        print(f"  Boston revenue change: {boston_yoy.get('total_revenue_change', 'N/A')}%") 
-                        print(f"  Combined revenue change: {all_yoy.get('total_revenue_change', 'N/A')}%")
+                        for key in registry.stores:
+                            print(f"  {registry.by_key[key].name} revenue change: {yoy_changes.get(key, {}).get('total_revenue_change', 'N/A')}%")
+                        print(f"  Combined revenue change: {yoy_changes.get('all', {}).get('total_revenue_change', 'N/A')}%")
                     
                     # Show goals data if available
                     goals = analytics_data.get('goals', {})
                     conversion_metrics = analytics_data.get('conversion_metrics', {})
                     if goals and conversion_metrics:
                         print(f"\nGOALS DATA (from Google Sheets service):")
-                        charleston_goals = goals.get('charleston', {})
-                        boston_goals = goals.get('boston', {})
-                        charleston_metrics = conversion_metrics.get('charleston', {})
-                        boston_metrics = conversion_metrics.get('boston', {})
-                        
-                        print(f"  Charleston: {charleston_metrics.get('revenue_vs_goal_pct', 'N/A')}% of ${charleston_goals.get('revenue_goal', 'N/A'):.0f} weekly goal")
-                        print(f"    Monthly target: ${charleston_goals.get('monthly_revenue_goal', 'N/A'):.0f} ({charleston_goals.get('source_month', 'N/A')})")
-                        print(f"  Boston: {boston_metrics.get('revenue_vs_goal_pct', 'N/A')}% of ${boston_goals.get('revenue_goal', 'N/A'):.0f} weekly goal") 
-                        print(f"    Monthly target: ${boston_goals.get('monthly_revenue_goal', 'N/A'):.0f} ({boston_goals.get('source_month', 'N/A')})")
+                        for key in registry.stores:
+                            store_goals = goals.get(key, {})
+                            if 'revenue_goal' not in store_goals:
+                                print(f"  {registry.by_key[key].name}: no goals")
+                                continue
+                            print(f"  {registry.by_key[key].name}: {conversion_metrics.get(key, {}).get('revenue_vs_goal_pct', 'N/A')}% of ${store_goals['revenue_goal']:.0f} weekly goal")
+                            print(f"    Monthly target: ${store_goals.get('monthly_revenue_goal', 0):.0f} ({store_goals.get('source_month', 'N/A')})")
                         print(f"  Source: {goals.get('source', 'Unknown')}")
                         print(f"  NOTE: Weekly goals calculated from monthly forecast data")
                     
@@ -342,6 +361,72 @@ class ConversationalInsights:
             print(f"Error generating insights: {str(e)}")
             return self._generate_fallback_insights(analytics_data, recipient_name)
     
+    def _prompt_data(self, analytics_data: Dict) -> Dict:
+        """The analytics as the prompt sees them, with long series and grids summarized"""
+        data = dict(analytics_data)
+        if data.get('multi_week_trends'):
+            data['multi_week_trends'] = self._summarize_trends(data['multi_week_trends'])
+        if data.get('sales_heatmap'):
+            data['sales_heatmap'] = {
+                location: self._summarize_heatmap(heatmap) for location, heatmap in data['sales_heatmap'].items()
+            }
+        return data
+    
+    def _summarize_heatmap(self, heatmap: Dict) -> Dict:
+        """A location's peak hour and each open day's busiest hour, instead of the 7x24 grids"""
+        busiest = {}
+        for day, orders, revenue in zip(heatmap['days'], heatmap['orders'], heatmap['revenue']):
+            if any(orders):
+                hour = orders.index(max(orders))
+                busiest[day] = {'hour': hour, 'orders': orders[hour], 'revenue': revenue[hour]}
+        return {'peak_hour': heatmap['peak_hour'], 'busiest_hour_by_day': busiest}
+    
+    def _summarize_trends(self, trends: Dict) -> Dict:
+        """
+        The last PROMPT_TREND_WEEKS weeks of the multi-week trends, overall
+        and per location, with the change on the same week a year earlier
+        where the series reaches back that far, plus window averages and
+        each top product's window and recent revenue
+        """
+        recent = PROMPT_TREND_WEEKS
+        
+        def summarize(series: Dict) -> Dict:
+            revenue = series['revenue_trend']
+            weeks = []
+            for i in range(max(len(revenue) - recent, 0), len(revenue)):
+                week = {
+                    'week': revenue[i]['week'],
+                    'revenue': revenue[i]['revenue'],
+                    'orders': series['order_trend'][i]['orders'],
+                    'avg_ticket': series['avg_ticket_trend'][i]['avg_ticket']
+                }
+                if i >= 52 and revenue[i - 52]['revenue'] > 0:
+                    week['yoy_revenue_change'] = round(
+                        (revenue[i]['revenue'] - revenue[i - 52]['revenue']) / revenue[i - 52]['revenue'] * 100, 1
+                    )
+                weeks.append(week)
+            recent_revenue = [week['revenue'] for week in weeks]
+            return {
+                'recent_weeks': weeks,
+                'window_avg_weekly_revenue': round(sum(w['revenue'] for w in revenue) / len(revenue), 2) if revenue else 0,
+                'recent_avg_weekly_revenue': round(sum(recent_revenue) / len(recent_revenue), 2) if recent_revenue else 0
+            }
+        
+        summary = {'weeks': trends['weeks'], **summarize(trends)}
+        summary['by_location'] = {
+            location: summarize(series) for location, series in trends.get('by_location', {}).items()
+        }
+        summary['top_products'] = {
+            name: {
+                'window_revenue': round(sum(week['revenue'] for week in series), 2),
+                'recent_revenue': round(sum(week['revenue'] for week in series[-recent:]), 2)
+            }
+            for name, series in trends.get('top_products_trend', {}).items()
+        }
+        if 'wow_revenue_change' in trends:
+            summary['wow_revenue_change'] = round(trends['wow_revenue_change'], 1)
+        return summary
+    
     def _extract_topics(self, analytics_data: Dict) -> List[str]:
         """Extract key topics from analytics data"""
         topics = []
@@ -7,6 +7,11 @@ from email.mime.base import MIMEBase
 from email import encoders
 import random
 
+from .location_registry import get_location_registry
+
+# Accent colour per store section, in registry order
+STORE_COLORS = ['#667eea', '#d53f8c', '#38a169', '#dd6b20']
+
 
 class ConversationalEmailService:
     def __init__(self, app=None):
@@ -166,26 +171,20 @@ class ConversationalEmailService:
         # Otherwise, use the fallback template (this should rarely happen with the new prompt)
         goals_text = ""
         if 'goals' in analytics_data and 'conversion_metrics' in analytics_data:
-            charleston_metrics = analytics_data['conversion_metrics'].get('charleston', {})
-            charleston_current = analytics_data['current_week_by_location'].get('charleston', {})
-            charleston_goals = analytics_data['goals'].get('charleston', {})
-            
-            boston_metrics = analytics_data['conversion_metrics'].get('boston', {})
-            boston_current = analytics_data['current_week_by_location'].get('boston', {})
-            boston_goals = analytics_data['goals'].get('boston', {})
-            
+            registry = get_location_registry()
             goals_text = "\n\nQuick check on our goals:\n\n"
             
-            if charleston_current.get('order_count', 0) > 0:
-                revenue_pct = charleston_metrics.get('revenue_vs_goal_pct', 0)
-                avg_ticket = charleston_current.get('avg_order_value', 0)
-                avg_goal = charleston_goals.get('avg_ticket_goal', 0)
-                goals_text += f"Charleston hit {revenue_pct:.0f}% of revenue goal with ${avg_ticket:.0f} average tickets (goal is ${avg_goal:.0f})\n"
-            
-            if boston_current.get('order_count', 0) > 0:
-                revenue_pct = boston_metrics.get('revenue_vs_goal_pct', 0)
-                avg_ticket = boston_current.get('avg_order_value', 0)
-                goals_text += f"Boston hit {revenue_pct:.0f}% of target with ${avg_ticket:.0f} average tickets\n"
+            for key in registry.stores:
+                store_metrics = analytics_data['conversion_metrics'].get(key, {})
+                store_current = analytics_data['current_week_by_location'].get(key, {})
+                store_goals = analytics_data['goals'].get(key, {})
+                
+                if store_current.get('order_count', 0) > 0:
+                    revenue_pct = store_metrics.get('revenue_vs_goal_pct', 0)
+                    avg_ticket = store_current.get('avg_order_value', 0)
+                    avg_goal = store_goals.get('avg_ticket_goal', 0)
+                    goals_text += f"{registry.by_key[key].name} hit {revenue_pct:.0f}% of revenue goal with ${avg_ticket:.0f} average tickets"
+                    goals_text += f" (goal is ${avg_goal:.0f})\n" if avg_goal else "\n"
         
         # Fallback template
         text = f"""Hi {recipient_name},
@@ -205,15 +204,25 @@ Sophie Blake
 Rewined Intern"""
         return text
     
+    def _is_new_store(self, location, analytics_data):
+        """Whether a store opened within a year of the report week"""
+        if not location.opened or not analytics_data.get('week_start'):
+            return False
+        week_start = datetime.strptime(analytics_data['week_start'], '%Y-%m-%d').date()
+        return (week_start - location.opened).days < 365
+    
     def _format_top_products_section(self, analytics_data):
         """Format top products by location for email"""
         if 'product_performance_by_location' not in analytics_data:
             return ""
         
-        charleston_products = analytics_data['product_performance_by_location']['charleston'][:3]
-        boston_products = analytics_data['product_performance_by_location']['boston'][:3]
+        registry = get_location_registry()
+        products_by_store = {
+            key: analytics_data['product_performance_by_location'].get(key, [])[:3]
+            for key in registry.stores
+        }
         
-        if not charleston_products and not boston_products:
+        if not any(products_by_store.values()):
             return ""
         
         section = """
@@ -221,29 +230,23 @@ Rewined Intern"""
         <div style="font-size: 16px; line-height: 1.6; margin: 20px 0;">
         """
         
-        if charleston_products:
-            section += f"""
-            <p><strong style="color: #667eea;">In Charleston:</strong> Your customers are loving 
-            <strong>{charleston_products[0]['product'][:40]}{'...' if len(charleston_products[0]['product']) > 40 else ''}</strong> 
-            (sold {charleston_products[0]['quantity_sold']} for ${charleston_products[0]['revenue']:,.0f})"""
-            
-            if len(charleston_products) > 1:
-                section += f""", followed by <strong>{charleston_products[1]['product'][:30]}{'...' if len(charleston_products[1]['product']) > 30 else ''}</strong>"""
-            
-            section += ".</p>"
-        
-        if boston_products:
-            section += f"""
-            <p><strong style="color: #d53f8c;">In Boston:</strong> The top pick is 
-            <strong>{boston_products[0]['product'][:40]}{'...' if len(boston_products[0]['product']) > 40 else ''}</strong> 
-            (moved {boston_products[0]['quantity_sold']} units for ${boston_products[0]['revenue']:,.0f})"""
-            
-            if len(boston_products) > 1:
-                section += f""", with <strong>{boston_products[1]['product'][:30]}{'...' if len(boston_products[1]['product']) > 30 else ''}</strong> coming in second"""
-            
-            section += ".</p>"
-        elif analytics_data.get('current_week_by_location', {}).get('boston', {}).get('order_count', 0) == 0:
-            section += '<p><strong style="color: #d53f8c;">Boston:</strong> Still warming up - no sales data this week.</p>'
+        for index, (key, products) in enumerate(products_by_store.items()):
+            location = registry.by_key[key]
+            color = STORE_COLORS[index % len(STORE_COLORS)]
+            
+            if products:
+                section += f"""
+            <p><strong style="color: {color};">In {location.name}:</strong> Your customers are loving 
+            <strong>{products[0]['product'][:40]}{'...' if len(products[0]['product']) > 40 else ''}</strong> 
+            (sold {products[0]['quantity_sold']} for ${products[0]['revenue']:,.0f})"""
+                
+                if len(products) > 1:
+                    section += f""", followed by <strong>{products[1]['product'][:30]}{'...' if len(products[1]['product']) > 30 else ''}</strong>"""
+                
+                section += ".</p>"
+            elif (self._is_new_store(location, analytics_data)
+                  and analytics_data.get('current_week_by_location', {}).get(key, {}).get('order_count', 0) == 0):
+                section += f'<p><strong style="color: {color};">{location.name}:</strong> Still warming up - no sales data this week.</p>'
         
         section += "</div>"
         
@@ -256,23 +259,40 @@ Rewined Intern"""
         
         goals = analytics_data['goals']
         metrics = analytics_data['conversion_metrics']
+        registry = get_location_registry()
         
         section = """
         <h2>🎯 How We're Doing vs Goals</h2>
         <div style="font-size: 16px; line-height: 1.6; margin: 20px 0;">
         """
         
-        # Charleston performance
-        charleston_metrics = metrics.get('charleston', {})
-        charleston_goals = goals.get('charleston', {})
-        charleston_current = analytics_data['current_week_by_location'].get('charleston', {})
-        
-        if charleston_current.get('order_count', 0) > 0:
+        for index, key in enumerate(registry.stores):
+            location = registry.by_key[key]
+            store_metrics = metrics.get(key, {})
+            store_goals = goals.get(key, {})
+            store_current = analytics_data['current_week_by_location'].get(key, {})
+            
+            if store_current.get('order_count', 0) == 0:
+                continue
+            
             section += f"""
-            <p><strong style="color: #667eea;">Charleston:</strong> """
+            <p><strong style="color: {STORE_COLORS[index % len(STORE_COLORS)]};">{location.name}:</strong> """
+            
+            revenue_pct = store_metrics.get('revenue_vs_goal_pct', 0)
+            avg_ticket_actual = store_current.get('avg_order_value', 0)
+            avg_ticket_goal = store_goals.get('avg_ticket_goal', 0)
+            
+            # Stores in their first year are measured against ramp-up targets
+            if self._is_new_store(location, analytics_data):
+                if revenue_pct >= 100:
+                    section += f"Killing it for a new store! Hit <strong>{revenue_pct:.0f}%</strong> of target "
+                else:
+                    section += f"Building momentum - hit <strong>{revenue_pct:.0f}%</strong> of target "
+                section += f"with ${avg_ticket_actual:.0f} average tickets."
+                section += "</p>"
+                continue
             
             # Revenue vs goal
-            revenue_pct = charleston_metrics.get('revenue_vs_goal_pct', 0)
             if revenue_pct >= 100:
                 section += f"Crushed it! Hit <strong>{revenue_pct:.0f}%</strong> of the revenue goal "
             elif revenue_pct >= 90:
@@ -281,10 +301,6 @@ Rewined Intern"""
                 section += f"Hit <strong>{revenue_pct:.0f}%</strong> of the revenue goal "
             
             # Average ticket vs goal
-            avg_ticket_pct = charleston_metrics.get('avg_ticket_vs_goal_pct', 0)
-            avg_ticket_actual = charleston_current.get('avg_order_value', 0)
-            avg_ticket_goal = charleston_goals.get('avg_ticket_goal', 0)
-            
             if avg_ticket_actual >= avg_ticket_goal:
                 section += f"and average tickets are looking great at <strong>${avg_ticket_actual:.0f}</strong> (goal was ${avg_ticket_goal:.0f})!"
             else:
@@ -292,27 +308,6 @@ Rewined Intern"""
             
             section += "</p>"
         
-        # Boston performance
-        boston_metrics = metrics.get('boston', {})
-        boston_goals = goals.get('boston', {})
-        boston_current = analytics_data['current_week_by_location'].get('boston', {})
-        
-        if boston_current.get('order_count', 0) > 0:
-            section += f"""
-            <p><strong style="color: #d53f8c;">Boston:</strong> """
-            
-            revenue_pct = boston_metrics.get('revenue_vs_goal_pct', 0)
-            if revenue_pct >= 100:
-                section += f"Killing it for a new store! Hit <strong>{revenue_pct:.0f}%</strong> of target "
-            else:
-                section += f"Building momentum - hit <strong>{revenue_pct:.0f}%</strong> of target "
-            
-            avg_ticket_actual = boston_current.get('avg_order_value', 0)
-            avg_ticket_goal = boston_goals.get('avg_ticket_goal', 0)
-            
-            section += f"with ${avg_ticket_actual:.0f} average tickets."
-            section += "</p>"
-        
         section += "</div>"
         return section
     
@@ -385,12 +380,14 @@ Analytics System
                 reply_to=os.getenv('MAIL_USERNAME')
             )
             
-            msg.body = """Hi,
+            registry = get_location_registry()
+            store_names = [registry.by_key[key].name for key in registry.stores]
+            msg.body = f"""Hi,
 
 This is a test email to confirm your weekly analytics reports are set up correctly.
 
 Starting next Monday, you'll receive:
-- Weekly performance metrics for Charleston and Boston stores
+- Weekly performance metrics for the {' and '.join(store_names)} stores
 - Progress toward revenue and average ticket goals
 - Top selling products by location
 - Analysis and insights about store performance
@@ -0,0 +1,120 @@
+import json
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .order_columns import OrderColumns
+
+
+# Bucket that takes web orders and any location not registered as a store
+ONLINE = 'online'
+
+# Used when neither LOCATIONS_JSON nor LOCATIONS_FILE is set. Register
+# another store (e.g. Atlanta) there to split it out of online
+DEFAULT_LOCATIONS = [
+    {'key': 'charleston', 'id': '10719053', 'name': 'Charleston', 'channel': 'pos'},
+    {'key': 'boston', 'id': '71781154968', 'name': 'Boston', 'channel': 'pos', 'opened': '2024-08-01'},
+]
+
+
+class Location:
+    """One configured Shopify location"""
+
+    def __init__(self, key: str, id: str, name: str = None, channel: str = 'pos',
+                 opened: str = None, capacity: int = None):
+        self.key = key
+        self.id = str(id)
+        self.name = name or key.capitalize()
+        # 'pos' locations are stores with their own report section; any
+        # other channel is counted as online
+        self.channel = channel
+        self.opened = date.fromisoformat(opened) if opened else None
+        # Workshop seats per session, when known
+        self.capacity = capacity
+
+    @property
+    def is_store(self) -> bool:
+        return self.channel == 'pos'
+
+    def open_on(self, day: date) -> bool:
+        return self.opened is None or self.opened <= day
+
+    def config(self) -> Tuple:
+        return (self.key, self.id, self.channel, self.opened and self.opened.isoformat(), self.capacity)
+
+
+class LocationRegistry:
+    """
+    Maps Shopify location ids to report buckets: one per store, in
+    configured order, then ONLINE for everything else. The lookup is a dict
+    per distinct location id, so partitioning a batch of orders costs the
+    same however many stores are registered.
+    """
+
+    def __init__(self, locations: Sequence[Dict]):
+        self.locations = [Location(**location) for location in locations]
+        keys = [location.key for location in self.locations]
+        if len(set(keys)) != len(keys):
+            raise ValueError(f"Duplicate location keys: {keys}")
+        if {'all', ONLINE} & set(keys):
+            raise ValueError("'all' and 'online' are reserved location keys")
+
+        self.by_key = {location.key: location for location in self.locations}
+        self.stores = [location.key for location in self.locations if location.is_store]
+        self.bucket_names = self.stores + [ONLINE]
+        self.online_bucket = len(self.stores)
+        self._bucket_by_id = {
+            location.id: self.stores.index(location.key) if location.is_store else self.online_bucket
+            for location in self.locations
+        }
+
+    @classmethod
+    def from_env(cls) -> 'LocationRegistry':
+        """Load from LOCATIONS_JSON, else the LOCATIONS_FILE JSON file, else the defaults"""
+        raw = os.getenv('LOCATIONS_JSON')
+        if raw:
+            return cls(json.loads(raw))
+        path = os.getenv('LOCATIONS_FILE', os.path.join('data', 'locations.json'))
+        if os.path.exists(path):
+            with open(path, 'r') as f:
+                return cls(json.load(f))
+        return cls(DEFAULT_LOCATIONS)
+
+    def bucket_of(self, location_id) -> int:
+        """Bucket index for a location id; unregistered ids are online"""
+        return self._bucket_by_id.get(str(location_id or ''), self.online_bucket)
+
+    def buckets(self, orders: OrderColumns) -> np.ndarray:
+        """Bucket index for every order, looking each distinct location id up once"""
+        table = np.array(
+            [self.bucket_of(location_id) for location_id in orders.locations.values] or [self.online_bucket],
+            dtype=np.int64
+        )
+        return table[orders.location]
+
+    def open_on(self, key: str, day) -> bool:
+        """Whether a store was open on day; unknown keys and 'all' count as open"""
+        location = self.by_key.get(key)
+        if isinstance(day, datetime):
+            day = day.date()
+        return location is None or location.open_on(day)
+
+    def config_key(self) -> Tuple:
+        """Everything about the location setup that changes a report"""
+        return tuple(location.config() for location in self.locations)
+
+
+_registry: Optional[LocationRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_location_registry() -> LocationRegistry:
+    """Return the registry loaded from the environment, shared by the process"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = LocationRegistry.from_env()
+        return _registry
@@ -5,6 +5,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Any, Optional
 import logging
 
+from .location_registry import get_location_registry
+
 logger = logging.getLogger(__name__)
 
 class MemoryService:
@@ -132,15 +134,13 @@ class MemoryService:
         key_points.extend([f"Top: {match.strip()}" for match in product_matches[:1]])
         
         # Store mentions
-        if 'charleston' in email_content.lower():
-            charleston_match = re.search(r'charleston[^.]*(?:hit|achieved|reached|made)[^.]+', email_content, re.IGNORECASE)
-            if charleston_match:
-                key_points.append(charleston_match.group(0))
-        
-        if 'boston' in email_content.lower():
-            boston_match = re.search(r'boston[^.]*(?:hit|achieved|reached|made)[^.]+', email_content, re.IGNORECASE)
-            if boston_match:
-                key_points.append(boston_match.group(0))
+        registry = get_location_registry()
+        for key in registry.stores:
+            name = registry.by_key[key].name
+            if name.lower() in email_content.lower():
+                store_match = re.search(re.escape(name) + r'[^.]*(?:hit|achieved|reached|made)[^.]+', email_content, re.IGNORECASE)
+                if store_match:
+                    key_points.append(store_match.group(0))
         
         return key_points[:5]  # Limit to 5 key points
     
@@ -170,36 +170,41 @@ class MemoryService:
                     top_products TEXT,
                     key_topics TEXT,
                     questions_asked TEXT,
-                    email_excerpt TEXT
+                    email_excerpt TEXT,
+                    by_location TEXT
                 )
             ''')
+            # Tables from before by_location keep their per-store columns
+            # for old rows; new rows record every registered store here
+            columns = [row[1] for row in cursor.execute('PRAGMA table_info(conversation_memory)')]
+            if 'by_location' not in columns:
+                cursor.execute('ALTER TABLE conversation_memory ADD COLUMN by_location TEXT')
             
             # Extract key metrics
-            charleston_data = analytics_data.get('current_week_by_location', {}).get('charleston', {})
-            boston_data = analytics_data.get('current_week_by_location', {}).get('boston', {})
+            current = analytics_data.get('current_week_by_location', {})
             goals = analytics_data.get('goals', {})
             conversion = analytics_data.get('conversion_metrics', {})
+            by_location = {
+                key: {
+                    'revenue': current.get(key, {}).get('total_revenue', 0),
+                    'goal': goals.get(key, {}).get('revenue_goal', 0),
+                    'vs_goal_pct': conversion.get(key, {}).get('revenue_vs_goal_pct', 0)
+                }
+                for key in get_location_registry().stores
+            }
             
             # Save enhanced memory
             cursor.execute('''
                 INSERT INTO conversation_memory (
-                    recipient_email, week_start, week_end,
-                    revenue_total, revenue_charleston, revenue_boston,
-                    goal_charleston, goal_boston,
-                    performance_charleston_pct, performance_boston_pct,
+                    recipient_email, week_start, week_end, revenue_total, by_location,
                     top_products, key_topics, questions_asked, email_excerpt
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 recipient_email,
                 analytics_data.get('week_start'),
                 analytics_data.get('week_end'),
                 analytics_data.get('total_revenue', 0),
-                charleston_data.get('total_revenue', 0),
-                boston_data.get('total_revenue', 0),
-                goals.get('charleston', {}).get('revenue_goal', 0),
-                goals.get('boston', {}).get('revenue_goal', 0),
-                conversion.get('charleston', {}).get('revenue_vs_goal_pct', 0),
-                conversion.get('boston', {}).get('revenue_vs_goal_pct', 0),
+                json.dumps(by_location),
                 json.dumps(self._get_top_products(analytics_data)),
                 json.dumps(topics),
                 json.dumps(questions),
@@ -224,49 +229,52 @@ class MemoryService:
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
-        trends = {
-            'revenue_trend': [],
-            'charleston_trend': [],
-            'boston_trend': [],
-            'topics_evolution': []
-        }
+        # One '<store>_trend' series per registered store
+        stores = get_location_registry().stores
+        series = ['revenue_trend'] + [f'{key}_trend' for key in stores]
+        trends = {name: [] for name in series}
+        trends['topics_evolution'] = []
         
         try:
             cursor.execute('''
-                SELECT week_start, revenue_total, revenue_charleston, revenue_boston,
-                       performance_charleston_pct, performance_boston_pct, key_topics
-                FROM conversation_memory
+                SELECT * FROM conversation_memory
                 WHERE recipient_email = ?
                 ORDER BY week_start DESC
                 LIMIT 8
             ''', (recipient_email,))
+            names = [column[0] for column in cursor.description]
             
             for row in cursor.fetchall():
-                week_start, total, charleston, boston, chs_pct, bos_pct, topics = row
+                row = dict(zip(names, row))
+                week_start = row['week_start']
+                if row.get('by_location'):
+                    by_location = json.loads(row['by_location'])
+                else:
+                    # Rows saved before by_location had a column per store
+                    by_location = {
+                        key: {'revenue': row[f'revenue_{key}'], 'vs_goal_pct': row[f'performance_{key}_pct']}
+                        for key in ('charleston', 'boston')
+                    }
                 
+                pcts = [by_location.get(key, {}).get('vs_goal_pct') for key in stores]
                 trends['revenue_trend'].append({
                     'week': week_start,
-                    'total': total,
-                    'vs_goal': (chs_pct + bos_pct) / 2 if chs_pct and bos_pct else None
-                })
-                
-                trends['charleston_trend'].append({
-                    'week': week_start,
-                    'revenue': charleston,
-                    'vs_goal_pct': chs_pct
+                    'total': row['revenue_total'],
+                    'vs_goal': sum(pcts) / len(pcts) if pcts and all(pcts) else None
                 })
                 
-                trends['boston_trend'].append({
-                    'week': week_start,
-                    'revenue': boston,
-                    'vs_goal_pct': bos_pct
-                })
+                for key in stores:
+                    trends[f'{key}_trend'].append({
+                        'week': week_start,
+                        'revenue': by_location.get(key, {}).get('revenue'),
+                        'vs_goal_pct': by_location.get(key, {}).get('vs_goal_pct')
+                    })
                 
-                if topics:
-                    trends['topics_evolution'].extend(json.loads(topics))
+                if row['key_topics']:
+                    trends['topics_evolution'].extend(json.loads(row['key_topics']))
             
             # Reverse to chronological order
-            for key in ['revenue_trend', 'charleston_trend', 'boston_trend']:
+            for key in series:
                 trends[key].reverse()
             
         except Exception as e:
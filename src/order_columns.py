@@ -0,0 +1,192 @@
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from . import time_buckets
+from .shopify_schema import item_cents, normalize_email, order_cents
+
+
+class Interner:
+    """Maps repeated strings to small integer codes and back"""
+
+    def __init__(self):
+        self.values: List = []
+        self._codes: Dict = {}
+
+    @classmethod
+    def from_values(cls, values: List) -> 'Interner':
+        """Rebuild an interner from another's `values`, keeping its codes"""
+        interner = cls()
+        interner.values = list(values)
+        interner._codes = {value: code for code, value in enumerate(interner.values)}
+        return interner
+
+    def code(self, value) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def lookup(self, value) -> Optional[int]:
+        return self._codes.get(value)
+
+    def __len__(self):
+        return len(self.values)
+
+
+class OrderColumns:
+    """
+    Columnar view of a batch of orders for ShopifyAnalytics.
+
+    Order-level fields are parallel NumPy arrays indexed by order position.
+    Line items are flattened into one table whose `item_order` column points
+    back at the owning order. Titles, SKUs, customer emails and location ids
+    are interned, so a year of orders holds each distinct string once.
+
+    Build it once per fetch with from_orders() and slice it with take();
+    subsets share the intern tables of the batch they came from.
+    """
+
+    def __init__(self):
+        self.titles = Interner()
+        self.skus = Interner()
+        self.customers = Interner()
+        self.locations = Interner()
+
+        # Order-level columns
+        self.order_id = np.empty(0, dtype=np.int64)
+        # created_at parsed once (see time_buckets): epoch seconds, and
+        # store-local seconds in the order's own offset
+        self.created_ts = np.empty(0, dtype=np.int64)
+        self.local_ts = np.empty(0, dtype=np.int64)
+        self.weekday = np.empty(0, dtype=np.int8)   # Monday == 0, store-local
+        self.total_cents = np.empty(0, dtype=np.int64)
+        self.customer = np.empty(0, dtype=np.int32)
+        self.location = np.empty(0, dtype=np.int32)
+        self.tags: List[List[str]] = []
+        self.note: List[Optional[str]] = []
+
+        # Line-item columns
+        self.item_order = np.empty(0, dtype=np.int32)
+        self.item_title = np.empty(0, dtype=np.int32)
+        self.item_sku = np.empty(0, dtype=np.int32)
+        self.item_product_id = np.empty(0, dtype=np.int64)
+        self.item_quantity = np.empty(0, dtype=np.int64)
+        self.item_cents = np.empty(0, dtype=np.int64)   # unit price
+
+        # Line-item classification (see classify_items); None until classified
+        self.item_category: Optional[np.ndarray] = None
+        self.item_trend: Optional[np.ndarray] = None
+        self.item_seat: Optional[np.ndarray] = None
+
+    @classmethod
+    def from_orders(cls, orders: Sequence[Dict]) -> 'OrderColumns':
+        """Flatten analytics order dicts (see shopify_schema) into columns"""
+        columns = cls()
+        titles, skus = columns.titles, columns.skus
+        customers, locations = columns.customers, columns.locations
+
+        order_id, created_at, total_cents, customer, location = [], [], [], [], []
+        item_order, item_title, item_sku, item_product_id, item_quantity, unit_cents = [], [], [], [], [], []
+
+        for index, order in enumerate(orders):
+            order_id.append(order['id'])
+            created_at.append(order['created_at'])
+            total_cents.append(order_cents(order))
+            customer.append(customers.code(normalize_email(order.get('customer_email')) or 'guest'))
+            location.append(locations.code(str(order.get('location_id') or '')))
+            columns.tags.append(order.get('tags') or [])
+            columns.note.append(order.get('note'))
+
+            for item in order['line_items']:
+                item_order.append(index)
+                item_title.append(titles.code(item['title']))
+                item_sku.append(skus.code(item.get('sku') or ''))
+                item_product_id.append(item.get('product_id') or -1)
+                item_quantity.append(item['quantity'])
+                unit_cents.append(item_cents(item))
+
+        columns.order_id = np.array(order_id, dtype=np.int64)
+        columns.created_ts, columns.local_ts = time_buckets.parse_timestamps(created_at)
+        columns.weekday = time_buckets.weekdays(columns.local_ts)
+        columns.total_cents = np.array(total_cents, dtype=np.int64)
+        columns.customer = np.array(customer, dtype=np.int32)
+        columns.location = np.array(location, dtype=np.int32)
+
+        columns.item_order = np.array(item_order, dtype=np.int32)
+        columns.item_title = np.array(item_title, dtype=np.int32)
+        columns.item_sku = np.array(item_sku, dtype=np.int32)
+        columns.item_product_id = np.array(item_product_id, dtype=np.int64)
+        columns.item_quantity = np.array(item_quantity, dtype=np.int64)
+        columns.item_cents = np.array(unit_cents, dtype=np.int64)
+
+        return columns
+
+    def __len__(self):
+        return len(self.order_id)
+
+    def hours(self) -> np.ndarray:
+        """Store-local hour of each order, 0-23"""
+        return time_buckets.hours(self.local_ts)
+
+    def local_days(self) -> np.ndarray:
+        """Store-local date of each order, as days since 1970-01-01 (see time_buckets.day_number)"""
+        return time_buckets.days(self.local_ts)
+
+    def week_index(self, start, local: bool = True) -> np.ndarray:
+        """
+        Whole weeks between midnight of the `start` date and each order,
+        store-local by default or in UTC; negative before `start`
+        """
+        return time_buckets.week_index(self.local_ts if local else self.created_ts, start)
+
+    def items_per_order(self) -> np.ndarray:
+        """Total quantity of line items on each order"""
+        return np.bincount(self.item_order, weights=self.item_quantity, minlength=len(self)).astype(np.int64)
+
+    def location_mask(self, location_id) -> np.ndarray:
+        code = self.locations.lookup(str(location_id))
+        if code is None:
+            return np.zeros(len(self), dtype=bool)
+        return self.location == code
+
+    def take(self, order_indices) -> 'OrderColumns':
+        """Subset of orders (and their line items), sharing intern tables"""
+        order_indices = np.asarray(order_indices)
+        if order_indices.dtype == bool:
+            order_indices = np.flatnonzero(order_indices)
+        else:
+            order_indices = order_indices.astype(np.intp)
+
+        subset = OrderColumns()
+        subset.titles, subset.skus = self.titles, self.skus
+        subset.customers, subset.locations = self.customers, self.locations
+
+        subset.order_id = self.order_id[order_indices]
+        subset.created_ts = self.created_ts[order_indices]
+        subset.local_ts = self.local_ts[order_indices]
+        subset.weekday = self.weekday[order_indices]
+        subset.total_cents = self.total_cents[order_indices]
+        subset.customer = self.customer[order_indices]
+        subset.location = self.location[order_indices]
+        subset.tags = [self.tags[i] for i in order_indices]
+        subset.note = [self.note[i] for i in order_indices]
+
+        # Renumber line items onto the subset's order positions
+        new_index = np.full(len(self), -1, dtype=np.int32)
+        new_index[order_indices] = np.arange(len(order_indices), dtype=np.int32)
+        keep = new_index[self.item_order] >= 0 if len(self.item_order) else np.zeros(0, dtype=bool)
+
+        subset.item_order = new_index[self.item_order[keep]]
+        subset.item_title = self.item_title[keep]
+        subset.item_sku = self.item_sku[keep]
+        subset.item_product_id = self.item_product_id[keep]
+        subset.item_quantity = self.item_quantity[keep]
+        subset.item_cents = self.item_cents[keep]
+        if self.item_category is not None:
+            subset.item_category = self.item_category[keep]
+            subset.item_trend = self.item_trend[keep]
+            subset.item_seat = self.item_seat[keep]
+
+        return subset
@@ -0,0 +1,684 @@
+import sqlite3
+import os
+import json
+import calendar
+import hashlib
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
+
+from .product_classifier import RULES_VERSION, get_product_classifier
+from .shopify_schema import item_cents, normalize_email, order_cents
+
+
+# Bump when the rollup tables change shape or how rows are keyed, to
+# rebuild them from orders.
+# Product verdicts are baked into the rollups, so a RULES_VERSION change
+# rebuilds them too
+ROLLUP_VERSION = '7'
+
+ROLLUP_TABLES = (
+    'daily_location_rollup', 'daily_product_rollup', 'daily_customer_rollup',
+    'hourly_location_rollup', 'weekly_location_rollup', 'weekly_product_rollup', 'customer_index'
+)
+
+# SQLite's default limit on bound parameters is 999
+_ID_CHUNK = 500
+
+# Called with the store-local days touched by every upsert, in any store
+_change_listeners = []
+
+
+class OrderStore:
+    """Local SQLite copy of Shopify orders, kept current by OrderSync"""
+
+    def __init__(self, db_path: str = None):
+        if not db_path:
+            db_path = os.getenv('ORDER_STORE_PATH', 'data/orders.db')
+
+        # Ensure directory exists
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self.db_path = db_path
+        self.classifier = get_product_classifier()
+        self._init_database()
+
+        if self.get_state('rollup_version') != _rollup_version():
+            # The tables may have changed shape too, so start them afresh
+            self._drop_rollups()
+            self._init_database()
+            self.rebuild_rollups()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        """Initialize database tables"""
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        # WAL lets reports read while a sync is writing
+        cursor.execute('PRAGMA journal_mode=WAL')
+
+        # Orders keep the analytics dict as JSON, with the columns we filter
+        # on pulled out so they can be indexed
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS orders (
+                id INTEGER PRIMARY KEY,
+                created_at TEXT NOT NULL,
+                created_at_ts INTEGER NOT NULL,
+                updated_at TEXT,
+                location_id TEXT,
+                customer_email TEXT,
+                payload TEXT NOT NULL
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_created_at ON orders (created_at_ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_location_id ON orders (location_id, created_at_ts)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_orders_customer_email ON orders (customer_email)')
+
+        # Daily rollups keyed by the store-local date (created_at[:10]),
+        # maintained by upsert_orders; money is kept in integer cents so
+        # replacing an order subtracts its old contribution exactly
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_location_rollup (
+                day TEXT NOT NULL,
+                location_id TEXT NOT NULL,
+                orders INTEGER NOT NULL,
+                revenue_cents INTEGER NOT NULL,
+                items INTEGER NOT NULL,
+                workshop_orders INTEGER NOT NULL,
+                PRIMARY KEY (day, location_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_product_rollup (
+                day TEXT NOT NULL,
+                location_id TEXT NOT NULL,
+                product_id INTEGER NOT NULL,
+                title TEXT NOT NULL,
+                category INTEGER NOT NULL,
+                trend INTEGER NOT NULL,
+                seat INTEGER NOT NULL,
+                workshop INTEGER NOT NULL,
+                orders INTEGER NOT NULL,
+                lines INTEGER NOT NULL,
+                quantity INTEGER NOT NULL,
+                revenue_cents INTEGER NOT NULL,
+                PRIMARY KEY (day, location_id, product_id, title, category, trend, seat, workshop)
+            )
+        ''')
+        # One row per customer (customer_hash of the email, or 'guest') per
+        # day and location, for distinct and repeat customer counts over
+        # any window
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS daily_customer_rollup (
+                day TEXT NOT NULL,
+                location_id TEXT NOT NULL,
+                customer TEXT NOT NULL,
+                orders INTEGER NOT NULL,
+                revenue_cents INTEGER NOT NULL,
+                PRIMARY KEY (day, location_id, customer)
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_daily_customer ON daily_customer_rollup (customer, day)')
+        # Lifetime totals per customer (keyed by customer_hash of the email),
+        # so a week's customers are classified new or returning without
+        # reading their history
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS customer_index (
+                customer_hash TEXT PRIMARY KEY,
+                first_order_day TEXT NOT NULL,
+                orders INTEGER NOT NULL,
+                revenue_cents INTEGER NOT NULL
+            )
+        ''')
+        # Orders and revenue per store-local hour, for the sales heatmap
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS hourly_location_rollup (
+                day TEXT NOT NULL,
+                location_id TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                orders INTEGER NOT NULL,
+                revenue_cents INTEGER NOT NULL,
+                PRIMARY KEY (day, location_id, hour)
+            )
+        ''')
+
+        # The same location and product totals per week (keyed by the
+        # week's Monday), so long trend windows read a few rows per week
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS weekly_location_rollup (
+                week TEXT NOT NULL,
+                location_id TEXT NOT NULL,
+                orders INTEGER NOT NULL,
+                revenue_cents INTEGER NOT NULL,
+                items INTEGER NOT NULL,
+                PRIMARY KEY (week, location_id)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS weekly_product_rollup (
+                week TEXT NOT NULL,
+                location_id TEXT NOT NULL,
+                title TEXT NOT NULL,
+                orders INTEGER NOT NULL,
+                lines INTEGER NOT NULL,
+                quantity INTEGER NOT NULL,
+                revenue_cents INTEGER NOT NULL,
+                PRIMARY KEY (week, location_id, title)
+            )
+        ''')
+
+        # Bumped for every day an upsert touches, so cached results can
+        # tell whether the days they were computed from have changed
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS day_versions (
+                day TEXT PRIMARY KEY,
+                version INTEGER NOT NULL
+            )
+        ''')
+
+        # Sync bookkeeping (watermark, history start)
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+        conn.commit()
+        conn.close()
+
+    def upsert_orders(self, orders: List[Dict]) -> int:
+        """Insert or replace orders and fold them into the rollups; returns how many were written"""
+        if not orders:
+            return 0
+
+        # Last copy wins if the batch holds an order twice
+        orders = list({order['id']: order for order in orders}.values())
+
+        rows = [
+            (
+                order['id'],
+                order['created_at'],
+                to_epoch(order['created_at']),
+                order.get('updated_at'),
+                str(order.get('location_id') or ''),
+                order.get('customer_email'),
+                json.dumps(order)
+            )
+            for order in orders
+        ]
+
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        # Take the write lock before reading the copies being replaced, so a
+        # concurrent upsert of the same orders can't subtract them twice
+        cursor.execute('BEGIN IMMEDIATE')
+
+        # Orders being replaced come out of the rollups before the new copies go in
+        replaced = self._stored_orders(cursor, [order['id'] for order in orders])
+
+        cursor.executemany('''
+            INSERT OR REPLACE INTO orders
+            (id, created_at, created_at_ts, updated_at, location_id, customer_email, payload)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', rows)
+        self._apply_rollups(cursor, replaced, -1)
+        self._apply_rollups(cursor, orders, 1)
+        if replaced:
+            self._prune_rollups(cursor)
+            self._refresh_first_orders(cursor, replaced)
+
+        days = {order['created_at'][:10] for order in replaced + orders}
+        cursor.execute('SELECT COALESCE(MAX(version), 0) + 1 FROM day_versions')
+        version = cursor.fetchone()[0]
+        cursor.executemany(
+            'INSERT OR REPLACE INTO day_versions (day, version) VALUES (?, ?)',
+            [(day, version) for day in days]
+        )
+
+        conn.commit()
+        conn.close()
+        self.classifier.flush()
+
+        for listener in list(_change_listeners):
+            listener(days)
+
+        return len(rows)
+
+    def data_version(self, day_ranges: List) -> int:
+        """Latest change to any day in the (start_day, end_day) ranges; 0 if none"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        version = 0
+        for start_day, end_day in day_ranges:
+            cursor.execute('SELECT MAX(version) FROM day_versions WHERE day BETWEEN ? AND ?', (start_day, end_day))
+            version = max(version, cursor.fetchone()[0] or 0)
+        conn.close()
+        return version
+
+    def _stored_orders(self, cursor: sqlite3.Cursor, order_ids: List) -> List[Dict]:
+        stored = []
+        for i in range(0, len(order_ids), _ID_CHUNK):
+            chunk = order_ids[i:i + _ID_CHUNK]
+            cursor.execute(
+                f"SELECT payload FROM orders WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            )
+            stored.extend(json.loads(row['payload']) for row in cursor.fetchall())
+        return stored
+
+    def _apply_rollups(self, cursor: sqlite3.Cursor, orders: List[Dict], sign: int):
+        """Add (sign=1) or remove (sign=-1) orders' contributions to the daily and weekly rollups"""
+        location_rows, product_rows, customer_rows, hour_rows, index_rows = [], [], [], [], []
+        weekly_location_rows, weekly_product_rows = [], []
+
+        for order in orders:
+            day = order['created_at'][:10]
+            week = week_of(day)
+            location_id = str(order.get('location_id') or '')
+            cents = order_cents(order)
+            workshop = int(self.classifier.is_workshop_order(order))
+
+            products = {}
+            for item in order['line_items']:
+                verdict = self.classifier.classify(item.get('product_id'), item.get('sku'), item['title'])
+                key = (item.get('product_id') or -1, item['title'], verdict.category, verdict.trend, int(verdict.seat))
+                totals = products.setdefault(key, [0, 0, 0])
+                totals[0] += 1
+                totals[1] += item['quantity']
+                totals[2] += item_cents(item) * item['quantity']
+
+            items = sum(item['quantity'] for item in order['line_items'])
+            location_rows.append((day, location_id, sign, sign * cents, sign * items, sign * workshop))
+            weekly_location_rows.append((week, location_id, sign, sign * cents, sign * items))
+            customer = customer_hash(order['customer_email']) if normalize_email(order.get('customer_email')) else 'guest'
+            customer_rows.append((day, location_id, customer, sign, sign * cents))
+            hour_rows.append((day, location_id, int(order['created_at'][11:13]), sign, sign * cents))
+            if customer != 'guest':
+                index_rows.append((customer, day, sign, sign * cents))
+            product_rows.extend(
+                (day, location_id) + key + (workshop, sign, sign * lines, sign * quantity, sign * line_cents)
+                for key, (lines, quantity, line_cents) in products.items()
+            )
+
+            titles = {}
+            for (_, title, *_), (lines, quantity, line_cents) in products.items():
+                totals = titles.setdefault(title, [0, 0, 0])
+                totals[0] += lines
+                totals[1] += quantity
+                totals[2] += line_cents
+            weekly_product_rows.extend(
+                (week, location_id, title, sign, sign * lines, sign * quantity, sign * line_cents)
+                for title, (lines, quantity, line_cents) in titles.items()
+            )
+
+        cursor.executemany('''
+            INSERT INTO daily_location_rollup (day, location_id, orders, revenue_cents, items, workshop_orders)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT (day, location_id) DO UPDATE SET
+                orders = orders + excluded.orders,
+                revenue_cents = revenue_cents + excluded.revenue_cents,
+                items = items + excluded.items,
+                workshop_orders = workshop_orders + excluded.workshop_orders
+        ''', location_rows)
+        cursor.executemany('''
+            INSERT INTO daily_product_rollup
+            (day, location_id, product_id, title, category, trend, seat, workshop, orders, lines, quantity, revenue_cents)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (day, location_id, product_id, title, category, trend, seat, workshop) DO UPDATE SET
+                orders = orders + excluded.orders,
+                lines = lines + excluded.lines,
+                quantity = quantity + excluded.quantity,
+                revenue_cents = revenue_cents + excluded.revenue_cents
+        ''', product_rows)
+        cursor.executemany('''
+            INSERT INTO daily_customer_rollup (day, location_id, customer, orders, revenue_cents)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (day, location_id, customer) DO UPDATE SET
+                orders = orders + excluded.orders,
+                revenue_cents = revenue_cents + excluded.revenue_cents
+        ''', customer_rows)
+        cursor.executemany('''
+            INSERT INTO hourly_location_rollup (day, location_id, hour, orders, revenue_cents)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (day, location_id, hour) DO UPDATE SET
+                orders = orders + excluded.orders,
+                revenue_cents = revenue_cents + excluded.revenue_cents
+        ''', hour_rows)
+        # Removing an order never moves first_order_day here; upsert_orders
+        # recomputes it for the customers of replaced orders
+        cursor.executemany('''
+            INSERT INTO customer_index (customer_hash, first_order_day, orders, revenue_cents)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (customer_hash) DO UPDATE SET
+                first_order_day = MIN(first_order_day, excluded.first_order_day),
+                orders = orders + excluded.orders,
+                revenue_cents = revenue_cents + excluded.revenue_cents
+        ''', index_rows)
+        cursor.executemany('''
+            INSERT INTO weekly_location_rollup (week, location_id, orders, revenue_cents, items)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (week, location_id) DO UPDATE SET
+                orders = orders + excluded.orders,
+                revenue_cents = revenue_cents + excluded.revenue_cents,
+                items = items + excluded.items
+        ''', weekly_location_rows)
+        cursor.executemany('''
+            INSERT INTO weekly_product_rollup (week, location_id, title, orders, lines, quantity, revenue_cents)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT (week, location_id, title) DO UPDATE SET
+                orders = orders + excluded.orders,
+                lines = lines + excluded.lines,
+                quantity = quantity + excluded.quantity,
+                revenue_cents = revenue_cents + excluded.revenue_cents
+        ''', weekly_product_rows)
+
+    def _prune_rollups(self, cursor: sqlite3.Cursor):
+        """Drop rollup rows whose orders have all moved or been replaced"""
+        for table in ROLLUP_TABLES:
+            cursor.execute(f'DELETE FROM {table} WHERE orders <= 0')
+
+    def _drop_rollups(self):
+        conn = self._connect()
+        for table in ROLLUP_TABLES:
+            conn.execute(f'DROP TABLE IF EXISTS {table}')
+        conn.commit()
+        conn.close()
+
+    def _refresh_first_orders(self, cursor: sqlite3.Cursor, orders: List[Dict]):
+        """Recompute first_order_day for the customers of orders that were replaced or moved"""
+        hashes = {
+            customer_hash(order['customer_email']) for order in orders if normalize_email(order.get('customer_email'))
+        }
+        cursor.executemany('''
+            UPDATE customer_index
+            SET first_order_day = (SELECT MIN(day) FROM daily_customer_rollup WHERE customer = ?)
+            WHERE customer_hash = ?
+        ''', [(key, key) for key in hashes])
+
+    def rebuild_rollups(self):
+        """Recompute every rollup from the stored orders"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        for table in ROLLUP_TABLES:
+            cursor.execute(f'DELETE FROM {table}')
+
+        reader = conn.cursor()
+        reader.execute('SELECT payload FROM orders')
+        while True:
+            batch = reader.fetchmany(1000)
+            if not batch:
+                break
+            self._apply_rollups(cursor, [json.loads(row['payload']) for row in batch], 1)
+
+        cursor.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', ('rollup_version', _rollup_version()))
+        conn.commit()
+        conn.close()
+        self.classifier.flush()
+
+    def get_rollups(self, start_day: str, end_day: str, with_titles: bool = False) -> Dict[str, List[Dict]]:
+        """
+        Daily rollup rows for store-local days start_day..end_day
+        (YYYY-MM-DD, inclusive), keyed 'locations', 'products', 'customers'
+        and 'hours'. with_titles adds 'titles': the distinct line item
+        titles of each order (day, location_id, order_id, title), for
+        counting the orders that hold a tracked item.
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        rollups = {}
+        for key, table in (
+            ('locations', 'daily_location_rollup'),
+            ('products', 'daily_product_rollup'),
+            ('customers', 'daily_customer_rollup'),
+            ('hours', 'hourly_location_rollup'),
+        ):
+            cursor.execute(
+                f'SELECT * FROM {table} WHERE day BETWEEN ? AND ? ORDER BY day, rowid',
+                (start_day, end_day)
+            )
+            rollups[key] = [dict(row) for row in cursor.fetchall()]
+
+        if with_titles:
+            cursor.execute('''
+                SELECT DISTINCT substr(orders.created_at, 1, 10) AS day, orders.location_id,
+                       orders.id AS order_id, json_extract(item.value, '$.title') AS title
+                FROM orders, json_each(orders.payload, '$.line_items') AS item
+                WHERE orders.created_at_ts BETWEEN ? AND ?
+                  AND substr(orders.created_at, 1, 10) BETWEEN ? AND ?
+                ORDER BY orders.created_at_ts, orders.id
+            ''', _day_bounds(start_day, end_day))
+            rollups['titles'] = [dict(row) for row in cursor.fetchall()]
+
+        conn.close()
+        return rollups
+
+    def get_customer_emails(self, start_day: str, end_day: str) -> Dict[str, str]:
+        """
+        The emails of customers who ordered on store-local days
+        start_day..end_day, keyed by customer_hash, for showing the
+        customers the rollups only know by hash
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT DISTINCT customer_email FROM orders
+            WHERE created_at_ts BETWEEN ? AND ?
+              AND substr(created_at, 1, 10) BETWEEN ? AND ?
+              AND customer_email IS NOT NULL
+        ''', _day_bounds(start_day, end_day))
+        emails = {
+            customer_hash(email): normalize_email(email)
+            for email in (row['customer_email'] for row in cursor.fetchall()) if normalize_email(email)
+        }
+        conn.close()
+        return emails
+
+    def get_customer_profiles(self, emails: List[str]) -> Dict[str, Dict]:
+        """
+        Lifetime first_order_day, orders and revenue_cents from the customer
+        index for each of the emails the store has seen, keyed by email
+        """
+        hashes = {customer_hash(email): email for email in emails if normalize_email(email) and email != 'guest'}
+        keys = list(hashes)
+        conn = self._connect()
+        cursor = conn.cursor()
+        profiles = {}
+        for i in range(0, len(keys), _ID_CHUNK):
+            chunk = keys[i:i + _ID_CHUNK]
+            cursor.execute(
+                f"SELECT * FROM customer_index WHERE customer_hash IN ({','.join('?' * len(chunk))})", chunk
+            )
+            for row in cursor.fetchall():
+                profile = dict(row)
+                profiles[hashes[profile.pop('customer_hash')]] = profile
+        conn.close()
+        return profiles
+
+    def get_hourly_totals(self, start_day: str, end_day: str) -> List[Dict]:
+        """
+        Hourly rollups for store-local days start_day..end_day summed per
+        (location_id, weekday, hour), Monday == 0; at most 168 rows per
+        location whatever the window
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT location_id, (CAST(strftime('%w', day) AS INTEGER) + 6) % 7 AS weekday, hour,
+                   SUM(orders) AS orders, SUM(revenue_cents) AS revenue_cents
+            FROM hourly_location_rollup
+            WHERE day BETWEEN ? AND ?
+            GROUP BY location_id, weekday, hour
+        ''', (start_day, end_day))
+        rows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        return rows
+
+    def get_weekly_rollups(self, start_day: str, end_day: str) -> Dict[str, List[Dict]]:
+        """
+        Rollups for store-local days start_day..end_day summed per week,
+        where week 0 starts on start_day. 'locations' rows are per (week,
+        location_id); 'products' rows per (week, location_id, title).
+        Whole Monday-to-Sunday weeks come straight from the weekly tables;
+        any other days, such as a partial final week, from the daily ones.
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        rollups = {'locations': [], 'products': []}
+        daily_start = start_day
+        if date.fromisoformat(start_day).weekday() == 0:
+            # Monday of the last week that ends by end_day
+            end = date.fromisoformat(end_day)
+            last_week = (end - timedelta(days=(end.weekday() + 1) % 7 + 6)).isoformat()
+            week_numbers = {}
+            for key, table, columns in (
+                ('locations', 'weekly_location_rollup', 'orders, revenue_cents, items'),
+                ('products', 'weekly_product_rollup', 'title, lines, quantity, revenue_cents'),
+            ):
+                cursor.execute(
+                    f'SELECT week, location_id, {columns} FROM {table} WHERE week BETWEEN ? AND ?',
+                    (start_day, last_week)
+                )
+                rows = [dict(row) for row in cursor.fetchall()]
+                for row in rows:
+                    week = row['week']
+                    if week not in week_numbers:
+                        week_numbers[week] = (date.fromisoformat(week) - date.fromisoformat(start_day)).days // 7
+                    row['week'] = week_numbers[week]
+                rollups[key] = rows
+            daily_start = max(start_day, (date.fromisoformat(last_week) + timedelta(days=7)).isoformat())
+
+        if daily_start <= end_day:
+            week = 'CAST((julianday(day) - julianday(?)) / 7 AS INTEGER)'
+            cursor.execute(f'''
+                SELECT {week} AS week, location_id,
+                       SUM(orders) AS orders, SUM(revenue_cents) AS revenue_cents, SUM(items) AS items
+                FROM daily_location_rollup
+                WHERE day BETWEEN ? AND ?
+                GROUP BY week, location_id
+                ORDER BY week, location_id
+            ''', (start_day, daily_start, end_day))
+            rollups['locations'] += [dict(row) for row in cursor.fetchall()]
+
+            cursor.execute(f'''
+                SELECT {week} AS week, location_id, title,
+                       SUM(lines) AS lines, SUM(quantity) AS quantity, SUM(revenue_cents) AS revenue_cents
+                FROM daily_product_rollup
+                WHERE day BETWEEN ? AND ?
+                GROUP BY week, location_id, title
+                ORDER BY week, location_id
+            ''', (start_day, daily_start, end_day))
+            rollups['products'] += [dict(row) for row in cursor.fetchall()]
+
+        conn.close()
+        return rollups
+
+    def get_updated_at(self, order_id) -> Optional[str]:
+        """updated_at of the stored copy of an order, if any"""
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT updated_at FROM orders WHERE id = ?', (order_id,))
+        row = cursor.fetchone()
+        conn.close()
+        return row['updated_at'] if row else None
+
+    def get_orders_for_period(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """
+        Orders on store-local days start_date..end_date, newest first: the
+        same window ShopifyService.get_orders_for_period asks Shopify for
+        """
+        conn = self._connect()
+        cursor = conn.cursor()
+
+        cursor.execute('''
+            SELECT payload FROM orders
+            WHERE created_at_ts BETWEEN ? AND ?
+              AND substr(created_at, 1, 10) BETWEEN ? AND ?
+            ORDER BY id DESC
+        ''', _day_bounds(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')))
+
+        orders = [json.loads(row['payload']) for row in cursor.fetchall()]
+        conn.close()
+
+        return orders
+
+    def covers(self, start_date: datetime) -> bool:
+        """True once a sync has completed and history reaches back to start_date"""
+        history_start = self.get_state('history_start')
+        if not history_start or not self.get_state('last_synced_at'):
+            return False
+        return start_date.strftime('%Y-%m-%d') >= history_start
+
+    def get_watermark(self) -> Optional[str]:
+        """updated_at of the newest order seen by the last sync"""
+        return self.get_state('watermark')
+
+    def set_watermark(self, updated_at: str):
+        self.set_state('watermark', updated_at)
+
+    def get_state(self, key: str) -> Optional[str]:
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT value FROM sync_state WHERE key = ?', (key,))
+        row = cursor.fetchone()
+        conn.close()
+        return row['value'] if row else None
+
+    def set_state(self, key: str, value: str):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('INSERT OR REPLACE INTO sync_state (key, value) VALUES (?, ?)', (key, value))
+        conn.commit()
+        conn.close()
+
+    def count_orders(self) -> int:
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT COUNT(*) FROM orders')
+        count = cursor.fetchone()[0]
+        conn.close()
+        return count
+
+
+def add_change_listener(callback):
+    """Register callback(days) to run after each upsert with the store-local days it touched"""
+    _change_listeners.append(callback)
+
+
+def _rollup_version() -> str:
+    return f'{ROLLUP_VERSION}.{RULES_VERSION}'
+
+
+def _day_bounds(start_day: str, end_day: str) -> tuple:
+    """
+    Query parameters for orders on store-local days start_day..end_day:
+    a created_at_ts range padded by the widest UTC offset, which the index
+    narrows to, then the days themselves for the exact cut
+    """
+    return (
+        calendar.timegm(date.fromisoformat(start_day).timetuple()) - 86400,
+        calendar.timegm(date.fromisoformat(end_day).timetuple()) + 2 * 86400,
+        start_day, end_day
+    )
+
+
+def customer_hash(email: str) -> str:
+    """Key for a customer email in the customer rollup and index; case and surrounding spaces don't count"""
+    return hashlib.sha256(normalize_email(email).encode('utf-8')).hexdigest()
+
+
+def week_of(day: str) -> str:
+    """Monday (YYYY-MM-DD) of the week holding a YYYY-MM-DD day"""
+    parsed = date.fromisoformat(day)
+    return (parsed - timedelta(days=parsed.weekday())).isoformat()
+
+
+def to_epoch(timestamp: str) -> int:
+    """Epoch seconds for a Shopify ISO-8601 timestamp"""
+    return int(datetime.fromisoformat(timestamp).timestamp())
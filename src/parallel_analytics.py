@@ -0,0 +1,181 @@
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .analytics_engine import BucketTotals, accumulate_vectorized, ensure_classified
+from .order_columns import Interner, OrderColumns
+
+logger = logging.getLogger(__name__)
+
+# Worker processes for the 'process' backend, and the smallest batch worth
+# shipping to them; smaller batches are accumulated in-process
+WORKERS = int(os.getenv('ANALYTICS_WORKERS', str(os.cpu_count() or 1)))
+MIN_PARALLEL_ORDERS = int(os.getenv('ANALYTICS_PARALLEL_MIN_ORDERS', '20000'))
+
+# The columns accumulate_vectorized reads, besides the bucket and workshop arrays
+_SHARED_COLUMNS = (
+    'order_id', 'weekday', 'local_ts', 'total_cents', 'customer',
+    'item_order', 'item_title', 'item_sku', 'item_quantity', 'item_cents',
+    'item_category', 'item_trend', 'item_seat',
+)
+
+
+def accumulate_parallel(orders: OrderColumns, bucket_of_order: np.ndarray, bucket_count: int,
+                        track_items: Sequence[str] = (), workshop_mask: np.ndarray = None,
+                        workers: int = None) -> List[BucketTotals]:
+    """
+    Same totals as accumulate_vectorized(), with the buckets split across
+    worker processes. Bucket b goes to partition b % partitions, so with
+    per-location buckets (or week * locations + location ones) each worker
+    handles whole locations and no bucket is computed twice.
+
+    The columns are copied once into a shared memory block that every
+    worker maps read-only; only the intern tables and each partition's
+    BucketTotals are pickled. Without a worker pool (see
+    start_process_pool) the totals are accumulated in-process.
+    """
+    workers = workers or WORKERS
+    if min(workers, bucket_count) < 2 or len(orders) < MIN_PARALLEL_ORDERS:
+        return accumulate_vectorized(orders, bucket_of_order, bucket_count, track_items, workshop_mask)
+    pool = get_process_pool(workers)
+    if pool is None:
+        return accumulate_vectorized(orders, bucket_of_order, bucket_count, track_items, workshop_mask)
+    partitions = min(workers, _pool_workers, bucket_count)
+
+    bucket_of_order = np.asarray(bucket_of_order, dtype=np.int64)
+    if workshop_mask is None:
+        workshop_mask = np.zeros(len(orders), dtype=bool)
+    ensure_classified(orders)
+    arrays = {name: getattr(orders, name) for name in _SHARED_COLUMNS}
+    arrays['bucket_of_order'] = bucket_of_order
+    arrays['workshop_mask'] = workshop_mask
+
+    block, layout = _share(arrays)
+    try:
+        interned = (orders.titles.values, orders.skus.values, orders.customers.values)
+        futures = [
+            pool.submit(
+                _accumulate_partition, block.name, layout, interned,
+                partition, partitions, bucket_count, tuple(track_items)
+            )
+            for partition in range(partitions)
+        ]
+        buckets = [BucketTotals() for _ in range(bucket_count)]
+        for future in futures:
+            for index, totals in future.result().items():
+                buckets[index] = totals
+        return buckets
+    except BrokenProcessPool as e:
+        logger.warning(f"Analytics worker pool failed, accumulating in-process: {e}")
+        _reset_process_pool()
+        return accumulate_vectorized(orders, bucket_of_order, bucket_count, track_items, workshop_mask)
+    finally:
+        block.close()
+        block.unlink()
+
+
+def _share(arrays: Dict[str, np.ndarray]) -> Tuple[shared_memory.SharedMemory, List[Tuple]]:
+    """Copy arrays into one shared memory block; returns it and (name, dtype, length, offset) rows"""
+    layout, offset = [], 0
+    for name, array in arrays.items():
+        # Keep every column 8-byte aligned
+        offset = (offset + 7) // 8 * 8
+        layout.append((name, array.dtype.str, len(array), offset))
+        offset += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for (name, dtype, length, start), array in zip(layout, arrays.values()):
+        np.ndarray(length, dtype=dtype, buffer=block.buf, offset=start)[:] = array
+    return block, layout
+
+
+def _accumulate_partition(block_name: str, layout: List[Tuple], interned: Tuple, partition: int,
+                          partitions: int, bucket_count: int, track_items: Tuple) -> Dict[int, BucketTotals]:
+    """Worker: accumulate this partition's buckets over the shared columns"""
+    block = shared_memory.SharedMemory(name=block_name)
+    try:
+        arrays = {
+            name: np.ndarray(length, dtype=dtype, buffer=block.buf, offset=offset)
+            for name, dtype, length, offset in layout
+        }
+        orders = OrderColumns()
+        orders.titles, orders.skus, orders.customers = (Interner.from_values(values) for values in interned)
+        for name in _SHARED_COLUMNS:
+            setattr(orders, name, arrays[name])
+
+        bucket_of_order = arrays['bucket_of_order']
+        mine = (bucket_of_order >= 0) & (bucket_of_order % partitions == partition)
+        totals = accumulate_vectorized(
+            orders, np.where(mine, bucket_of_order, -1), bucket_count, track_items, arrays['workshop_mask']
+        )
+        # Drop the views before the block is unmapped
+        del arrays, orders, bucket_of_order
+        return {index: totals[index] for index in range(partition, bucket_count, partitions)}
+    finally:
+        block.close()
+
+
+_pool = None
+_pool_workers = 0
+_pool_refused = False
+_pool_lock = threading.Lock()
+
+
+def start_process_pool(workers: int = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Start the worker pool. Workers are forked by default, so call this at
+    startup, before the scheduler or any other thread exists.
+    """
+    return get_process_pool(workers)
+
+
+def get_process_pool(workers: int = None) -> Optional[ProcessPoolExecutor]:
+    """
+    Return the worker pool shared by the process, starting it if it can
+    still be done safely; None if it can't. A forked pool is only started
+    while the calling thread is the only one, since a child forked from a
+    threaded parent can inherit locks another thread held.
+    """
+    global _pool, _pool_workers, _pool_refused
+    workers = workers or WORKERS
+    with _pool_lock:
+        if _pool is None:
+            context = _mp_context()
+            if context.get_start_method() == 'fork' and threading.active_count() > 1:
+                if not _pool_refused:
+                    logger.warning(
+                        "Analytics worker pool wasn't started before other threads; accumulating in-process"
+                    )
+                    _pool_refused = True
+                return None
+            # Workers must share the parent's tracker; one of their own would
+            # "clean up" every block they attached to when they exit
+            resource_tracker.ensure_running()
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _pool_workers = workers
+            # Forked pools start every worker on the first submit; do that
+            # here, while no other thread exists
+            _pool.submit(int).result()
+        return _pool
+
+
+def _reset_process_pool():
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool, _pool_workers = None, 0
+
+
+def _mp_context():
+    # Spawned and fork-server workers re-run the entry script, and
+    # app_full.py starts services and the scheduler at import, so default to
+    # the platform's start method (fork on Linux) and fork before any
+    # thread exists (see start_process_pool)
+    return multiprocessing.get_context(os.getenv('ANALYTICS_START_METHOD') or None)
@@ -0,0 +1,196 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from .analytics_engine import ProductClass, classify_by_rules, classify_items
+from .order_columns import OrderColumns
+from .workshop_classifier import WorkshopClassifier
+
+
+# Bump when classify_by_rules (or the rules it calls) changes, to drop
+# every stored verdict; OrderStore rebuilds its rollups to match
+RULES_VERSION = '1'
+
+
+class ProductClassifier(WorkshopClassifier):
+    """
+    Persisted index of ProductClass verdicts, keyed by Shopify product id
+    and SKU. Custom line items have no product id, so they are keyed by
+    title and SKU instead; an empty SKU is the product-level entry.
+
+    The index is seeded from the product catalog. Any product first seen on
+    an order is classified by the keyword rules and remembered, so every
+    later line item costs one dict lookup. Entries are never rewritten
+    under the same RULES_VERSION: the order store's rollups were built
+    from them and have to subtract the same verdicts when an order changes.
+    """
+
+    def __init__(self, db_path: str = None):
+        super().__init__()
+        if not db_path:
+            db_path = os.getenv('PRODUCT_INDEX_PATH', 'data/product_index.db')
+
+        # Ensure directory exists
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._index: Dict[Tuple, ProductClass] = {}
+        self._pending: List[Tuple] = []
+        self._init_database()
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_database(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS product_classes (
+                product_id INTEGER NOT NULL,
+                sku TEXT NOT NULL,
+                title TEXT NOT NULL,
+                category INTEGER NOT NULL,
+                trend INTEGER NOT NULL,
+                workshop INTEGER NOT NULL,
+                seat INTEGER NOT NULL,
+                source TEXT NOT NULL,
+                PRIMARY KEY (product_id, sku, title)
+            )
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS index_state (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+        cursor.execute("SELECT value FROM index_state WHERE key = 'rules_version'")
+        row = cursor.fetchone()
+        if not row or row['value'] != RULES_VERSION:
+            cursor.execute('DELETE FROM product_classes')
+            cursor.execute("DELETE FROM index_state WHERE key = 'catalog_synced_at'")
+            cursor.execute(
+                "INSERT OR REPLACE INTO index_state (key, value) VALUES ('rules_version', ?)", (RULES_VERSION,)
+            )
+
+        conn.commit()
+        conn.close()
+
+    def _load(self):
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute('SELECT product_id, sku, title, category, trend, workshop, seat FROM product_classes')
+        index = {
+            (row['product_id'], row['sku'], row['title']):
+                ProductClass(row['category'], row['trend'], bool(row['workshop']), bool(row['seat']))
+            for row in cursor.fetchall()
+        }
+        conn.close()
+        with self._lock:
+            self._index.update(index)
+
+    @staticmethod
+    def _key(product_id: Optional[int], sku: Optional[str], title: str) -> Tuple:
+        if product_id and product_id > 0:
+            return (product_id, sku or '', '')
+        return (-1, sku or '', title)
+
+    def classify(self, product_id: Optional[int], sku: Optional[str], title: str) -> ProductClass:
+        """The indexed verdict for a line item's product, classifying and remembering new ones"""
+        key = self._key(product_id, sku, title)
+        verdict = self._index.get(key)
+        if verdict is None:
+            verdict = classify_by_rules(title, sku or '')
+            with self._lock:
+                if key not in self._index:
+                    self._index[key] = verdict
+                    self._pending.append(key + tuple(verdict) + ('order',))
+                verdict = self._index[key]
+        return verdict
+
+    def is_workshop_product(self, product_id: Optional[int], title: str) -> bool:
+        return self.classify(product_id, '', title).workshop
+
+    def classify_columns(self, orders: OrderColumns):
+        """Classify a batch's line items from the index (see classify_items)"""
+        classify_items(orders, self.classify)
+        self.flush()
+
+    def flush(self) -> int:
+        """Persist verdicts learned since the last flush; returns how many"""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        if pending:
+            conn = self._connect()
+            conn.executemany('INSERT OR IGNORE INTO product_classes VALUES (?, ?, ?, ?, ?, ?, ?, ?)', pending)
+            conn.commit()
+            conn.close()
+        return len(pending)
+
+    def build_from_catalog(self, products: List[Dict]) -> int:
+        """
+        Index every product and variant SKU in the catalog (shopify_schema
+        product dicts) that isn't indexed yet; returns how many were added
+        """
+        with self._lock:
+            for product in products:
+                keys = [self._key(product['id'], '', product['title'])]
+                for variant in product.get('variants', []):
+                    if variant.get('sku'):
+                        keys.append(self._key(product['id'], variant['sku'], product['title']))
+                for key in keys:
+                    if key not in self._index:
+                        # Variant verdicts depend on the SKU too (see product_category)
+                        verdict = self._index[key] = classify_by_rules(product['title'], key[1])
+                        self._pending.append(key + tuple(verdict) + ('catalog',))
+        added = self.flush()
+
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO index_state (key, value) VALUES ('catalog_synced_at', ?)",
+            (datetime.now(timezone.utc).isoformat(),)
+        )
+        conn.commit()
+        conn.close()
+        return added
+
+    def refresh_from_catalog(self, shopify_service, max_age_hours: float = None) -> int:
+        """Re-read the product catalog if the last read is older than PRODUCT_CATALOG_REFRESH_HOURS"""
+        if max_age_hours is None:
+            max_age_hours = float(os.getenv('PRODUCT_CATALOG_REFRESH_HOURS', '24'))
+        conn = self._connect()
+        cursor = conn.cursor()
+        cursor.execute("SELECT value FROM index_state WHERE key = 'catalog_synced_at'")
+        row = cursor.fetchone()
+        conn.close()
+        if row and datetime.now(timezone.utc) - datetime.fromisoformat(row['value']) < timedelta(hours=max_age_hours):
+            return 0
+        products = shopify_service.get_products()
+        # get_products() returns nothing on API errors; try again next time
+        if not products:
+            return 0
+        return self.build_from_catalog(products)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {'products': len(self._index), 'pending': len(self._pending)}
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_product_classifier() -> ProductClassifier:
+    """Return the index shared by every service in this process"""
+    global _classifier
+    with _classifier_lock:
+        if _classifier is None:
+            _classifier = ProductClassifier()
+        return _classifier
@@ -0,0 +1,50 @@
+from datetime import datetime
+from typing import Dict
+
+from .stage_graph import StageGraph
+
+
+def build_report_graph(analytics, insights, feedback_db, recipient_email: str, recipient_name: str = None,
+                       week_start: datetime = None, analytics_data: Dict = None,
+                       insights_fallback: Dict = None) -> StageGraph:
+    """
+    Stage graph for one recipient's weekly report. Analytics, stored
+    feedback and memory context load concurrently, and the LLM call runs
+    once all three are in. Run it and read results['insights'] (and
+    results['analytics'], results['recipient_name']).
+
+    Pass analytics_data to reuse analytics already computed for another
+    recipient. With insights_fallback, a failed LLM call yields that
+    instead of failing the graph.
+    """
+    graph = StageGraph('weekly-report')
+
+    if analytics_data is None:
+        graph.add('analytics', lambda: analytics.analyze_weekly_data(week_start, include_trends=True))
+    else:
+        graph.add('analytics', lambda: analytics_data)
+
+    graph.add('feedback', lambda: feedback_db.get_feedback_context_for_email(recipient_email))
+    graph.add('recipient_name', lambda: recipient_name or _preferred_name(feedback_db, recipient_email))
+    graph.add(
+        'memory',
+        lambda recipient_name: insights.load_memory_context(recipient_name),
+        deps=('recipient_name',)
+    )
+
+    def generate(analytics, feedback, recipient_name, memory):
+        try:
+            return insights.generate_insights(analytics, recipient_name, feedback, memory_context=memory)
+        except Exception as e:
+            if insights_fallback is None:
+                raise
+            print(f"Error generating insights: {str(e)}")
+            return dict(insights_fallback)
+
+    graph.add('insights', generate, deps=('analytics', 'feedback', 'recipient_name', 'memory'))
+    return graph
+
+
+def _preferred_name(feedback_db, recipient_email: str) -> str:
+    prefs = feedback_db.get_recipient_preferences(recipient_email)
+    return prefs.get('name', recipient_email.split('@')[0])
@@ -7,12 +7,14 @@ from apscheduler.triggers.cron import CronTrigger
 import pytz
 
 from .shopify_service import ShopifyService
+from .order_sync import OrderSync
 from .shopify_analytics import ShopifyAnalytics
 from .conversational_insights import ConversationalInsights
 from .shopify_report_generator import ShopifyReportGenerator
 from .email_service import ConversationalEmailService
 from .feedback_database import FeedbackDatabase
 from .reply_processor import ReplyProcessor
+from .report_pipeline import build_report_graph
 
 
 logging.basicConfig(level=logging.INFO)
@@ -45,6 +47,9 @@ class ShopifyScheduler:
         # Schedule daily Google Sheets refresh
         self._schedule_daily_sheets_refresh()
         
+        # Keep the local order store current
+        self._schedule_order_sync()
+        
         logger.info("Shopify scheduler initialized")
     
     def start(self):
@@ -111,6 +116,38 @@ class ShopifyScheduler:
         
         logger.info(f"Google Sheets refresh scheduled daily at {hour}:00 {timezone}")
     
+    def _schedule_order_sync(self):
+        """Schedule incremental Shopify order syncs into the local store"""
+        minutes = int(os.getenv('ORDER_SYNC_MINUTES', '15'))
+        
+        self.scheduler.add_job(
+            func=self.sync_orders,
+            trigger='interval',
+            minutes=minutes,
+            id='sync_shopify_orders',
+            replace_existing=True,
+            max_instances=1,
+            next_run_time=datetime.now()
+        )
+        
+        logger.info(f"Shopify order sync scheduled every {minutes} minutes")
+    
+    def sync_orders(self):
+        """Pull orders updated since the last sync into the local store"""
+        try:
+            shopify = ShopifyService()
+            if not shopify.order_store:
+                return
+            OrderSync(shopify).sync()
+            # Keep the product index ahead of new products; a no-op until
+            # PRODUCT_CATALOG_REFRESH_HOURS have passed
+            added = shopify.order_store.classifier.refresh_from_catalog(shopify)
+            if added:
+                logger.info(f"Indexed {added} new products from the catalog")
+            shopify.close_session()
+        except Exception as e:
+            logger.error(f"Error syncing Shopify orders: {e}")
+    
     def refresh_google_sheets(self):
         """Refresh Google Sheets data"""
         logger.info("Running scheduled Google Sheets refresh")
@@ -141,6 +178,9 @@ class ShopifyScheduler:
                 logger.warning(f"Could not refresh Google Sheets data: {e}")
                 logger.info("Continuing with existing data...")
             
+            # Catch the store up so the report reads fresh local data
+            self.sync_orders()
+            
             # Initialize services
             shopify = ShopifyService()
             analytics = ShopifyAnalytics(shopify)
@@ -155,24 +195,20 @@ class ShopifyScheduler:
                 return
             
             # Generate analytics data
-            analytics_data = analytics.analyze_weekly_data()
+            analytics_data = analytics.analyze_weekly_data(include_trends=True)
             
             # Process each recipient
             for recipient_email in recipients:
                 try:
-                    # Get recipient preferences and name
-                    prefs = self.db.get_recipient_preferences(recipient_email)
-                    recipient_name = prefs.get('name', recipient_email.split('@')[0])
-                    
-                    # Get feedback context for this recipient
-                    feedback_context = self.db.get_feedback_context_for_email(recipient_email)
-                    
-                    # Generate personalized insights
-                    ai_insights = insights_generator.generate_insights(
-                        analytics_data, 
-                        recipient_name,
-                        feedback_context
+                    # Name, feedback and memory load in parallel, then the personalized insights
+                    graph = build_report_graph(
+                        analytics, insights_generator, self.db, recipient_email,
+                        analytics_data=analytics_data
                     )
+                    results = graph.run()
+                    recipient_name = results['recipient_name']
+                    ai_insights = results['insights']
+                    logger.info(f"Report stages for {recipient_email}: {graph.summary()}")
                     
                     # Skip PDF generation to avoid timeouts
                     pdf_path = None
@@ -264,23 +300,16 @@ class ShopifyScheduler:
             insights_generator = ConversationalInsights()
             report_generator = ShopifyReportGenerator()
             
-            # Generate analytics data
-            analytics_data = analytics.analyze_weekly_data()
-            
-            # Get feedback context
-            feedback_context = self.db.get_feedback_context_for_email(recipient_email)
-            
-            # Use provided name or get from preferences
-            if not recipient_name:
-                prefs = self.db.get_recipient_preferences(recipient_email)
-                recipient_name = prefs.get('name', recipient_email.split('@')[0])
-            
-            # Generate insights
-            ai_insights = insights_generator.generate_insights(
-                analytics_data,
-                recipient_name,
-                feedback_context
+            # Analytics, feedback and memory load in parallel, then the insights
+            graph = build_report_graph(
+                analytics, insights_generator, self.db, recipient_email,
+                recipient_name=recipient_name
             )
+            results = graph.run()
+            analytics_data = results['analytics']
+            recipient_name = results['recipient_name']
+            ai_insights = results['insights']
+            logger.info(f"Report stages for {recipient_email}: {graph.summary()}")
             
             # Skip PDF generation to avoid timeouts
             pdf_path = None
@@ -1,17 +1,55 @@
+import copy
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-import pandas as pd
-from collections import defaultdict
+from typing import Dict, List, Any, Optional, Sequence, Tuple
+import calendar
 import os
 import json
-import re
 from .google_sheets_service import GoogleSheetsService
+from .order_columns import Interner, OrderColumns
+from .analytics_engine import (
+    ACCUMULATORS, BucketTotals, CATEGORY_NAMES, HEATMAP_CELLS, accumulate_hourly_totals, accumulate_rollups,
+    accumulate_weekly_rollups
+)
+from .product_classifier import get_product_classifier
+from .analytics_cache import get_analytics_cache
+from .single_flight import SingleFlight
+from .stage_graph import StageGraph
+from .location_registry import LocationRegistry, get_location_registry
+from .parallel_analytics import accumulate_parallel
+from .top_k import top_counts, top_k
+from .shopify_schema import to_dollars
+
+BACKENDS = dict(ACCUMULATORS, process=accumulate_parallel)
+
+# Concurrent analyze_weekly_data calls for the same cache key share one run
+_weekly_flights = SingleFlight()
+
+# Weeks of multi-week trends served from the order store's rollups, and the
+# fallback when they have to be fetched from Shopify instead
+TREND_WEEKS = int(os.getenv('TREND_WEEKS', '52'))
+FETCHED_TREND_WEEKS = 2
+# History the order store must hold before a period for its customers to
+# be told apart as new or returning
+CUSTOMER_LOOKBACK_DAYS = int(os.getenv('CUSTOMER_LOOKBACK_DAYS', '365'))
 
 
 class ShopifyAnalytics:
-    def __init__(self, shopify_service):
+    def __init__(self, shopify_service, backend: str = None, locations: LocationRegistry = None):
         self.shopify = shopify_service
+        # Which Shopify locations are stores; every other order is online
+        self.locations = locations or get_location_registry()
+        # 'loop' (plain Python), 'numpy' (vectorized group-bys) or 'process'
+        # (numpy group-bys per location in worker processes); same results
+        self.backend = backend or os.getenv('ANALYTICS_BACKEND', 'numpy')
+        if self.backend not in BACKENDS:
+            raise ValueError(f"Unknown analytics backend: {self.backend}")
+        self._accumulate = BACKENDS[self.backend]
         self.sheets_service = GoogleSheetsService()
+        # Persisted product verdicts: categories, trends and workshop bookings
+        self.product_classifier = get_product_classifier()
+        self.cache = get_analytics_cache()
+        # Per-stage wall times of the last uncached analysis
+        self.last_stage_timings = {}
         self.feedback_context = self._load_feedback_context()
     
     def _load_feedback_context(self):
@@ -25,82 +63,158 @@ class ShopifyAnalytics:
                 pass
         return {}
     
-    def analyze_weekly_data(self, week_start: datetime = None, include_trends: bool = False) -> Dict[str, Any]:
-        """Analyze data for a specific week, defaulting to last week"""
+    def analyze_weekly_data(self, week_start: datetime = None, include_trends: bool = False,
+                            trend_weeks: int = None) -> Dict[str, Any]:
+        """
+        Analyze data for a specific week, defaulting to last week. Results
+        are cached per week, options and source data version; the Sheets
+        goals, which the order data doesn't version, are fetched alongside
+        and merged in afterwards.
+        """
         if not week_start:
             # Default to last Monday
             today = datetime.now()
             days_since_monday = today.weekday()
             week_start = today - timedelta(days=days_since_monday + 7)
         
-        week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+        trend_weeks = trend_weeks or TREND_WEEKS
+        day_ranges = self._source_day_ranges(week_start, include_trends, trend_weeks)
+        
+        # Store-backed results are versioned by the days they read; API
+        # results only carry a time to live
+        store = getattr(self.shopify, 'order_store', None)
+        versioned = bool(store and store.covers(datetime.strptime(day_ranges[-1][0], '%Y-%m-%d')))
+        key = (
+            week_start.strftime('%Y-%m-%d'),
+            include_trends,
+            trend_weeks if include_trends else None,
+            self._location_config(),
+            tuple(self.feedback_context.get('track_items', [])),
+            store.data_version(day_ranges) if versioned else None
+        )
+        
+        def analytics():
+            cached = self.cache.get(key)
+            if cached is not None:
+                print(f"Serving analytics for week of {key[0]} from cache")
+                return cached
+            
+            def compute():
+                result = self._analyze_week(week_start, include_trends, trend_weeks)
+                self.cache.put(key, result, day_ranges, versioned)
+                return result
+            
+            result, shared = _weekly_flights.do(key, compute)
+            return copy.deepcopy(result) if shared else result
         
-        # Get current week data
-        current_orders = self.shopify.get_orders_for_period(week_start, week_end)
+        # Get goals data from Google Sheets via MCP
+        graph = StageGraph('weekly-goals')
+        graph.add('analytics', analytics)
+        graph.add('goals', lambda: self.sheets_service.get_weekly_goals(week_start))
+        results = graph.run()
+        
+        result, goals_data = results['analytics'], results['goals']
+        result['goals'] = goals_data
+        result['conversion_metrics'] = self._calculate_conversion_metrics(result['current_week_by_location'], goals_data)
+        return result
+    
+    def _source_day_ranges(self, week_start: datetime, include_trends: bool, trend_weeks: int) -> List[Tuple[str, str]]:
+        """Store-local days a week's analysis reads; earliest range last"""
+        def day_range(start: datetime, end: datetime) -> Tuple[str, str]:
+            return (start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d'))
+        
+        week_end = week_start + timedelta(days=6)
+        first_day = week_start - timedelta(weeks=trend_weeks - 1) if include_trends else week_start
+        ranges = [
+            day_range(first_day, week_end),
+            day_range(week_start - timedelta(days=365), week_end - timedelta(days=365))
+        ]
+        return sorted(ranges, reverse=True)
+    
+    def _location_config(self) -> Tuple:
+        """Everything about location setup that changes a report"""
+        return self.locations.config_key()
+    
+    def _analyze_week(self, week_start: datetime, include_trends: bool, trend_weeks: int) -> Dict[str, Any]:
+        """Compute analyze_weekly_data's result without the cache"""
+        week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
         
-        # Get previous year data for comparison
         prev_year_start = week_start - timedelta(days=365)
         prev_year_end = week_end - timedelta(days=365)
-        prev_year_orders = self.shopify.get_orders_for_period(prev_year_start, prev_year_end)
         
-        # Separate orders by location (POS only - exclude online)
-        current_charleston = [o for o in current_orders if self._is_charleston_pos(o)]
-        current_boston = [o for o in current_orders if self._is_boston_pos(o)]
-        # Exclude online orders completely
+        # The period fetches and trends are independent I/O, so they run
+        # concurrently
+        track_items = self.feedback_context.get('track_items', [])
+        graph = StageGraph('weekly-analytics')
+        graph.add('current', lambda: self._location_totals(week_start, week_end, track_items))
+        graph.add('previous_year', lambda: self._location_totals(prev_year_start, prev_year_end))
+        # New vs returning customers, from the order store's customer index
+        graph.add('current_returning', lambda current: self._returning_customers(current[1], week_start), deps=('current',))
+        graph.add(
+            'previous_returning', lambda previous_year: self._returning_customers(previous_year[1], prev_year_start),
+            deps=('previous_year',)
+        )
+        if include_trends:
+            graph.add('multi_week_trends', lambda: self._analyze_multi_week_trends(week_start, trend_weeks))
+        results = graph.run()
+        self.last_stage_timings = dict(graph.timings)
         
-        prev_charleston = [o for o in prev_year_orders if self._is_charleston_pos(o)]
-        prev_boston = [o for o in prev_year_orders if self._is_boston_pos(o)]
-        # Exclude online orders completely
+        # Per-location totals for the current week and the same week last year
+        current, customer_emails = results['current']
+        prev_year, _ = results['previous_year']
+        current_returning = results['current_returning']
+        prev_year_returning = results['previous_returning']
         
         # Combine store orders only (no online)
-        current_store_orders = current_charleston + current_boston
-        prev_store_orders = prev_charleston + prev_boston
+        stores = self.locations.stores
+        current['all'] = BucketTotals.merged([current[location] for location in stores])
+        prev_year['all'] = BucketTotals.merged([prev_year[location] for location in stores])
         
         # Process the data by location (stores only)
         current_metrics = {
-            'all': self._calculate_metrics(current_store_orders),
-            'charleston': self._calculate_metrics(current_charleston),
-            'boston': self._calculate_metrics(current_boston)
+            location: self._calculate_metrics(current[location], current_returning)
+            for location in ['all'] + stores
         }
         prev_year_metrics = {
-            'all': self._calculate_metrics(prev_store_orders),
-            'charleston': self._calculate_metrics(prev_charleston),
-            'boston': self._calculate_metrics(prev_boston)
+            location: self._calculate_metrics(prev_year[location], prev_year_returning)
+            for location in ['all'] + stores
         }
         
         # Calculate year-over-year changes
-        yoy_changes = self._calculate_yoy_changes(current_metrics, prev_year_metrics)
+        yoy_changes = self._calculate_yoy_changes(current_metrics, prev_year_metrics, prev_year_start)
         
         # Get product performance (stores only)
-        product_performance = self._analyze_product_performance(current_store_orders)
+        product_performance = self._analyze_product_performance(current['all'])
         
         # Get product performance by location (stores only)
         product_performance_by_location = {
-            'charleston': self._analyze_product_performance(current_charleston),
-            'boston': self._analyze_product_performance(current_boston)
+            location: self._analyze_product_performance(current[location])
+            for location in stores
         }
         
         # Get workshop analytics (stores only)
-        workshop_data = self._analyze_workshops(current_store_orders)
+        workshop_data = self._analyze_workshops(current['all'])
         
         # Get customer insights (stores only)
-        customer_insights = self._analyze_customers(current_store_orders)
+        customer_insights = self._analyze_customers(current['all'], customer_emails, current_returning)
         
         # Identify trends and patterns (stores only)
-        trends = self._identify_trends(current_store_orders, prev_store_orders)
+        trends = self._identify_trends(current['all'], prev_year['all'])
+        
+        # When each store is busy, for staffing
+        sales_heatmap = {
+            location: self._analyze_heatmap(current[location])
+            for location in ['all'] + stores
+        }
         
         # Get multi-week trends if requested
         multi_week_trends = {}
         product_categories = {}
         if include_trends:
-            multi_week_trends = self._analyze_multi_week_trends(week_start)
-            product_categories = self._analyze_product_categories(current_orders)
-        
-        # Get goals data from Google Sheets via MCP
-        goals_data = self.sheets_service.get_weekly_goals(week_start)
-        
-        # Calculate conversion metrics if we have traffic data
-        conversion_metrics = self._calculate_conversion_metrics(current_metrics, goals_data)
+            multi_week_trends = results['multi_week_trends']
+            product_categories = self._analyze_product_categories(
+                BucketTotals.merged([current[location] for location in self.locations.bucket_names])
+            )
         
         return {
             'week_start': week_start.strftime('%Y-%m-%d'),
@@ -115,63 +229,108 @@ class ShopifyAnalytics:
             'workshop_analytics': workshop_data,
             'customer_insights': customer_insights,
             'trends': trends,
+            'sales_heatmap': sales_heatmap,
             'total_revenue': current_metrics['all']['total_revenue'],
             'total_orders': current_metrics['all']['order_count'],
             'avg_order_value': current_metrics['all']['avg_order_value'],
-            'goals': goals_data,
-            'conversion_metrics': conversion_metrics,
+            'goals': None,  # analyze_weekly_data merges in the goals
+            'conversion_metrics': None,
             'multi_week_trends': multi_week_trends,
             'product_categories': product_categories
         }
     
-    def _calculate_metrics(self, orders: List[Dict]) -> Dict[str, Any]:
-        """Calculate basic metrics from orders"""
-        if not orders:
+    def _location_totals(self, start_date: datetime, end_date: datetime,
+                         track_items: Sequence[str] = ()) -> Tuple[Dict[str, BucketTotals], List[str]]:
+        """
+        BucketTotals per location for the period, plus the customer emails
+        their customer codes refer to. Read from the order store's daily
+        rollups when it holds the period, otherwise fetched and accumulated.
+        """
+        store = getattr(self.shopify, 'order_store', None)
+        if store and store.covers(start_date):
+            customers = Interner()
+            start_day, end_day = start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d')
+            rollups = store.get_rollups(start_day, end_day, with_titles=bool(track_items))
+            totals = accumulate_rollups(
+                rollups, lambda day, location_id: self.locations.bucket_of(location_id),
+                len(self.locations.bucket_names), customers, track_items
+            )
+            # The rollups key customers by hash; guests stay 'guest'
+            emails = store.get_customer_emails(start_day, end_day)
+            return dict(zip(self.locations.bucket_names, totals)), [emails.get(key, key) for key in customers.values]
+        
+        # Flatten the fetch into columns once, then fill every per-location
+        # aggregate in a single accumulator pass
+        orders = OrderColumns.from_orders(self.shopify.get_orders_for_period(start_date, end_date))
+        self.product_classifier.classify_columns(orders)
+        totals = self._accumulate(
+            orders, self.locations.buckets(orders), len(self.locations.bucket_names), track_items,
+            self.product_classifier.workshop_mask(orders)
+        )
+        return dict(zip(self.locations.bucket_names, totals)), orders.customers.values
+    
+    def _returning_customers(self, customer_emails: List[str], period_start: datetime) -> Optional[List[Optional[bool]]]:
+        """
+        Per customer code, whether the customer first ordered before
+        period_start (None for guests), looked up in the order store's
+        customer index. None unless the store's history reaches
+        CUSTOMER_LOOKBACK_DAYS before the period, since customers whose
+        earlier orders predate the history would all look new.
+        """
+        store = getattr(self.shopify, 'order_store', None)
+        if not (store and store.covers(period_start - timedelta(days=CUSTOMER_LOOKBACK_DAYS))):
+            return None
+        profiles = store.get_customer_profiles(customer_emails)
+        start_day = period_start.strftime('%Y-%m-%d')
+        # Customers the index hasn't seen yet are ordering for the first time
+        return [
+            None if email == 'guest' else email in profiles and profiles[email]['first_order_day'] < start_day
+            for email in customer_emails
+        ]
+    
+    def _customer_segments(self, totals: BucketTotals, returning: Optional[List[Optional[bool]]]) -> Tuple[int, int]:
+        """(new, returning) customer counts; without the index, returning means ordered twice in the period"""
+        if returning is None:
+            repeat = sum(1 for count in totals.customer_orders.values() if count > 1)
+            return len(totals.customer_orders) - repeat, repeat
+        flags = [returning[code] for code in totals.customer_orders]
+        return flags.count(False), flags.count(True)
+    
+    def _calculate_metrics(self, totals: BucketTotals, returning: Optional[List[Optional[bool]]] = None) -> Dict[str, Any]:
+        """Calculate basic metrics from accumulated order totals"""
+        if not totals.order_count:
             return {
                 'order_count': 0,
                 'total_revenue': 0,
                 'avg_order_value': 0,
                 'total_items_sold': 0,
                 'unique_customers': 0,
-                'repeat_customers': 0
+                'repeat_customers': 0,
+                'new_customers': 0,
+                'returning_customers': 0
             }
         
-        df = pd.DataFrame(orders)
-        
-        total_revenue = df['total_price'].sum()
-        order_count = len(df)
-        avg_order_value = total_revenue / order_count if order_count > 0 else 0
-        
-        # Count total items
-        total_items = sum(
-            sum(item['quantity'] for item in order['line_items'])
-            for order in orders
-        )
-        
-        # Customer analysis
-        customer_orders = defaultdict(int)
-        for order in orders:
-            email = order.get('customer_email', 'guest')
-            customer_orders[email] += 1
-        
-        unique_customers = len(customer_orders)
-        repeat_customers = sum(1 for count in customer_orders.values() if count > 1)
+        order_count = totals.order_count
+        avg_order_value = to_dollars(totals.revenue_cents / order_count) if order_count > 0 else 0
+        new_customers, returning_customers = self._customer_segments(totals, returning)
         
         return {
             'order_count': order_count,
-            'total_revenue': total_revenue,
+            'total_revenue': to_dollars(totals.revenue_cents),
             'avg_order_value': avg_order_value,
-            'total_items_sold': total_items,
-            'unique_customers': unique_customers,
-            'repeat_customers': repeat_customers
+            'total_items_sold': totals.items,
+            'unique_customers': len(totals.customer_orders),
+            'repeat_customers': sum(1 for count in totals.customer_orders.values() if count > 1),
+            'new_customers': new_customers,
+            'returning_customers': returning_customers
         }
     
-    def _calculate_yoy_changes(self, current: Dict, previous: Dict) -> Dict[str, Any]:
+    def _calculate_yoy_changes(self, current: Dict, previous: Dict, previous_start: datetime) -> Dict[str, Any]:
         """Calculate year-over-year percentage changes"""
         changes = {}
         
         # Calculate changes for each location (stores only)
-        for location in ['all', 'charleston', 'boston']:
+        for location in ['all'] + self.locations.stores:
             changes[location] = {}
             current_loc = current.get(location, {})
             previous_loc = previous.get(location, {})
@@ -181,8 +340,8 @@ class ShopifyAnalytics:
                     change = ((current_loc.get(metric, 0) - previous_loc.get(metric, 0)) / previous_loc.get(metric, 0)) * 100
                     changes[location][f'{metric}_change'] = round(change, 1)
                 else:
-                    # Boston opened August 2024, so YoY comparisons are not meaningful
-                    if location == 'boston':
+                    # Stores that weren't open yet a year ago have no meaningful YoY
+                    if not self.locations.open_on(location, previous_start):
                         changes[location][f'{metric}_change'] = None  # Use None to indicate N/A
                     else:
                         changes[location][f'{metric}_change'] = 100 if current_loc.get(metric, 0) > 0 else 0
@@ -193,38 +352,25 @@ class ShopifyAnalytics:
         
         return changes
     
-    def _analyze_product_performance(self, orders: List[Dict]) -> List[Dict]:
+    def _analyze_product_performance(self, totals: BucketTotals) -> List[Dict]:
         """Analyze which products performed best"""
-        product_sales = defaultdict(lambda: {'quantity': 0, 'revenue': 0, 'orders': 0})
-        
-        for order in orders:
-            for item in order['line_items']:
-                title = item['title']
-                product_sales[title]['quantity'] += item['quantity']
-                product_sales[title]['revenue'] += item['price'] * item['quantity']
-                product_sales[title]['orders'] += 1
-        
-        # Convert to list and sort by revenue
+        # Keep the top 10 by revenue, then describe only those
         products = []
-        for title, data in product_sales.items():
+        for title, cents in top_counts(totals.product_cents, 10):
+            quantity = totals.product_quantity[title]
             products.append({
                 'product': title,
-                'quantity_sold': data['quantity'],
-                'revenue': data['revenue'],
-                'order_count': data['orders'],
-                'avg_price': data['revenue'] / data['quantity'] if data['quantity'] > 0 else 0
+                'quantity_sold': quantity,
+                'revenue': to_dollars(cents),
+                'order_count': totals.product_lines[title],
+                'avg_price': to_dollars(cents / quantity) if quantity > 0 else 0
             })
         
-        return sorted(products, key=lambda x: x['revenue'], reverse=True)[:10]
+        return products
     
-    def _analyze_workshops(self, orders: List[Dict]) -> Dict[str, Any]:
+    def _analyze_workshops(self, totals: BucketTotals) -> Dict[str, Any]:
         """Analyze workshop-specific data"""
-        workshop_orders = self.shopify.get_workshop_orders(
-            datetime.strptime(orders[0]['created_at'], '%Y-%m-%dT%H:%M:%S%z') if orders else datetime.now(),
-            datetime.strptime(orders[-1]['created_at'], '%Y-%m-%dT%H:%M:%S%z') if orders else datetime.now()
-        )
-        
-        if not workshop_orders:
+        if not totals.workshop_orders:
             return {
                 'total_workshops': 0,
                 'workshop_revenue': 0,
@@ -233,26 +379,26 @@ class ShopifyAnalytics:
                 'occupancy_data': {}
             }
         
-        workshop_types = defaultdict(lambda: {'count': 0, 'revenue': 0, 'attendees': 0})
-        
-        for order in workshop_orders:
-            for item in order['line_items']:
-                if 'workshop' in item['title'].lower() or 'class' in item['title'].lower():
-                    workshop_types[item['title']]['count'] += 1
-                    workshop_types[item['title']]['revenue'] += item['price'] * item['quantity']
-                    workshop_types[item['title']]['attendees'] += item['quantity']
+        workshop_types = {
+            title: {
+                'count': totals.workshop_lines[title],
+                'cents': cents,
+                'attendees': totals.workshop_quantity[title]
+            }
+            for title, cents in totals.workshop_cents.items()
+        }
         
         popular_workshops = [
             {
                 'name': name,
                 'sessions': data['count'],
-                'revenue': data['revenue'],
+                'revenue': to_dollars(data['cents']),
                 'attendees': data['attendees']
             }
-            for name, data in sorted(workshop_types.items(), key=lambda x: x[1]['revenue'], reverse=True)[:5]
+            for name, data in top_k(workshop_types.items(), 5, key=lambda x: x[1]['cents'])
         ]
         
-        total_revenue = sum(data['revenue'] for data in workshop_types.values())
+        total_revenue = to_dollars(sum(data['cents'] for data in workshop_types.values()))
         total_attendees = sum(data['attendees'] for data in workshop_types.values())
         
         # Calculate occupancy (placeholder - would ideally fetch from Google Sheets)
@@ -263,7 +409,7 @@ class ShopifyAnalytics:
         occupancy_rate = (total_attendees / total_capacity * 100) if total_capacity > 0 else 0
         
         return {
-            'total_workshops': len(workshop_orders),
+            'total_workshops': totals.workshop_orders,
             'workshop_revenue': total_revenue,
             'attendees': total_attendees,
             'popular_workshops': popular_workshops,
@@ -276,93 +422,102 @@ class ShopifyAnalytics:
             }
         }
     
-    def _analyze_customers(self, orders: List[Dict]) -> Dict[str, Any]:
+    def _analyze_customers(self, totals: BucketTotals, customer_emails: List[str],
+                           returning: Optional[List[Optional[bool]]] = None) -> Dict[str, Any]:
         """Analyze customer behavior"""
-        customer_data = defaultdict(lambda: {'orders': 0, 'revenue': 0, 'items': 0})
-        
-        for order in orders:
-            customer = order.get('customer_email', 'guest')
-            customer_data[customer]['orders'] += 1
-            customer_data[customer]['revenue'] += order['total_price']
-            customer_data[customer]['items'] += sum(item['quantity'] for item in order['line_items'])
-        
         # Find VIP customers (top spenders)
-        vip_customers = sorted(
-            [(email, data) for email, data in customer_data.items()],
-            key=lambda x: x[1]['revenue'],
-            reverse=True
-        )[:5]
+        vip_customers = top_counts(totals.customer_cents, 5)
+        new_customers, returning_customers = self._customer_segments(totals, returning)
         
         # Calculate customer segments
         segments = {
-            'new_customers': sum(1 for data in customer_data.values() if data['orders'] == 1),
-            'repeat_customers': sum(1 for data in customer_data.values() if data['orders'] > 1),
+            'new_customers': new_customers,
+            'returning_customers': returning_customers,
+            # Ordered more than once this week
+            'repeat_customers': sum(1 for count in totals.customer_orders.values() if count > 1),
+            # Whether new/returning come from lifetime history or just this week
+            'lifetime_history': returning is not None,
             'vip_customers': [
                 {
                     'email': email.split('@')[0] + '@***' if '@' in email else email,
-                    'orders': data['orders'],
-                    'revenue': data['revenue']
+                    'orders': totals.customer_orders[code],
+                    'revenue': to_dollars(cents)
                 }
-                for email, data in vip_customers
+                for email, code, cents in ((customer_emails[code], code, cents) for code, cents in vip_customers)
             ]
         }
         
         return segments
     
-    def _identify_trends(self, current_orders: List[Dict], prev_year_orders: List[Dict]) -> List[str]:
+    def _identify_trends(self, current: BucketTotals, prev_year: BucketTotals) -> List[str]:
         """Identify notable trends and patterns"""
         trends = []
         
         # Check if feedback context mentions specific things to track
         if 'track_items' in self.feedback_context:
             for item in self.feedback_context['track_items']:
-                relevant_orders = [o for o in current_orders if any(item.lower() in li['title'].lower() for li in o['line_items'])]
+                relevant_orders = current.tracked_orders.get(item)
                 if relevant_orders:
-                    trends.append(f"As requested, I tracked {item} - found {len(relevant_orders)} orders this week")
+                    trends.append(f"As requested, I tracked {item} - found {relevant_orders} orders this week")
         
         # Day of week analysis
-        if current_orders:
-            df = pd.DataFrame(current_orders)
-            df['created_at'] = pd.to_datetime(df['created_at'])
-            df['day_of_week'] = df['created_at'].dt.day_name()
+        if current.order_count:
+            totals = {
+                calendar.day_name[day]: current.weekday_cents[day]
+                for day in range(7) if current.weekday_orders[day]
+            }
             
-            best_day = df.groupby('day_of_week')['total_price'].sum().idxmax()
+            # Ties go to the alphabetically first day, as groupby().idxmax() did
+            best_day = max(sorted(totals), key=totals.get)
             trends.append(f"{best_day} was your best sales day")
         
         # Product category trends
-        current_categories = defaultdict(int)
-        for order in current_orders:
-            for item in order['line_items']:
-                if 'candle' in item['title'].lower():
-                    current_categories['candles'] += item['quantity']
-                elif 'workshop' in item['title'].lower() or 'class' in item['title'].lower():
-                    current_categories['workshops'] += item['quantity']
-                elif 'gift' in item['title'].lower():
-                    current_categories['gifts'] += item['quantity']
-        
-        for category, count in current_categories.items():
+        for category, count in current.trend_quantity.items():
             if count > 10:
                 trends.append(f"{category.capitalize()} are trending with {count} units sold")
         
         return trends
     
-    def _is_charleston_pos(self, order: Dict) -> bool:
-        """Check if order is from Charleston POS"""
-        # Charleston store location ID is 10719053
-        location_id = order.get('location_id')
-        return str(location_id) == '10719053'
-    
-    def _is_boston_pos(self, order: Dict) -> bool:
-        """Check if order is from Boston POS"""
-        # Boston store location ID is 71781154968
-        location_id = order.get('location_id')
-        return str(location_id) == '71781154968'
+    def analyze_sales_heatmap(self, start_date: datetime, end_date: datetime) -> Dict[str, Dict]:
+        """
+        Hour-of-day by day-of-week heatmap per store (and 'all') over any
+        period, e.g. a year for staffing. Reads only the order store's
+        hourly rollups, summed by SQLite, when it holds the period.
+        """
+        store = getattr(self.shopify, 'order_store', None)
+        if store and store.covers(start_date):
+            rows = store.get_hourly_totals(start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+            totals = accumulate_hourly_totals(rows, self.locations.bucket_of, len(self.locations.bucket_names))
+            by_location = dict(zip(self.locations.bucket_names, totals))
+        else:
+            by_location, _ = self._location_totals(start_date, end_date)
+        
+        stores = self.locations.stores
+        by_location['all'] = BucketTotals.merged([by_location[location] for location in stores])
+        return {location: self._analyze_heatmap(by_location[location]) for location in ['all'] + stores}
     
-    def _is_online_order(self, order: Dict) -> bool:
-        """Check if order is from online store"""
-        # Any order that's not from Charleston or Boston POS is considered online
-        # This includes web orders and orders from other locations (Atlanta store)
-        return not self._is_charleston_pos(order) and not self._is_boston_pos(order)
+    def _analyze_heatmap(self, totals: BucketTotals) -> Dict[str, Any]:
+        """7x24 orders and revenue by store-local weekday (rows, Monday first) and hour"""
+        orders = [totals.hour_orders[day * 24:(day + 1) * 24] for day in range(7)]
+        revenue = [[to_dollars(cents) for cents in totals.hour_cents[day * 24:(day + 1) * 24]] for day in range(7)]
+        
+        peak = None
+        if any(totals.hour_orders):
+            # Earliest cell wins ties
+            cell = max(range(HEATMAP_CELLS), key=lambda cell: (totals.hour_orders[cell], -cell))
+            peak = {
+                'day': calendar.day_name[cell // 24],
+                'hour': cell % 24,
+                'orders': totals.hour_orders[cell],
+                'revenue': to_dollars(totals.hour_cents[cell])
+            }
+        
+        return {
+            'days': list(calendar.day_name),
+            'orders': orders,
+            'revenue': revenue,
+            'peak_hour': peak
+        }
     
     def _get_store_goals(self, week_start: datetime) -> Dict[str, Any]:
         """Get store goals - placeholder until we integrate Google Sheets"""
@@ -404,7 +559,7 @@ class ShopifyAnalytics:
         """Calculate conversion metrics and performance vs goals"""
         conversion_data = {}
         
-        for location in ['charleston', 'boston']:
+        for location in self.locations.stores:
             metrics = current_metrics.get(location, {})
             location_goals = goals.get(location, {})
             
@@ -435,51 +590,81 @@ class ShopifyAnalytics:
         
         return conversion_data
     
-    def _analyze_multi_week_trends(self, current_week_start: datetime) -> Dict[str, Any]:
-        """Analyze trends over the past 4 weeks"""
+    def _analyze_multi_week_trends(self, current_week_start: datetime, weeks: int = None) -> Dict[str, Any]:
+        """
+        Weekly revenue, order and avg ticket series (overall and per location)
+        plus top product trajectories, ending with the current week. Served
+        from the order store's rollups; without them, falls back to a short
+        sharded fetch.
+        """
+        weeks = weeks or TREND_WEEKS
+        location_names = self.locations.bucket_names
+        location_count = len(location_names)
+        
+        oldest_week_start = current_week_start - timedelta(weeks=weeks - 1)
+        current_week_end = current_week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+        
+        # One bucket per (week, location)
+        store = getattr(self.shopify, 'order_store', None)
+        if store and store.covers(oldest_week_start):
+            rollups = store.get_weekly_rollups(oldest_week_start.strftime('%Y-%m-%d'), current_week_end.strftime('%Y-%m-%d'))
+            week_totals = accumulate_weekly_rollups(
+                rollups, lambda week, location_id: week * location_count + self.locations.bucket_of(location_id),
+                weeks * location_count
+            )
+        else:
+            # A sharded fetch per report is only affordable for a few weeks
+            weeks = min(weeks, FETCHED_TREND_WEEKS)
+            oldest_week_start = current_week_start - timedelta(weeks=weeks - 1)
+            all_orders = OrderColumns.from_orders(self.shopify.get_orders_sharded(oldest_week_start, current_week_end))
+            self.product_classifier.classify_columns(all_orders)
+            # The fetch window is store-local days, like the weekly rollups
+            week_index = all_orders.week_index(oldest_week_start)
+            buckets = week_index * location_count + self.locations.buckets(all_orders)
+            buckets[(week_index < 0) | (week_index >= weeks)] = -1
+            week_totals = self._accumulate(all_orders, buckets, weeks * location_count)
+        
         trends = {
+            'weeks': weeks,
             'revenue_trend': [],
             'order_trend': [],
             'avg_ticket_trend': [],
+            'by_location': {
+                location: {'revenue_trend': [], 'order_trend': [], 'avg_ticket_trend': []}
+                for location in location_names
+            },
             'top_products_trend': {}
         }
         
-        # Get data for past 2 weeks (reduced from 4 to prevent timeouts)
-        for i in range(2):
-            week_start = current_week_start - timedelta(weeks=i)
-            week_end = week_start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+        week_labels = [(oldest_week_start + timedelta(weeks=i)).strftime('%Y-%m-%d') for i in range(weeks)]
+        weekly = []
+        for i, week in enumerate(week_labels):
+            by_location = dict(zip(location_names, week_totals[i * location_count:(i + 1) * location_count]))
+            totals = BucketTotals.merged(list(by_location.values()))
+            weekly.append(totals)
             
-            orders = self.shopify.get_orders_for_period(week_start, week_end)
-            
-            # Calculate metrics for this week
-            metrics = self._calculate_metrics(orders)
-            
-            trends['revenue_trend'].insert(0, {
-                'week': week_start.strftime('%Y-%m-%d'),
-                'revenue': metrics['total_revenue']
-            })
-            
-            trends['order_trend'].insert(0, {
-                'week': week_start.strftime('%Y-%m-%d'),
-                'orders': metrics['order_count']
-            })
-            
-            trends['avg_ticket_trend'].insert(0, {
-                'week': week_start.strftime('%Y-%m-%d'),
-                'avg_ticket': metrics['avg_order_value']
-            })
-            
-            # Track top products
-            products = self._analyze_product_performance(orders)[:5]
-            for product in products:
-                name = product['product']
-                if name not in trends['top_products_trend']:
-                    trends['top_products_trend'][name] = []
-                trends['top_products_trend'][name].append({
-                    'week': week_start.strftime('%Y-%m-%d'),
-                    'revenue': product['revenue'],
-                    'quantity': product['quantity_sold']
-                })
+            for series, metrics in [(trends, self._calculate_metrics(totals))] + [
+                (trends['by_location'][location], self._calculate_metrics(by_location[location]))
+                for location in location_names
+            ]:
+                series['revenue_trend'].append({'week': week, 'revenue': metrics['total_revenue']})
+                series['order_trend'].append({'week': week, 'orders': metrics['order_count']})
+                series['avg_ticket_trend'].append({'week': week, 'avg_ticket': metrics['avg_order_value']})
+        
+        # Week-by-week trajectory of the top products over the whole window
+        window_cents = {}
+        for totals in weekly:
+            for title, cents in totals.product_cents.items():
+                window_cents[title] = window_cents.get(title, 0) + cents
+        for name, _ in top_counts(window_cents, 5):
+            trends['top_products_trend'][name] = [
+                {
+                    'week': week,
+                    'revenue': to_dollars(totals.product_cents.get(name, 0)),
+                    'quantity': totals.product_quantity.get(name, 0)
+                }
+                for week, totals in zip(week_labels, weekly)
+            ]
         
         # Calculate week-over-week changes
         if len(trends['revenue_trend']) >= 2:
@@ -489,57 +674,19 @@ class ShopifyAnalytics:
         
         return trends
     
-    def _analyze_product_categories(self, orders: List[Dict]) -> Dict[str, Any]:
+    def _analyze_product_categories(self, totals: BucketTotals) -> Dict[str, Any]:
         """Analyze products by category"""
-        categories = {
-            'candle_library': {'items': [], 'revenue': 0, 'count': 0},
-            'match_bar': {'items': [], 'revenue': 0, 'count': 0},
-            'workshops': {'items': [], 'revenue': 0, 'count': 0},
-            'gift_products': {'items': [], 'revenue': 0, 'count': 0}
-        }
+        categories = {}
         
-        for order in orders:
-            for item in order['line_items']:
-                title = item['title']
-                sku = item.get('sku', '')
-                revenue = item['price'] * item['quantity']
-                
-                # Categorize based on SKU patterns and product names
-                if re.match(r'cf\d+', sku.lower()) or 'candlefish no' in title.lower():
-                    # Candle library items (cf1020203 format)
-                    categories['candle_library']['items'].append(title)
-                    categories['candle_library']['revenue'] += revenue
-                    categories['candle_library']['count'] += item['quantity']
-                
-                elif 'match' in title.lower() or 'match bar' in title.lower():
-                    # Match bar items
-                    categories['match_bar']['items'].append(title)
-                    categories['match_bar']['revenue'] += revenue
-                    categories['match_bar']['count'] += item['quantity']
-                
-                elif 'workshop' in title.lower() or 'class' in title.lower():
-                    # Workshop items
-                    categories['workshops']['items'].append(title)
-                    categories['workshops']['revenue'] += revenue
-                    categories['workshops']['count'] += item['quantity']
-                
-                else:
-                    # Gift products from third party providers
-                    categories['gift_products']['items'].append(title)
-                    categories['gift_products']['revenue'] += revenue
-                    categories['gift_products']['count'] += item['quantity']
-        
-        # Get unique items and sort by frequency
-        for category in categories:
-            items = categories[category]['items']
-            unique_items = list(set(items))
-            categories[category]['unique_items'] = unique_items
-            categories[category]['top_items'] = [
-                (item, items.count(item)) 
-                for item in unique_items
-            ]
-            categories[category]['top_items'].sort(key=lambda x: x[1], reverse=True)
-            categories[category]['top_items'] = categories[category]['top_items'][:5]
-            del categories[category]['items']  # Remove raw list to save space
+        for index, category in enumerate(CATEGORY_NAMES):
+            title_counts = totals.category_titles[index]
+            
+            # Unique items, and the most frequent five
+            categories[category] = {
+                'revenue': to_dollars(totals.category_cents[index]),
+                'count': totals.category_count[index],
+                'unique_items': list(title_counts),
+                'top_items': top_counts(title_counts, 5)
+            }
         
         return categories
@@ -0,0 +1,90 @@
+import os
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .shopify_rate_limiter import ShopifyRateLimiter, get_rate_limiter
+
+
+API_VERSION = os.getenv('SHOPIFY_API_VERSION', '2023-07')
+
+
+class ShopifyClient:
+    """
+    Minimal Shopify REST Admin client on one keep-alive connection pool.
+
+    Site and auth headers live on the instance, so separate clients never
+    share mutable state, and a single client is safe to use from several
+    threads (requests sessions are, for plain GETs on a pooled adapter).
+    Every call goes through the process-wide rate limiter.
+    """
+
+    def __init__(self, shop_domain: str, access_token: str, api_version: str = API_VERSION,
+                 pool_size: int = None, timeout: float = 30,
+                 rate_limiter: ShopifyRateLimiter = None):
+        self.base_url = f"https://{shop_domain}/admin/api/{api_version}"
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+
+        pool_size = pool_size or int(os.getenv('SHOPIFY_HTTP_POOL_SIZE', '10'))
+
+        self.session = requests.Session()
+        # Retries are the rate limiter's job, so the adapter never retries
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'X-Shopify-Access-Token': access_token,
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip'
+        })
+
+    def get(self, path: str, params: Optional[Dict] = None) -> requests.Response:
+        """GET an API path (e.g. 'orders.json') or an absolute page URL"""
+        url = path if path.startswith('https://') else f"{self.base_url}/{path}"
+        return self.rate_limiter.call(self._get, url, params)
+
+    def get_json(self, path: str, params: Optional[Dict] = None) -> Dict:
+        return self.get(path, params).json()
+
+    def paginate(self, path: str, params: Dict, key: str,
+                 decode: Callable[[bytes], List] = None) -> Iterator[List[Dict]]:
+        """
+        Yield each page's `key` list, following Link: rel="next" page_info
+        cursors. Cursor URLs already carry limit and fields, so the original
+        filters are only sent with the first request. `decode`, if given,
+        turns the raw body into the page instead of response.json().
+        """
+        response = self.get(path, params)
+        while True:
+            if decode:
+                yield decode(response.content)
+            else:
+                yield response.json().get(key, [])
+
+            next_link = response.links.get('next')
+            if not next_link:
+                break
+            response = self.get(next_link['url'])
+
+    def close(self):
+        self.session.close()
+
+    def _get(self, url: str, params: Optional[Dict]) -> requests.Response:
+        response = self.session.get(url, params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response
+
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def get_shopify_client(shop_domain: str, access_token: str) -> ShopifyClient:
+    """Return the pooled client for this shop, creating it on first use"""
+    key = (shop_domain, access_token)
+    with _clients_lock:
+        if key not in _clients:
+            _clients[key] = ShopifyClient(shop_domain, access_token)
+        return _clients[key]
@@ -0,0 +1,188 @@
+import os
+import random
+import threading
+import time
+import logging
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ShopifyRateLimiter:
+    """
+    Process-wide limiter for Shopify's leaky-bucket REST API limits.
+
+    Keeps a local estimate of the bucket fill that leaks at the API's rate
+    and is corrected from X-Shopify-Shop-Api-Call-Limit after every call.
+    A call only starts when the bucket has room for it on top of every call
+    already in flight, so concurrency tracks the remaining capacity. 429s
+    honour Retry-After and are retried with jittered exponential backoff.
+    """
+
+    def __init__(self, bucket_size: int = 40, leak_rate: float = 2.0,
+                 max_retries: int = 5, reserve: int = 2):
+        self.bucket_size = bucket_size
+        self.leak_rate = leak_rate
+        self.max_retries = max_retries
+        # Headroom left for callers that don't go through this limiter
+        self.reserve = reserve
+
+        self._condition = threading.Condition()
+        self._used = 0.0
+        self._updated = time.monotonic()
+        self._in_flight = 0
+        self._blocked_until = 0.0
+
+    def call(self, func: Callable, *args, response_getter: Callable = None, **kwargs) -> Any:
+        """
+        Run func(*args, **kwargs) under the limiter, retrying throttled and
+        transient server errors. The call-limit header is read from the
+        returned response, or from response_getter() when func returns
+        something else.
+        """
+        attempt = 0
+        while True:
+            self.acquire()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                status, headers = _error_status_and_headers(e)
+                retryable = status == 429 or (status is not None and 500 <= status < 600)
+                retry_after = _parse_retry_after(headers) if status == 429 else None
+                self.release(_header(headers, 'X-Shopify-Shop-Api-Call-Limit'), retry_after, throttled=status == 429)
+
+                if not retryable or attempt >= self.max_retries:
+                    raise
+
+                delay = self._backoff(attempt, retry_after)
+                logger.warning(f"Shopify returned {status}, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+                attempt += 1
+                continue
+
+            try:
+                response = response_getter() if response_getter else result
+                call_limit = _header(getattr(response, 'headers', None) or {}, 'X-Shopify-Shop-Api-Call-Limit')
+            except Exception:
+                call_limit = None
+            self.release(call_limit)
+            return result
+
+    def acquire(self):
+        """Block until the bucket has room for one more call"""
+        with self._condition:
+            while True:
+                now = time.monotonic()
+                self._leak(now)
+
+                if now < self._blocked_until:
+                    wait_for = self._blocked_until - now
+                else:
+                    capacity = self.bucket_size - self.reserve
+                    pending = self._used + self._in_flight
+                    if pending + 1 <= capacity:
+                        self._in_flight += 1
+                        return
+                    # Either wait for a unit to leak or for an in-flight call to report back
+                    wait_for = max((pending + 1 - capacity) / self.leak_rate, 0.05)
+
+                self._condition.wait(timeout=wait_for)
+
+    def release(self, call_limit: Optional[str] = None, retry_after: Optional[float] = None,
+                throttled: bool = False):
+        """Record a finished call and resync from its response headers"""
+        with self._condition:
+            now = time.monotonic()
+            self._leak(now)
+            self._in_flight = max(0, self._in_flight - 1)
+
+            parsed = _parse_call_limit(call_limit)
+            if parsed:
+                self._used, self.bucket_size = parsed
+            elif throttled:
+                self._used = float(self.bucket_size)
+            else:
+                self._used = min(self._used + 1, float(self.bucket_size))
+
+            if retry_after:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+
+            self._condition.notify_all()
+
+    @property
+    def available(self) -> int:
+        """Calls that could start right now without overfilling the bucket"""
+        with self._condition:
+            self._leak(time.monotonic())
+            return max(0, int(self.bucket_size - self.reserve - self._used - self._in_flight))
+
+    def _leak(self, now: float):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._used = max(0.0, self._used - elapsed * self.leak_rate)
+            self._updated = now
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        # Full jitter keeps concurrent callers from retrying in lockstep
+        delay = random.uniform(0, min(30.0, 0.5 * (2 ** attempt)))
+        if retry_after:
+            delay += retry_after
+        return delay
+
+
+def _header(headers, name: str) -> Optional[str]:
+    """Case-insensitive header lookup"""
+    name = name.lower()
+    for key, value in dict(headers).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+def _parse_call_limit(value: Optional[str]):
+    """Parse '32/40' into (32.0, 40)"""
+    if not value:
+        return None
+    try:
+        used, size = value.split('/')
+        return float(used), int(size)
+    except ValueError:
+        return None
+
+
+def _parse_retry_after(headers) -> Optional[float]:
+    value = _header(headers, 'Retry-After')
+    try:
+        return float(value) if value else None
+    except ValueError:
+        return None
+
+
+def _error_status_and_headers(error: Exception):
+    """Pull the HTTP status and headers off a requests/urllib error"""
+    response = getattr(error, 'response', None)
+    status = (getattr(response, 'status_code', None) or getattr(response, 'code', None)
+              or getattr(error, 'code', None))
+    headers = getattr(response, 'headers', None) or {}
+    try:
+        status = int(status) if status is not None else None
+    except (TypeError, ValueError):
+        status = None
+    return status, headers
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+
+def get_rate_limiter() -> ShopifyRateLimiter:
+    """Return the limiter shared by every ShopifyService in this process"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = ShopifyRateLimiter(
+                bucket_size=int(os.getenv('SHOPIFY_API_BUCKET_SIZE', '40')),
+                leak_rate=float(os.getenv('SHOPIFY_API_LEAK_RATE', '2')),
+                max_retries=int(os.getenv('SHOPIFY_API_MAX_RETRIES', '5'))
+            )
+        return _limiter
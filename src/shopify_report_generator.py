@@ -18,6 +18,8 @@ from io import BytesIO
 import tempfile
 from typing import Dict, List, Any
 
+from .location_registry import get_location_registry
+
 
 class ShopifyReportGenerator:
     def __init__(self):
@@ -163,29 +165,30 @@ class ShopifyReportGenerator:
         if 'product_performance_by_location' in analytics_data:
             story.append(Paragraph("Top Products by Location", self.styles['SectionHeader']))
             
-            # Charleston Top Products
-            charleston_products = analytics_data['product_performance_by_location']['charleston'][:3]
-            boston_products = analytics_data['product_performance_by_location']['boston'][:3]
+            # One column of top products per store
+            registry = get_location_registry()
+            store_products = [
+                analytics_data['product_performance_by_location'].get(key, [])[:3]
+                for key in registry.stores
+            ]
             
-            location_data = [['Charleston Store', 'Boston Store']]
+            location_data = [[f"{registry.by_key[key].name} Store" for key in registry.stores]]
             
             # Create side-by-side comparison
-            max_products = max(len(charleston_products), len(boston_products))
+            max_products = max((len(products) for products in store_products), default=0)
             for i in range(max_products):
-                charleston_item = ""
-                boston_item = ""
-                
-                if i < len(charleston_products):
-                    p = charleston_products[i]
-                    charleston_item = f"{i+1}. {p['product'][:30]}{'...' if len(p['product']) > 30 else ''}\n   ${p['revenue']:,.0f} ({p['quantity_sold']} sold)"
-                
-                if i < len(boston_products):
-                    p = boston_products[i]
-                    boston_item = f"{i+1}. {p['product'][:30]}{'...' if len(p['product']) > 30 else ''}\n   ${p['revenue']:,.0f} ({p['quantity_sold']} sold)"
+                row = []
+                for products in store_products:
+                    item = ""
+                    if i < len(products):
+                        p = products[i]
+                        item = f"{i+1}. {p['product'][:30]}{'...' if len(p['product']) > 30 else ''}\n   ${p['revenue']:,.0f} ({p['quantity_sold']} sold)"
+                    row.append(item)
                 
-                location_data.append([charleston_item, boston_item])
+                location_data.append(row)
             
-            location_table = Table(location_data, colWidths=[3*inch, 3*inch])
+            column_width = 6*inch / max(len(registry.stores), 1)
+            location_table = Table(location_data, colWidths=[column_width] * len(registry.stores))
             location_table.setStyle(TableStyle([
                 ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
                 ('VALIGN', (0, 0), (-1, -1), 'TOP'),
@@ -236,12 +239,13 @@ class ShopifyReportGenerator:
         story.append(Paragraph("Customer Insights", self.styles['SectionHeader']))
         
         customers = analytics_data.get('customer_insights', {})
+        returning = customers.get('returning_customers', customers.get('repeat_customers', 0))
         customer_data = [
-            ['New Customers', 'Repeat Customers', 'Repeat Rate'],
+            ['New Customers', 'Returning Customers', 'Returning Rate'],
             [
                 str(customers.get('new_customers', 0)),
-                str(customers.get('repeat_customers', 0)),
-                f"{(customers.get('repeat_customers', 0) / max(customers.get('new_customers', 0) + customers.get('repeat_customers', 0), 1) * 100):.1f}%"
+                str(returning),
+                f"{(returning / max(customers.get('new_customers', 0) + returning, 1) * 100):.1f}%"
             ]
         ]
         
@@ -0,0 +1,177 @@
+"""
+Shape of the order and product dicts the analytics work with.
+
+Each schema row is (dict key, Shopify API field, converter). The same rows
+drive both the `fields=` projection sent to Shopify and the builders that
+turn raw API JSON into analytics dicts, so the two can't drift apart.
+"""
+import json
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, Callable, Dict, List, Optional
+
+
+def _money(value) -> float:
+    return float(value) if value not in (None, '') else 0.0
+
+
+def to_cents(value) -> int:
+    """
+    Whole cents for a Shopify money amount. Shopify sends decimal strings
+    ("12.50"), which are parsed exactly rather than through a float; floats
+    (total_price in stored dicts) round from their shortest str().
+    """
+    if value in (None, ''):
+        return 0
+    if isinstance(value, str):
+        whole, _, fraction = value.partition('.')
+        if len(fraction) <= 2 and whole.lstrip('-').isdigit() and (not fraction or fraction.isdigit()):
+            cents = abs(int(whole)) * 100 + int(fraction.ljust(2, '0'))
+            return -cents if whole.startswith('-') else cents
+        return int(Decimal(value).scaleb(2).quantize(Decimal(1), ROUND_HALF_UP))
+    # 0.285 * 100 is 28.499999..., so go through '0.285' instead
+    return int(Decimal(str(value)).scaleb(2).quantize(Decimal(1), ROUND_HALF_UP))
+
+
+def to_dollars(cents: int) -> float:
+    """Dollars for a whole-cents total, for reports"""
+    return cents / 100
+
+
+def _or_empty(value):
+    return value if value is not None else ''
+
+
+def _split_tags(value) -> List[str]:
+    return value.split(', ') if value else []
+
+
+def _customer_name(customer: Optional[Dict]) -> str:
+    if not customer:
+        return "Guest"
+    return f"{customer.get('first_name')} {customer.get('last_name')}"
+
+
+LINE_ITEM_SCHEMA = (
+    ('title', 'title', None),
+    ('variant_title', 'variant_title', None),
+    ('quantity', 'quantity', None),
+    ('price', 'price', _money),
+    ('price_cents', 'price', to_cents),
+    ('sku', 'sku', None),
+    ('product_id', 'product_id', None),
+)
+
+
+def _line_items(items: Optional[List[Dict]]) -> List[Dict]:
+    return [_project_line_item(item) for item in items or []]
+
+
+ORDER_SCHEMA = (
+    ('id', 'id', None),
+    ('created_at', 'created_at', None),
+    ('updated_at', 'updated_at', None),
+    ('total_price', 'total_price', _money),
+    ('total_cents', 'total_price', to_cents),
+    ('subtotal_price', 'subtotal_price', _money),
+    ('total_tax', 'total_tax', _money),
+    ('customer_email', 'email', None),
+    ('customer_name', 'customer', _customer_name),
+    ('line_items', 'line_items', _line_items),
+    ('tags', 'tags', _split_tags),
+    ('note', 'note', None),
+    ('financial_status', 'financial_status', None),
+    ('source_name', 'source_name', _or_empty),
+    ('location_id', 'location_id', _or_empty),
+)
+
+
+VARIANT_SCHEMA = (
+    ('id', 'id', None),
+    ('title', 'title', None),
+    ('price', 'price', _money),
+    ('sku', 'sku', None),
+    ('inventory_quantity', 'inventory_quantity', None),
+)
+
+
+def _variants(variants: Optional[List[Dict]]) -> List[Dict]:
+    return [_project_variant(variant) for variant in variants or []]
+
+
+PRODUCT_SCHEMA = (
+    ('id', 'id', None),
+    ('title', 'title', None),
+    ('product_type', 'product_type', None),
+    ('vendor', 'vendor', None),
+    ('tags', 'tags', _split_tags),
+    ('variants', 'variants', _variants),
+)
+
+
+def _projector(schema) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Build a projection function for a schema. Pass-through fields are
+    copied in one comprehension and only the converted ones pay for a call,
+    which matters on the order/line-item hot path.
+    """
+    plain = tuple((key, field) for key, field, convert in schema if convert is None)
+    converted = tuple((key, field, convert) for key, field, convert in schema if convert is not None)
+
+    def project(raw: Dict[str, Any]) -> Dict[str, Any]:
+        get = raw.get
+        projected = {key: get(field) for key, field in plain}
+        for key, field, convert in converted:
+            projected[key] = convert(get(field))
+        return projected
+
+    return project
+
+
+def api_fields(schema) -> str:
+    """Comma-separated top-level fields for Shopify's `fields=` parameter"""
+    return ','.join(dict.fromkeys(field for _, field, _ in schema))
+
+
+ORDER_API_FIELDS = api_fields(ORDER_SCHEMA)
+PRODUCT_API_FIELDS = api_fields(PRODUCT_SCHEMA)
+
+
+_project_line_item = _projector(LINE_ITEM_SCHEMA)
+_project_order = _projector(ORDER_SCHEMA)
+_project_variant = _projector(VARIANT_SCHEMA)
+_project_product = _projector(PRODUCT_SCHEMA)
+
+
+def build_order_dict(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert raw Shopify order JSON into the dict used by analytics"""
+    return _project_order(raw)
+
+
+def build_product_dict(raw: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert raw Shopify product JSON into the dict used by analytics"""
+    return _project_product(raw)
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    """A customer email as one customer: trimmed and lowercased, None if blank"""
+    return (email or '').strip().lower() or None
+
+
+def order_cents(order: Dict[str, Any]) -> int:
+    """An order dict's total in cents, for dicts stored before total_cents existed too"""
+    cents = order.get('total_cents')
+    return cents if cents is not None else to_cents(order['total_price'])
+
+
+def item_cents(item: Dict[str, Any]) -> int:
+    """A line item's unit price in cents (see order_cents)"""
+    cents = item.get('price_cents')
+    return cents if cents is not None else to_cents(item['price'])
+
+
+def decode_orders_page(body: bytes) -> List[Dict[str, Any]]:
+    """
+    Fast path from a raw orders.json response body straight to analytics
+    order dicts, with no intermediate resource objects
+    """
+    return [_project_order(raw) for raw in json.loads(body).get('orders', ())]
@@ -1,11 +1,37 @@
 import os
-from datetime import datetime, timedelta
-import shopify
-from typing import Dict, List, Any
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Any, Iterator, Tuple
+from zoneinfo import ZoneInfo
+
+from .order_store import OrderStore
+from .shopify_client import get_shopify_client
+from .single_flight import SingleFlight
+from .shopify_schema import ORDER_API_FIELDS, PRODUCT_API_FIELDS, build_order_dict, build_product_dict, decode_orders_page
+from .product_classifier import get_product_classifier
+
+
+# Shopify's maximum page size for REST list endpoints
+PAGE_LIMIT = 250
+
+# Slice widths for sharded fetching, and the narrowest slice we will split to
+SLICE_SIZES = {
+    'week': timedelta(weeks=1),
+    'day': timedelta(days=1),
+    'hour': timedelta(hours=1),
+}
+MIN_SLICE = timedelta(minutes=1)
+
+# Concurrent get_orders_for_period calls for the same window share one fetch
+_order_flights = SingleFlight()
+
+
+class OrderFetchError(Exception):
+    """Orders could not be read, even after the rate limiter's retries; the cause is chained"""
 
 
 class ShopifyService:
-    def __init__(self):
+    def __init__(self, order_store: OrderStore = None):
         self.shop_domain = os.getenv('SHOPIFY_SHOP_DOMAIN')
         self.access_token = os.getenv('SHOPIFY_ACCESS_TOKEN')
         self.api_key = os.getenv('SHOPIFY_API_KEY')
@@ -13,109 +39,214 @@ class ShopifyService:
         if not all([self.shop_domain, self.access_token]):
             raise ValueError("Missing Shopify configuration. Please check environment variables.")
         
-        self._init_session()
+        # Synced local copy of orders; reads are served from it once it
+        # covers the requested range (see OrderSync)
+        if order_store is None and os.getenv('ORDER_STORE_ENABLED', 'true').lower() == 'true':
+            order_store = OrderStore()
+        self.order_store = order_store
+        
+        # One pooled keep-alive session per shop, shared by every instance and
+        # thread; calls go through the process-wide rate limiter
+        self.client = get_shopify_client(self.shop_domain, self.access_token)
+        self._shop_timezone = None
+    
+    def shop_timezone(self) -> ZoneInfo:
+        """
+        The shop's time zone, which Shopify writes created_at in and so the
+        one store-local days are counted in; SHOP_TIMEZONE overrides it
+        """
+        if self._shop_timezone is None:
+            name = os.getenv('SHOP_TIMEZONE')
+            if not name:
+                name = self.client.get_json('shop.json', {'fields': 'iana_timezone'})['shop']['iana_timezone']
+            self._shop_timezone = ZoneInfo(name)
+        return self._shop_timezone
     
-    def _init_session(self):
-        # Use the latest stable version available
-        shopify.ShopifyResource.set_site(
-            f"https://{self.shop_domain}/admin/api/2023-07"
+    def local_day_window(self, start_date: datetime, end_date: datetime) -> Tuple[datetime, datetime]:
+        """
+        [start, end) in shop time covering store-local days start_date to
+        end_date inclusive: the window every order read uses, matching the
+        order store's rollups
+        """
+        zone = self.shop_timezone()
+        end_day = end_date.date() + timedelta(days=1)
+        return (
+            datetime(start_date.year, start_date.month, start_date.day, tzinfo=zone),
+            datetime(end_day.year, end_day.month, end_day.day, tzinfo=zone)
         )
-        shopify.ShopifyResource.set_headers({
-            'X-Shopify-Access-Token': self.access_token
-        })
     
     def get_orders_for_period(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        """Orders on store-local days start_date..end_date; raises OrderFetchError if they can't be read"""
         try:
-            orders = []
-            
-            # Format dates for Shopify API
-            start_str = start_date.strftime('%Y-%m-%dT00:00:00-00:00')
-            end_str = end_date.strftime('%Y-%m-%dT23:59:59-00:00')
+            key = (
+                self.shop_domain, start_date.isoformat(), end_date.isoformat(),
+                self.order_store.db_path if self.order_store else None
+            )
+            orders, shared = _order_flights.do(key, self._load_orders_for_period, start_date, end_date)
+            if shared:
+                print(f"Shared an in-flight order fetch for {start_date.date()} to {end_date.date()}")
+            # Callers only read the order dicts, but get their own list
+            return list(orders)
             
-            print(f"Fetching orders from {start_str} to {end_str}")
-            
-            # Fetch orders with cursor-based pagination
-            params = {
-                'created_at_min': start_str,
-                'created_at_max': end_str,
-                'status': 'any',
-                'limit': 250
-            }
+        except Exception as e:
+            print(f"Error fetching orders: {str(e)}")
+            # An empty list would read as a week without sales
+            raise OrderFetchError(f"Could not fetch orders for {start_date.date()} to {end_date.date()}: {e}") from e
+    
+    def _load_orders_for_period(self, start_date: datetime, end_date: datetime) -> List[Dict]:
+        if self.order_store and self.order_store.covers(start_date):
+            orders = self.order_store.get_orders_for_period(start_date, end_date)
+            print(f"Total orders loaded from local store: {len(orders)}")
+            return orders
+        
+        orders = list(self.iter_orders_for_period(start_date, end_date))
+        print(f"Total orders fetched: {len(orders)}")
+        return orders
+    
+    def iter_orders_for_period(self, start_date: datetime, end_date: datetime) -> Iterator[Dict]:
+        """
+        Lazily yield every order in the period, one page in memory at a time
+        """
+        for page in self.iter_order_pages(start_date, end_date):
+            for order_data in page:
+                yield order_data
+    
+    def iter_order_pages(self, start_date: datetime, end_date: datetime) -> Iterator[List[Dict]]:
+        """
+        Yield pages of orders for the period, following the Link: rel="next"
+        page_info cursors until Shopify reports no further pages
+        """
+        # Format dates for Shopify API; created_at has second resolution
+        window_start, window_end = self.local_day_window(start_date, end_date)
+        start_str = window_start.isoformat()
+        end_str = (window_end - timedelta(seconds=1)).isoformat()
+        
+        print(f"Fetching orders from {start_str} to {end_str}")
+        
+        logged = 0
+        for page in self._iter_order_pages(created_at_min=start_str, created_at_max=end_str):
+            # Debug logging to understand order sources
+            for order_data in page[:max(0, 5 - logged)]:  # Only log first few orders
+                print(f"Order {order_data['id']}: source={order_data['source_name']}, tags={order_data['tags']}, location_id={order_data['location_id']}")
+                logged += 1
             
-            # Just fetch orders without pagination for now
-            # The ShopifyAPI library doesn't support cursor pagination properly
-            batch = shopify.Order.find(**params)
+            yield page
+    
+    def iter_orders_updated_since(self, updated_at_min: str) -> Iterator[List[Dict]]:
+        """
+        Yield pages of orders updated at or after updated_at_min, oldest
+        update first, for incremental syncs into the local order store
+        """
+        return self._iter_order_pages(updated_at_min=updated_at_min, order='updated_at asc')
+    
+    def _iter_order_pages(self, **filters) -> Iterator[List[Dict]]:
+        """Yield order pages matching the given Shopify list filters"""
+        # Fetch orders with cursor-based pagination
+        params = {
+            'status': 'any',
+            'limit': PAGE_LIMIT,
+            # Only download what build_order_dict reads
+            'fields': ORDER_API_FIELDS,
+            **filters
+        }
+        
+        # Decode raw bodies straight into order dicts
+        for page in self.client.paginate('orders.json', params, 'orders', decode=decode_orders_page):
+            yield page
+    
+    def get_order(self, order_id) -> Dict:
+        """Fetch a single order by id, or None if it can't be read"""
+        try:
+            data = self.client.get_json(f'orders/{order_id}.json', {'fields': ORDER_API_FIELDS})
+            return build_order_dict(data['order'])
+        except Exception as e:
+            print(f"Error fetching order {order_id}: {str(e)}")
+            return None
+    
+    def get_orders_sharded(self, start_date: datetime, end_date: datetime,
+                           slice_size: str = 'week', max_workers: int = None) -> List[Dict]:
+        """
+        Fetch the same window as get_orders_for_period, split into week, day
+        or hour slices that are fetched concurrently on a bounded thread pool.
+        
+        A slice whose first page comes back full is split in half and
+        re-queued, so busy weeks fan out further instead of paging serially
+        while quiet ones cost a single call.
+        Results are merged and deduplicated by order id. Raises
+        OrderFetchError if any slice can't be read.
+        """
+        if slice_size not in SLICE_SIZES:
+            raise ValueError(f"slice_size must be one of {sorted(SLICE_SIZES)}")
+        
+        max_workers = max_workers or int(os.getenv('SHOPIFY_FETCH_WORKERS', '4'))
+        
+        # Same bounds get_orders_for_period uses, sliced in UTC so slices
+        # keep their width across DST changes
+        window_start, window_end = self.local_day_window(start_date, end_date)
+        window_start = window_start.astimezone(timezone.utc)
+        window_end = window_end.astimezone(timezone.utc)
+        
+        print(f"Fetching orders from {window_start.isoformat()} to {window_end.isoformat()} in {slice_size} slices ({max_workers} workers)")
+        
+        try:
+            merged = {}
             
-            if batch:
-                for order in batch:
-                    order_data = {
-                        'id': order.id,
-                        'created_at': order.created_at,
-                        'total_price': float(order.total_price),
-                        'subtotal_price': float(order.subtotal_price),
-                        'total_tax': float(order.total_tax),
-                        'customer_email': order.email,
-                        'customer_name': f"{order.customer.first_name} {order.customer.last_name}" if order.customer else "Guest",
-                        'line_items': [],
-                        'tags': order.tags.split(', ') if order.tags else [],
-                        'note': order.note,
-                        'financial_status': order.financial_status,
-                        'source_name': getattr(order, 'source_name', ''),
-                        'location_id': getattr(order, 'location_id', '')
-                    }
-                    
-                    # Debug logging to understand order sources
-                    if len(orders) < 5:  # Only log first few orders
-                        print(f"Order {order.id}: source={order_data['source_name']}, tags={order_data['tags']}, location_id={order_data['location_id']}")
-                    
-                    for item in order.line_items:
-                        order_data['line_items'].append({
-                            'title': item.title,
-                            'variant_title': item.variant_title,
-                            'quantity': item.quantity,
-                            'price': float(item.price),
-                            'sku': item.sku,
-                            'product_id': item.product_id
-                        })
-                    
-                    orders.append(order_data)
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                pending = set()
+                step = SLICE_SIZES[slice_size]
+                slice_start = window_start
+                while slice_start < window_end:
+                    slice_end = min(slice_start + step, window_end)
+                    pending.add(executor.submit(self._fetch_order_slice, slice_start, slice_end))
+                    slice_start = slice_end
+                
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        orders, splits = future.result()
+                        for order_data in orders:
+                            merged[order_data['id']] = order_data
+                        for slice_start, slice_end in splits:
+                            pending.add(executor.submit(self._fetch_order_slice, slice_start, slice_end))
             
+            # Newest first, matching Shopify's default ordering
+            orders = sorted(merged.values(), key=lambda o: o['id'], reverse=True)
             print(f"Total orders fetched: {len(orders)}")
             return orders
             
         except Exception as e:
-            print(f"Error fetching orders: {str(e)}")
-            return []
+            print(f"Error fetching sharded orders: {str(e)}")
+            raise OrderFetchError(f"Could not fetch orders for {start_date.date()} to {end_date.date()}: {e}") from e
+    
+    def _fetch_order_slice(self, slice_start: datetime, slice_end: datetime):
+        """
+        Fetch orders in [slice_start, slice_end). Returns (orders, splits);
+        when the first page is full and the slice can still be halved, no
+        orders are returned and the two halves come back as splits instead.
+        """
+        created_at_min = slice_start.strftime('%Y-%m-%dT%H:%M:%S-00:00')
+        # created_at has second resolution, so stopping one second short of
+        # the next slice keeps neighbouring slices from overlapping
+        created_at_max = (slice_end - timedelta(seconds=1)).strftime('%Y-%m-%dT%H:%M:%S-00:00')
+        
+        orders = []
+        for page in self._iter_order_pages(created_at_min=created_at_min, created_at_max=created_at_max):
+            if not orders and len(page) >= PAGE_LIMIT and slice_end - slice_start > MIN_SLICE:
+                midpoint = slice_start + (slice_end - slice_start) / 2
+                midpoint = midpoint.replace(microsecond=0)
+                return [], [(slice_start, midpoint), (midpoint, slice_end)]
+            orders.extend(page)
+        
+        return orders, []
     
     def get_products(self) -> List[Dict]:
         try:
             products = []
-            params = {'limit': 250}
+            params = {'limit': PAGE_LIMIT, 'fields': PRODUCT_API_FIELDS}
             
-            # Just fetch products without pagination for now
-            batch = shopify.Product.find(**params)
-            
-            if batch:
-                for product in batch:
-                    product_data = {
-                        'id': product.id,
-                        'title': product.title,
-                        'product_type': product.product_type,
-                        'vendor': product.vendor,
-                        'tags': product.tags.split(', ') if product.tags else [],
-                        'variants': []
-                    }
-                    
-                    for variant in product.variants:
-                        product_data['variants'].append({
-                            'id': variant.id,
-                            'title': variant.title,
-                            'price': float(variant.price),
-                            'sku': variant.sku,
-                            'inventory_quantity': variant.inventory_quantity
-                        })
-                    
-                    products.append(product_data)
+            for page in self.client.paginate('products.json', params, 'products'):
+                for product in page:
+                    products.append(build_product_dict(product))
             
             return products
             
@@ -125,44 +256,35 @@ class ShopifyService:
     
     def get_customers_count(self) -> int:
         try:
-            count = shopify.Customer.count()
-            return count
+            return self.client.get_json('customers/count.json')['count']
         except Exception as e:
             print(f"Error fetching customer count: {str(e)}")
             return 0
     
+    def get_orders_count(self, start_date: datetime = None, end_date: datetime = None) -> int:
+        """
+        Count of orders in the store, any status, optionally limited to the
+        store-local days get_orders_for_period would fetch
+        """
+        params = {'status': 'any'}
+        if start_date:
+            params['created_at_min'] = self.local_day_window(start_date, start_date)[0].isoformat()
+        if end_date:
+            params['created_at_max'] = (self.local_day_window(end_date, end_date)[1] - timedelta(seconds=1)).isoformat()
+        return self.client.get_json('orders/count.json', params)['count']
+    
+    def get_locations(self) -> List[Dict]:
+        """Raw Shopify location records"""
+        return self.client.get_json('locations.json').get('locations', [])
+    
     def get_workshop_orders(self, start_date: datetime, end_date: datetime) -> List[Dict]:
         """
         Get orders that are tagged as workshops or have workshop-related products
         """
         orders = self.get_orders_for_period(start_date, end_date)
-        workshop_orders = []
-        
-        workshop_keywords = ['workshop', 'class', 'lesson', 'tutorial', 'session']
-        
-        for order in orders:
-            is_workshop = False
-            
-            # Check order tags
-            for tag in order.get('tags', []):
-                if any(keyword in tag.lower() for keyword in workshop_keywords):
-                    is_workshop = True
-                    break
-            
-            # Check product titles
-            if not is_workshop:
-                for item in order.get('line_items', []):
-                    if any(keyword in item['title'].lower() for keyword in workshop_keywords):
-                        is_workshop = True
-                        break
-            
-            # Check order notes
-            if not is_workshop and order.get('note'):
-                if any(keyword in order['note'].lower() for keyword in workshop_keywords):
-                    is_workshop = True
-            
-            if is_workshop:
-                workshop_orders.append(order)
+        classifier = get_product_classifier()
+        workshop_orders = [order for order in orders if classifier.is_workshop_order(order)]
+        classifier.flush()
         
         return workshop_orders
     
@@ -210,5 +332,5 @@ class ShopifyService:
             return {}
     
     def close_session(self):
-        """Clean up Shopify session"""
-        shopify.ShopifyResource.clear_session()
\ No newline at end of file
+        """Kept for callers; the pooled client is shared and stays open"""
+        pass
\ No newline at end of file
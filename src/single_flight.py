@@ -0,0 +1,61 @@
+import threading
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+
+class _Call:
+    """One in-flight computation and everyone waiting on it"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function, later callers block until it finishes and share its result
+    (or its exception). Nothing is kept once the call completes, so this
+    only deduplicates work that overlaps in time; caching is separate.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Tuple[Any, bool]:
+        """
+        Run func(*args, **kwargs) once per concurrent key. Returns (value,
+        shared), where shared is True if more than one caller got this
+        value, i.e. it must be treated as read-only or copied.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                call.waiters += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.value, call.waiters > 0
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
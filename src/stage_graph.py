@@ -0,0 +1,99 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class StageError(Exception):
+    """A stage raised; the original exception is chained as __cause__"""
+
+    def __init__(self, stage: str, error: Exception):
+        super().__init__(f"Stage '{stage}' failed: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class StageGraph:
+    """
+    Runs named stages on a thread pool as soon as the stages they depend
+    on have finished. Each stage is called with its dependencies' results
+    as keyword arguments named after those stages, so independent I/O
+    (API fetches, Sheets, SQLite, the LLM call) overlaps and the graph
+    takes about as long as its slowest dependency chain.
+
+        graph = StageGraph('report')
+        graph.add('current', fetch_current)
+        graph.add('previous', fetch_previous)
+        graph.add('report', lambda current, previous: ..., deps=('current', 'previous'))
+        results = graph.run()
+
+    Per-stage wall times are kept in `timings` after run().
+    """
+
+    def __init__(self, name: str = 'stages'):
+        self.name = name
+        self._stages: Dict[str, tuple] = {}
+        self.timings: Dict[str, float] = {}
+        self.wall_time = None
+
+    def add(self, name: str, func: Callable, deps: Sequence[str] = ()) -> 'StageGraph':
+        """Add a stage; its dependencies must already have been added"""
+        if name in self._stages:
+            raise ValueError(f"Duplicate stage: {name}")
+        unknown = [dep for dep in deps if dep not in self._stages]
+        if unknown:
+            raise ValueError(f"Stage {name} depends on unknown stages: {', '.join(unknown)}")
+        self._stages[name] = (func, tuple(deps))
+        return self
+
+    def run(self) -> Dict[str, Any]:
+        """Run every stage; returns each stage's result by name"""
+        results = {}
+        pending = dict(self._stages)
+        running = {}
+        self.timings = {}
+        started = time.perf_counter()
+
+        # One thread per stage, so a stage that runs its own graph can't
+        # starve a shared pool
+        pool = ThreadPoolExecutor(max_workers=max(len(pending), 1), thread_name_prefix=self.name)
+        try:
+            while pending or running:
+                for name, (func, deps) in list(pending.items()):
+                    if all(dep in results for dep in deps):
+                        del pending[name]
+                        kwargs = {dep: results[dep] for dep in deps}
+                        running[pool.submit(self._timed, name, func, kwargs)] = name
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        raise StageError(name, e) from e
+        except BaseException:
+            # Fail now; stages still running finish in the background and
+            # their results are dropped
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown()
+
+        self.wall_time = time.perf_counter() - started
+        logger.info(f"{self.name}: {self.summary()}")
+        return results
+
+    def _timed(self, name: str, func: Callable, kwargs: Dict) -> Any:
+        started = time.perf_counter()
+        try:
+            return func(**kwargs)
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    def summary(self) -> str:
+        """Stage timings as 'name 1.23s, ... (wall 1.50s)'"""
+        stages = ', '.join(f"{name} {seconds:.2f}s" for name, seconds in self.timings.items())
+        wall = f" (wall {self.wall_time:.2f}s)" if self.wall_time is not None else ''
+        return stages + wall
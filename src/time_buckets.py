@@ -0,0 +1,126 @@
+"""
+Integer time columns for order timestamps.
+
+Shopify stamps orders in the shop's own offset ("2024-01-06T15:08:50-05:00"),
+so the wall-clock part of created_at is store-local time. parse_timestamps()
+turns a batch of them into two int64 arrays once: epoch seconds, and
+store-local seconds (the same instant with the UTC offset added). Weekday,
+hour, day and week buckets are then integer arithmetic on those arrays.
+"""
+from datetime import date, datetime, timezone
+from typing import Sequence, Tuple
+
+import numpy as np
+
+SECONDS_PER_DAY = 86400
+SECONDS_PER_WEEK = 7 * SECONDS_PER_DAY
+
+# 1970-01-01 was a Thursday; Monday == 0
+_EPOCH_WEEKDAY = 3
+_EPOCH_DATE = date(1970, 1, 1)
+
+# Shopify's layout: YYYY-MM-DDTHH:MM:SS+HH:MM
+_WIDTH = 25
+_SEPARATORS = {4: b'-', 7: b'-', 10: b'T', 13: b':', 16: b':', 22: b':'}
+_DIGITS = [0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18, 20, 21, 23, 24]
+
+
+def parse_timestamps(timestamps: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (epoch seconds, store-local seconds) for ISO-8601 timestamps. Shopify's
+    fixed-width form is decoded column-wise from one byte buffer; any batch
+    holding another form goes through datetime.fromisoformat instead.
+    """
+    if not timestamps:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    parsed = _parse_fixed_width(timestamps)
+    if parsed is None:
+        parsed = _parse_each(timestamps)
+    return parsed
+
+
+def _parse_fixed_width(timestamps: Sequence[str]):
+    try:
+        blob = ''.join(timestamps).encode('ascii')
+    except UnicodeEncodeError:
+        return None
+    if len(blob) != len(timestamps) * _WIDTH:
+        return None
+    chars = np.frombuffer(blob, dtype=np.uint8).reshape(len(timestamps), _WIDTH)
+
+    # Any string of another length shifts every separator after it
+    for position, separator in _SEPARATORS.items():
+        if not (chars[:, position] == separator[0]).all():
+            return None
+    sign = chars[:, 19]
+    if not ((sign == ord('+')) | (sign == ord('-'))).all():
+        return None
+    digits = chars[:, _DIGITS].astype(np.int64) - ord('0')
+    if ((digits < 0) | (digits > 9)).any():
+        return None
+
+    def field(first: int, width: int) -> np.ndarray:
+        value = digits[:, first]
+        for column in range(first + 1, first + width):
+            value = value * 10 + digits[:, column]
+        return value
+
+    year, month, day = field(0, 4), field(4, 2), field(6, 2)
+    seconds = field(8, 2) * 3600 + field(10, 2) * 60 + field(12, 2)
+    offset = (field(14, 2) * 3600 + field(16, 2) * 60) * np.where(sign == ord('-'), -1, 1)
+
+    local = days_from_civil(year, month, day) * SECONDS_PER_DAY + seconds
+    return local - offset, local
+
+
+def _parse_each(timestamps: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    epoch, local = [], []
+    for timestamp in timestamps:
+        parsed = datetime.fromisoformat(timestamp)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        seconds = int(parsed.timestamp())
+        epoch.append(seconds)
+        local.append(seconds + int(parsed.utcoffset().total_seconds()))
+    return np.array(epoch, dtype=np.int64), np.array(local, dtype=np.int64)
+
+
+def days_from_civil(year: np.ndarray, month: np.ndarray, day: np.ndarray) -> np.ndarray:
+    """Days since 1970-01-01 for proleptic Gregorian dates (H. Hinnant's algorithm)"""
+    year = year - (month <= 2)
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    return era * 146097 + day_of_era - 719468
+
+
+def day_number(day) -> int:
+    """Days since 1970-01-01 for a date (or a datetime's date)"""
+    if isinstance(day, datetime):
+        day = day.date()
+    return (day - _EPOCH_DATE).days
+
+
+def day_start(day) -> int:
+    """Seconds at midnight of a date, on the same scale as local_ts (or UTC epoch seconds)"""
+    return day_number(day) * SECONDS_PER_DAY
+
+
+def days(seconds: np.ndarray) -> np.ndarray:
+    """Day numbers (see day_number)"""
+    return seconds // SECONDS_PER_DAY
+
+
+def weekdays(seconds: np.ndarray) -> np.ndarray:
+    """Monday == 0"""
+    return ((seconds // SECONDS_PER_DAY + _EPOCH_WEEKDAY) % 7).astype(np.int8)
+
+
+def hours(seconds: np.ndarray) -> np.ndarray:
+    return (seconds % SECONDS_PER_DAY // 3600).astype(np.int8)
+
+
+def week_index(seconds: np.ndarray, start) -> np.ndarray:
+    """Whole weeks since midnight of `start`; negative before it"""
+    return (seconds - day_start(start)) // SECONDS_PER_WEEK
@@ -0,0 +1,21 @@
+import heapq
+from operator import itemgetter
+from typing import Callable, Iterable, List, Mapping, Tuple, TypeVar
+
+T = TypeVar('T')
+
+
+def top_k(items: Iterable[T], k: int, key: Callable[[T], float] = itemgetter(1)) -> List[T]:
+    """
+    The k largest items by key, largest first, from a single pass that
+    keeps only k of them on a heap: O(n log k) against a full sort's
+    O(n log n). Ties keep their input order, exactly like
+    sorted(items, key=key, reverse=True)[:k]. The default key reads the
+    value of (key, value) pairs such as dict.items().
+    """
+    return heapq.nlargest(k, items, key=key)
+
+
+def top_counts(counts: Mapping[T, float], k: int) -> List[Tuple[T, float]]:
+    """The k largest entries of a counter-like mapping (e.g. a BucketTotals dict)"""
+    return top_k(counts.items(), k)
@@ -0,0 +1,67 @@
+from typing import Dict, Optional
+
+import numpy as np
+
+from .order_columns import OrderColumns
+
+
+# Words in a tag, note or product title that mark an order as a workshop booking
+WORKSHOP_KEYWORDS = ('workshop', 'class', 'lesson', 'tutorial', 'session')
+
+
+def mentions_workshop(text: Optional[str]) -> bool:
+    if not text:
+        return False
+    text = text.lower()
+    return any(keyword in text for keyword in WORKSHOP_KEYWORDS)
+
+
+class WorkshopClassifier:
+    """
+    Decides which already-loaded orders are workshop bookings, from their
+    tags, notes and line item titles. Product verdicts are cached by
+    product id (or by title for custom line items without one), so each
+    product's title is only inspected once per process.
+    """
+
+    def __init__(self):
+        self._products: Dict = {}
+
+    def is_workshop_product(self, product_id: Optional[int], title: str) -> bool:
+        key = product_id if product_id and product_id > 0 else title
+        verdict = self._products.get(key)
+        if verdict is None:
+            verdict = self._products[key] = mentions_workshop(title)
+        return verdict
+
+    def is_workshop_order(self, order: Dict) -> bool:
+        """Classify one analytics order dict (see shopify_schema)"""
+        if any(mentions_workshop(tag) for tag in order.get('tags') or []):
+            return True
+        if any(self.is_workshop_product(item.get('product_id'), item['title']) for item in order.get('line_items', [])):
+            return True
+        return mentions_workshop(order.get('note'))
+
+    def workshop_mask(self, orders: OrderColumns) -> np.ndarray:
+        """Boolean mask over `orders` marking the workshop bookings"""
+        mask = np.zeros(len(orders), dtype=bool)
+        if not len(orders):
+            return mask
+
+        # Classify each distinct product once, then spread over the line items
+        if len(orders.item_order):
+            titles = orders.titles.values
+            pairs, item_pair = np.unique(
+                np.stack([orders.item_product_id, orders.item_title.astype(np.int64)]), axis=1, return_inverse=True
+            )
+            pair_verdicts = np.array([
+                self.is_workshop_product(product_id, titles[title_code])
+                for product_id, title_code in pairs.T.tolist()
+            ], dtype=bool)
+            mask[orders.item_order[pair_verdicts[item_pair.reshape(-1)]]] = True
+
+        for index, (tags, note) in enumerate(zip(orders.tags, orders.note)):
+            if not mask[index] and (any(mentions_workshop(tag) for tag in tags) or mentions_workshop(note)):
+                mask[index] = True
+
+        return mask
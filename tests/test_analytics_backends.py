@@ -0,0 +1,114 @@
+import random
+import threading
+
+import numpy as np
+import pytest
+
+from src import parallel_analytics
+from src.analytics_engine import _groups, accumulate, accumulate_vectorized
+from src.order_columns import OrderColumns
+from src.shopify_schema import build_order_dict
+
+TITLES = ['Candlefish No. 12', 'Match Bar Refill', 'Pour Your Own Class', 'Gift Card', 'Candle Workshop']
+SKUS = ['cf1020203', '', 'MB-1', 'WS-2']
+EMAILS = ['a@example.com', 'b@example.com', 'c@example.com', None]
+LOCATIONS = [10719053, 71781154968, None]
+TRACK_ITEMS = ['Match', 'Workshop']
+
+
+def make_orders(count=400, seed=5):
+    """Orders that repeat every title, SKU, customer and location many times over"""
+    rng = random.Random(seed)
+    orders = []
+    for order_id in range(1, count + 1):
+        line_items = [
+            {
+                'title': rng.choice(TITLES),
+                'variant_title': None,
+                'quantity': rng.randint(1, 3),
+                'price': rng.choice(['8.00', '12.50', '45.00']),
+                'sku': rng.choice(SKUS),
+                'product_id': rng.choice([None, 101, 102]),
+            }
+            for _ in range(rng.randint(1, 4))
+        ]
+        orders.append(build_order_dict({
+            'id': order_id,
+            'created_at': f'2024-01-{rng.randint(1, 7):02d}T{rng.randint(0, 23):02d}:15:00-05:00',
+            'total_price': '%.2f' % rng.uniform(5, 200),
+            'email': rng.choice(EMAILS),
+            'line_items': line_items,
+            'tags': '',
+            'source_name': 'pos',
+            'location_id': rng.choice(LOCATIONS),
+        }))
+    return orders
+
+
+def assert_same_totals(expected, actual):
+    assert len(expected) == len(actual)
+    for mine, theirs in zip(expected, actual):
+        for name, value in vars(mine).items():
+            other = getattr(theirs, name)
+            if name == 'category_titles':
+                value, other = [dict(c) for c in value], [dict(c) for c in other]
+            assert value == other, name
+            # Ranked dicts break ties by insertion order, so it must match too;
+            # tracked_orders is only read by item
+            if isinstance(value, dict) and name != 'tracked_orders':
+                assert list(value) == list(other), name
+
+
+@pytest.fixture
+def batch():
+    orders = OrderColumns.from_orders(make_orders())
+    buckets = np.array([index % 3 for index in range(len(orders))], dtype=np.int64)
+    buckets[::7] = -1
+    workshop_mask = np.array([index % 5 == 0 for index in range(len(orders))], dtype=bool)
+    return orders, buckets, workshop_mask
+
+
+def test_groups_follow_first_appearance():
+    keys = np.array([5, 3, 5, 9, 3, 0, 9, 5], dtype=np.int64)
+    expected = list(dict.fromkeys(keys.tolist()))
+    for key_space in (10, 100_000):   # dense table and np.unique paths
+        unique, group = _groups(keys, key_space)
+        assert unique.tolist() == expected
+        assert [expected[g] for g in group.tolist()] == keys.tolist()
+
+
+def test_vectorized_matches_loop(batch):
+    orders, buckets, workshop_mask = batch
+    assert_same_totals(
+        accumulate(orders, buckets, 3, TRACK_ITEMS, workshop_mask),
+        accumulate_vectorized(orders, buckets, 3, TRACK_ITEMS, workshop_mask),
+    )
+
+
+def test_process_backend_matches_loop(batch, monkeypatch):
+    orders, buckets, workshop_mask = batch
+    monkeypatch.setattr(parallel_analytics, 'MIN_PARALLEL_ORDERS', 0)
+    assert_same_totals(
+        accumulate(orders, buckets, 3, TRACK_ITEMS, workshop_mask),
+        parallel_analytics.accumulate_parallel(orders, buckets, 3, TRACK_ITEMS, workshop_mask, workers=2),
+    )
+
+
+def test_process_backend_wont_fork_from_threads(batch, monkeypatch):
+    orders, buckets, workshop_mask = batch
+    monkeypatch.setattr(parallel_analytics, 'MIN_PARALLEL_ORDERS', 0)
+    monkeypatch.setattr(parallel_analytics, '_pool', None)
+    monkeypatch.setattr(parallel_analytics, '_pool_workers', 0)
+    monkeypatch.setattr(parallel_analytics, '_pool_refused', False)
+    monkeypatch.setattr(parallel_analytics, '_mp_context', lambda: parallel_analytics.multiprocessing.get_context('fork'))
+    started, finish = threading.Event(), threading.Event()
+    other = threading.Thread(target=lambda: (started.set(), finish.wait()))
+    other.start()
+    started.wait()
+    try:
+        totals = parallel_analytics.accumulate_parallel(orders, buckets, 3, TRACK_ITEMS, workshop_mask, workers=2)
+        assert parallel_analytics._pool is None
+    finally:
+        finish.set()
+        other.join()
+    assert_same_totals(accumulate(orders, buckets, 3, TRACK_ITEMS, workshop_mask), totals)
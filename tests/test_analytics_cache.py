@@ -0,0 +1,46 @@
+from src import analytics_cache
+from src.analytics_cache import AnalyticsCache
+
+
+def test_invalidate_days_drops_overlapping_entries():
+    cache = AnalyticsCache(max_entries=10)
+    cache.put('jan', {'week': 1}, [('2024-01-01', '2024-01-07'), ('2023-01-02', '2023-01-08')])
+    cache.put('feb', {'week': 5}, [('2024-01-29', '2024-02-04')])
+    cache.put('api', {'week': 9}, [('2024-02-26', '2024-03-03')], versioned=False)
+
+    assert cache.invalidate_days([]) == 0
+    assert cache.invalidate_days(['2024-01-08', '2024-01-28']) == 0
+    # The year-ago range counts as much as the week itself
+    assert cache.invalidate_days(['2023-01-08']) == 1
+    assert cache.get('jan') is None
+    assert cache.invalidate_days(['2024-03-03', '2024-02-04', '2024-02-04']) == 2
+    assert cache.stats()['entries'] == 0
+
+
+def test_get_returns_copies():
+    cache = AnalyticsCache(max_entries=10)
+    cache.put('week', {'top': [1, 2]}, [('2024-01-01', '2024-01-07')])
+    cache.get('week')['top'].append(3)
+    assert cache.get('week') == {'top': [1, 2]}
+    assert cache.stats() == {'entries': 1, 'hits': 2, 'misses': 0}
+
+
+def test_unversioned_entries_expire(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(analytics_cache.time, 'monotonic', lambda: now[0])
+    cache = AnalyticsCache(max_entries=10, unversioned_ttl=60)
+    cache.put('api', {}, [], versioned=False)
+    cache.put('store', {}, [])
+    now[0] += 61
+    assert cache.get('api') is None
+    assert cache.get('store') == {}
+
+
+def test_least_recently_used_is_evicted():
+    cache = AnalyticsCache(max_entries=2)
+    cache.put('a', {}, [])
+    cache.put('b', {}, [])
+    cache.get('a')
+    cache.put('c', {}, [])
+    assert cache.get('b') is None
+    assert cache.get('a') == {} and cache.get('c') == {}
@@ -0,0 +1,66 @@
+import json
+from datetime import date, datetime
+
+import pytest
+
+from src.location_registry import DEFAULT_LOCATIONS, ONLINE, LocationRegistry
+from src.order_columns import OrderColumns
+from tests.test_analytics_backends import make_orders
+
+LOCATIONS = DEFAULT_LOCATIONS + [
+    {'key': 'atlanta', 'id': 555, 'name': 'Atlanta', 'opened': '2025-03-01'},
+    {'key': 'warehouse', 'id': '777', 'channel': 'shipping'},
+]
+
+
+def test_buckets_follow_configured_stores():
+    registry = LocationRegistry(LOCATIONS)
+    assert registry.stores == ['charleston', 'boston', 'atlanta']
+    assert registry.bucket_names == ['charleston', 'boston', 'atlanta', ONLINE]
+    assert registry.bucket_of(10719053) == 0
+    assert registry.bucket_of('71781154968') == 1
+    assert registry.bucket_of('555') == 2
+    # Non-store locations, unknown ids and web orders are online
+    assert registry.bucket_of('777') == registry.online_bucket == 3
+    assert registry.bucket_of('123') == 3
+    assert registry.bucket_of(None) == 3
+    assert registry.by_key['warehouse'].name == 'Warehouse'
+
+
+def test_buckets_for_order_columns():
+    registry = LocationRegistry(LOCATIONS)
+    orders = make_orders(50)
+    columns = OrderColumns.from_orders(orders)
+    assert registry.buckets(columns).tolist() == [registry.bucket_of(order['location_id']) for order in orders]
+    assert registry.buckets(OrderColumns.from_orders([])).tolist() == []
+
+
+def test_open_on():
+    registry = LocationRegistry(LOCATIONS)
+    assert not registry.open_on('atlanta', date(2025, 2, 28))
+    assert registry.open_on('atlanta', datetime(2025, 3, 1, 9))
+    assert registry.open_on('charleston', date(2000, 1, 1))
+    assert registry.open_on('all', date(2000, 1, 1))
+
+
+def test_invalid_configs():
+    with pytest.raises(ValueError):
+        LocationRegistry(DEFAULT_LOCATIONS + [{'key': 'boston', 'id': '1'}])
+    with pytest.raises(ValueError):
+        LocationRegistry([{'key': ONLINE, 'id': '1'}])
+
+
+def test_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv('LOCATIONS_JSON', json.dumps(LOCATIONS))
+    assert LocationRegistry.from_env().stores == ['charleston', 'boston', 'atlanta']
+
+    monkeypatch.delenv('LOCATIONS_JSON')
+    path = tmp_path / 'locations.json'
+    path.write_text(json.dumps(DEFAULT_LOCATIONS[:1]))
+    monkeypatch.setenv('LOCATIONS_FILE', str(path))
+    assert LocationRegistry.from_env().stores == ['charleston']
+
+    monkeypatch.setenv('LOCATIONS_FILE', str(tmp_path / 'missing.json'))
+    registry = LocationRegistry.from_env()
+    assert registry.config_key() == LocationRegistry(DEFAULT_LOCATIONS).config_key()
+    assert registry.config_key() != LocationRegistry(LOCATIONS).config_key()
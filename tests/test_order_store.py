@@ -0,0 +1,141 @@
+import copy
+import threading
+
+import pytest
+
+from src import product_classifier
+from src.analytics_engine import accumulate, accumulate_rollups
+from src.location_registry import DEFAULT_LOCATIONS, LocationRegistry
+from src.order_columns import Interner, OrderColumns
+from src.order_store import ROLLUP_TABLES, OrderStore, customer_hash
+from tests.test_analytics_backends import TITLES, TRACK_ITEMS, make_orders
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.setenv('PRODUCT_INDEX_PATH', str(tmp_path / 'product_index.db'))
+    monkeypatch.setattr(product_classifier, '_classifier', None)
+    return OrderStore(str(tmp_path / 'orders.db'))
+
+
+def rollup_rows(store):
+    conn = store._connect()
+    rows = {
+        table: sorted(tuple(row) for row in conn.execute(f'SELECT * FROM {table}'))
+        for table in ROLLUP_TABLES
+    }
+    conn.close()
+    return rows
+
+
+def assert_rollups_match_rebuild(store):
+    maintained = rollup_rows(store)
+    store.rebuild_rollups()
+    assert maintained == rollup_rows(store)
+
+
+def changed(order):
+    """The order moved to another location and day, at another price"""
+    order = copy.deepcopy(order)
+    order['location_id'] = 'moved'
+    order['created_at'] = '2024-01-09' + order['created_at'][10:]
+    order['total_price'] += 10
+    for item in order['line_items']:
+        item['price'] = '99.00'
+        item['price_cents'] = 9900
+    order['total_cents'] = order['total_cents'] + 1000
+    return order
+
+
+def test_reupsert_keeps_rollups_exact(store):
+    orders = make_orders(60)
+    store.upsert_orders(orders)
+    store.upsert_orders([changed(order) for order in orders[::3]])
+    assert_rollups_match_rebuild(store)
+
+
+def test_concurrent_reupserts_subtract_once(store):
+    orders = make_orders(60)
+    store.upsert_orders(orders)
+    replacements = [changed(order) for order in orders]
+    threads = [threading.Thread(target=store.upsert_orders, args=(replacements,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert_rollups_match_rebuild(store)
+
+
+def test_rollups_match_raw_orders(store):
+    orders = make_orders()
+    # Verdicts are per product, so a product id has to keep to one title
+    for order in orders:
+        for item in order['line_items']:
+            if item['product_id']:
+                item['product_id'] = 101 + TITLES.index(item['title'])
+    store.upsert_orders(orders)
+    registry = LocationRegistry(DEFAULT_LOCATIONS)
+    bucket_count = len(registry.bucket_names)
+
+    columns = OrderColumns.from_orders(orders)
+    store.classifier.classify_columns(columns)
+    expected = accumulate(
+        columns, registry.buckets(columns), bucket_count, TRACK_ITEMS, store.classifier.workshop_mask(columns)
+    )
+    actual = accumulate_rollups(
+        store.get_rollups('2024-01-01', '2024-01-07', with_titles=True),
+        lambda day, location_id: registry.bucket_of(location_id), bucket_count, Interner(), TRACK_ITEMS
+    )
+
+    for mine, theirs in zip(expected, actual):
+        assert mine.order_count == theirs.order_count
+        assert mine.revenue_cents == theirs.revenue_cents
+        assert mine.tracked_orders == theirs.tracked_orders
+        assert mine.trend_quantity == theirs.trend_quantity
+        assert mine.product_quantity == theirs.product_quantity
+        assert mine.workshop_quantity == theirs.workshop_quantity
+        assert mine.hour_orders == theirs.hour_orders
+
+
+def test_email_case_and_spaces_are_one_customer(store):
+    orders = make_orders(3)
+    for order, email in zip(orders, ['Foo@x.com', 'foo@x.com', 'foo@x.com ']):
+        order['customer_email'] = email
+    store.upsert_orders(orders)
+
+    conn = store._connect()
+    customers = {row['customer'] for row in conn.execute('SELECT customer FROM daily_customer_rollup')}
+    indexed = conn.execute('SELECT * FROM customer_index').fetchall()
+    conn.close()
+    assert customers == {customer_hash('foo@x.com')}
+    assert len(indexed) == 1 and indexed[0]['orders'] == 3
+    assert store.get_customer_emails('2024-01-01', '2024-01-07') == {customer_hash('foo@x.com'): 'foo@x.com'}
+    assert list(store.get_customer_profiles([' FOO@x.com'])) == [' FOO@x.com']
+    assert OrderColumns.from_orders(orders).customers.values == ['foo@x.com']
+
+
+def test_weekly_rollups_clamp_a_partial_final_week(store):
+    orders = make_orders()
+    # Half the orders a week later, so the second week is busy every day
+    for order in orders[::2]:
+        order['created_at'] = '2024-01-%02d' % (int(order['created_at'][8:10]) + 7) + order['created_at'][10:]
+    store.upsert_orders(orders)
+
+    def weekly_orders(start_day, end_day):
+        weeks = {}
+        for row in store.get_weekly_rollups(start_day, end_day)['locations']:
+            weeks[row['week']] = weeks.get(row['week'], 0) + row['orders']
+        return weeks
+
+    def daily_orders(start_day, end_day):
+        return sum(row['orders'] for row in store.get_rollups(start_day, end_day)['locations'])
+
+    # Monday-start windows ending on a Sunday, a Wednesday and the next Monday
+    assert weekly_orders('2024-01-01', '2024-01-14') == {0: daily_orders('2024-01-01', '2024-01-07'),
+                                                          1: daily_orders('2024-01-08', '2024-01-14')}
+    assert weekly_orders('2024-01-01', '2024-01-10') == {0: daily_orders('2024-01-01', '2024-01-07'),
+                                                          1: daily_orders('2024-01-08', '2024-01-10')}
+    assert weekly_orders('2024-01-08', '2024-01-08') == {0: daily_orders('2024-01-08', '2024-01-08')}
+    # Other start days are summed from the daily tables
+    assert weekly_orders('2024-01-03', '2024-01-16') == {0: daily_orders('2024-01-03', '2024-01-09'),
+                                                          1: daily_orders('2024-01-10', '2024-01-16')}
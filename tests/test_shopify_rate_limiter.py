@@ -0,0 +1,105 @@
+import threading
+
+import pytest
+
+from src import shopify_rate_limiter
+from src.shopify_rate_limiter import ShopifyRateLimiter
+
+
+class FakeResponse:
+    def __init__(self, status_code=200, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class HTTPError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f'HTTP {status_code}')
+        self.response = FakeResponse(status_code, headers)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    """Backoff delays, recorded instead of slept; jitter is zero"""
+    delays = []
+    monkeypatch.setattr(shopify_rate_limiter.time, 'sleep', delays.append)
+    monkeypatch.setattr(shopify_rate_limiter.random, 'uniform', lambda low, high: 0.0)
+    return delays
+
+
+def test_reserve_is_left_free():
+    limiter = ShopifyRateLimiter(bucket_size=5, leak_rate=0.001, reserve=2)
+    assert limiter.available == 3
+    for _ in range(3):
+        limiter.acquire()
+    assert limiter.available == 0
+
+    blocked = threading.Thread(target=limiter.acquire, daemon=True)
+    blocked.start()
+    blocked.join(0.2)
+    assert blocked.is_alive()
+
+    # The response says the bucket has drained, which frees the waiter
+    limiter.release('0/5')
+    blocked.join(1)
+    assert not blocked.is_alive()
+
+
+def test_in_flight_calls_count_until_released():
+    limiter = ShopifyRateLimiter(bucket_size=10, leak_rate=0.001, reserve=0)
+    limiter.acquire()
+    limiter.acquire()
+    assert limiter.available == 8
+
+    # Without a call-limit header a finished call fills one unit
+    limiter.release()
+    assert limiter.available == 8
+    # The header replaces the estimate, bucket size included
+    limiter.release('3/20')
+    assert limiter.available == 17
+
+
+def test_429_waits_for_retry_after(sleeps):
+    limiter = ShopifyRateLimiter(bucket_size=40, leak_rate=1000, reserve=2)
+    calls = []
+
+    def throttled_once():
+        calls.append(1)
+        if len(calls) == 1:
+            raise HTTPError(429, {'Retry-After': '0.1', 'X-Shopify-Shop-Api-Call-Limit': '40/40'})
+        return FakeResponse(headers={'x-shopify-shop-api-call-limit': '1/40'})
+
+    response = limiter.call(throttled_once)
+    assert response.status_code == 200
+    assert len(calls) == 2
+    assert sleeps == [pytest.approx(0.1)]
+    assert limiter._blocked_until > 0
+    assert limiter._in_flight == 0
+
+
+def test_client_errors_are_not_retried(sleeps):
+    limiter = ShopifyRateLimiter(max_retries=3)
+    calls = []
+
+    def not_found():
+        calls.append(1)
+        raise HTTPError(404)
+
+    with pytest.raises(HTTPError):
+        limiter.call(not_found)
+    assert len(calls) == 1
+    assert limiter._in_flight == 0
+
+
+def test_retries_give_up(sleeps):
+    limiter = ShopifyRateLimiter(max_retries=2, leak_rate=1000)
+    calls = []
+
+    def unavailable():
+        calls.append(1)
+        raise HTTPError(503)
+
+    with pytest.raises(HTTPError):
+        limiter.call(unavailable)
+    assert len(calls) == 3
+    assert len(sleeps) == 2
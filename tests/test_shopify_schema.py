@@ -0,0 +1,45 @@
+from src.shopify_schema import build_order_dict, normalize_email, order_cents, to_cents
+
+
+def test_to_cents_parses_decimal_strings_exactly():
+    assert to_cents('12.50') == 1250
+    assert to_cents('12.5') == 1250
+    assert to_cents('12') == 1200
+    assert to_cents('-3.07') == -307
+    assert to_cents('0.10') == 10
+
+
+def test_to_cents_rounds_half_up():
+    # float('0.285') * 100 is 28.499999..., which round() takes down
+    assert to_cents('0.285') == 29
+    assert to_cents('-0.285') == -29
+    assert to_cents('1.005') == 101
+    assert to_cents('0.2849') == 28
+    assert to_cents('1e2') == 10000
+
+
+def test_to_cents_empty_and_numbers():
+    assert to_cents(None) == 0
+    assert to_cents('') == 0
+    assert to_cents(19.99) == 1999
+    assert to_cents(7) == 700
+
+
+def test_order_dicts_carry_cents():
+    order = build_order_dict({
+        'id': 1,
+        'created_at': '2024-01-06T15:08:50-05:00',
+        'total_price': '0.285',
+        'line_items': [{'title': 'Candle', 'quantity': 1, 'price': '0.285'}],
+    })
+    assert order_cents(order) == 29
+    assert order['line_items'][0]['price_cents'] == 29
+    # Dicts stored before total_cents existed fall back to total_price
+    del order['total_cents']
+    assert order_cents(order) == 29
+
+
+def test_normalize_email():
+    assert normalize_email(' Foo@X.com ') == 'foo@x.com'
+    assert normalize_email('   ') is None
+    assert normalize_email(None) is None
@@ -0,0 +1,147 @@
+from datetime import datetime
+
+import pytest
+
+from src.location_registry import DEFAULT_LOCATIONS, LocationRegistry
+from src.shopify_analytics import ShopifyAnalytics
+from src.shopify_schema import build_order_dict
+from src.shopify_service import OrderFetchError, ShopifyService
+from tests.test_analytics_backends import TITLES, make_orders
+from tests.test_order_store import store  # noqa: F401 (fixture)
+
+
+class FakeClient:
+    """Serves orders.json and orders/count.json from a fixed order list"""
+
+    def __init__(self, orders, timezone='America/New_York'):
+        self.orders = orders
+        self.timezone = timezone
+
+    def get_json(self, path, params=None):
+        if path == 'shop.json':
+            return {'shop': {'iana_timezone': self.timezone}}
+        if path == 'orders/count.json':
+            return {'count': len(self._matching(params))}
+        raise AssertionError(path)
+
+    def paginate(self, path, params, key, decode=None):
+        assert path == 'orders.json'
+        yield self._matching(params)
+
+    def _matching(self, params):
+        low = datetime.fromisoformat(params['created_at_min'])
+        high = datetime.fromisoformat(params['created_at_max'])
+        return [
+            order for order in self.orders
+            if low <= datetime.fromisoformat(order['created_at']) <= high
+        ]
+
+
+class FailingClient(FakeClient):
+    """Shopify keeps failing after the rate limiter has given up retrying"""
+
+    def paginate(self, path, params, key, decode=None):
+        raise ConnectionError('Shopify unavailable')
+
+
+def edge_orders():
+    """Orders whose UTC and local dates differ, either side of 2024-01-01..07 local"""
+    created = [
+        '2023-12-31T20:15:00-05:00', '2023-12-31T23:59:59-05:00', '2024-01-01T00:00:00-05:00',
+        '2024-01-07T19:30:00-05:00', '2024-01-07T23:59:59-05:00', '2024-01-08T00:00:00-05:00',
+    ]
+    return [
+        build_order_dict({
+            'id': 1000 + index,
+            'created_at': created_at,
+            'total_price': '20.00',
+            'email': 'edge@example.com',
+            'line_items': [{'title': TITLES[0], 'variant_title': None, 'quantity': 1,
+                            'price': '20.00', 'sku': '', 'product_id': 101}],
+            'tags': '',
+            'source_name': 'pos',
+            'location_id': 10719053,
+        })
+        for index, created_at in enumerate(created)
+    ]
+
+
+@pytest.fixture
+def orders():
+    orders = make_orders() + edge_orders()
+    # Verdicts are per product, so a product id has to keep to one title
+    for order in orders:
+        for item in order['line_items']:
+            if item['product_id']:
+                item['product_id'] = 101 + TITLES.index(item['title'])
+    return orders
+
+
+@pytest.fixture
+def services(store, orders, monkeypatch):
+    """(store-backed, API-only) services over the same orders"""
+    monkeypatch.setenv('SHOPIFY_SHOP_DOMAIN', 'example.myshopify.com')
+    monkeypatch.setenv('SHOPIFY_ACCESS_TOKEN', 'token')
+    monkeypatch.delenv('SHOP_TIMEZONE', raising=False)
+    store.upsert_orders(orders)
+    store.set_state('history_start', '2023-12-01')
+    store.set_state('last_synced_at', '2024-01-09T00:00:00-05:00')
+
+    backed = ShopifyService(order_store=store)
+    backed.client = FakeClient(orders)
+    fetched = ShopifyService(order_store=store)
+    fetched.order_store = None
+    fetched.client = FakeClient(orders)
+    return backed, fetched
+
+
+def order_ids(orders):
+    return sorted(order['id'] for order in orders)
+
+
+def test_store_and_api_read_the_same_days(services):
+    backed, fetched = services
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 7)
+
+    from_store = backed.get_orders_for_period(start, end)
+    from_api = fetched.get_orders_for_period(start, end)
+    assert order_ids(from_store) == order_ids(from_api)
+    assert order_ids(fetched.get_orders_sharded(start, end, slice_size='day')) == order_ids(from_api)
+    assert fetched.get_orders_count(start, end) == len(from_api)
+    assert {order['created_at'][:10] for order in from_api} == {f'2024-01-0{day}' for day in range(1, 8)}
+
+
+def test_store_and_api_totals_match(services):
+    backed, fetched = services
+    registry = LocationRegistry(DEFAULT_LOCATIONS)
+    from_store = ShopifyAnalytics(backed, backend='numpy', locations=registry)
+    from_api = ShopifyAnalytics(fetched, backend='numpy', locations=registry)
+
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 7, 23, 59, 59)
+    store_totals, _ = from_store._location_totals(start, end)
+    api_totals, _ = from_api._location_totals(start, end)
+    for name in registry.bucket_names:
+        assert store_totals[name].order_count == api_totals[name].order_count, name
+        assert store_totals[name].revenue_cents == api_totals[name].revenue_cents, name
+        assert store_totals[name].hour_orders == api_totals[name].hour_orders, name
+
+    store_trends = from_store._analyze_multi_week_trends(datetime(2024, 1, 1), weeks=2)
+    api_trends = from_api._analyze_multi_week_trends(datetime(2024, 1, 1), weeks=2)
+    assert store_trends['order_trend'] == api_trends['order_trend']
+    assert store_trends['revenue_trend'] == api_trends['revenue_trend']
+
+
+def test_fetch_errors_are_raised_not_empty(services):
+    _, fetched = services
+    fetched.client = FailingClient([])
+    start, end = datetime(2024, 1, 1), datetime(2024, 1, 7)
+
+    with pytest.raises(OrderFetchError) as raised:
+        fetched.get_orders_for_period(start, end)
+    assert isinstance(raised.value.__cause__, ConnectionError)
+    with pytest.raises(OrderFetchError):
+        fetched.get_orders_sharded(start, end, slice_size='day')
+
+    analytics = ShopifyAnalytics(fetched, backend='numpy', locations=LocationRegistry(DEFAULT_LOCATIONS))
+    with pytest.raises(OrderFetchError):
+        analytics._location_totals(start, datetime(2024, 1, 7, 23, 59, 59))
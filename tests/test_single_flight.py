@@ -0,0 +1,73 @@
+import threading
+import time
+
+import pytest
+
+from src.single_flight import SingleFlight
+
+
+def run_concurrently(flights, key, func, callers):
+    """Start a leader and callers - 1 followers on key; returns (outcomes, release)"""
+    release = threading.Event()
+    outcomes = []
+
+    def call():
+        try:
+            outcomes.append(flights.do(key, func, release))
+        except Exception as e:
+            outcomes.append(e)
+
+    threads = [threading.Thread(target=call) for _ in range(callers)]
+    threads[0].start()
+    while not flights.in_flight():
+        time.sleep(0.001)
+    for thread in threads[1:]:
+        thread.start()
+    while flights._calls[key].waiters < callers - 1:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    return outcomes
+
+
+def test_concurrent_callers_share_one_call():
+    flights = SingleFlight()
+    calls = []
+
+    def load(release):
+        calls.append(1)
+        release.wait(5)
+        return ['order']
+
+    outcomes = run_concurrently(flights, 'week', load, 4)
+    assert len(calls) == 1
+    assert outcomes == [(['order'], True)] * 4
+    assert all(value is outcomes[0][0] for value, _ in outcomes)
+    assert flights.in_flight() == 0
+
+
+def test_exceptions_reach_every_caller():
+    flights = SingleFlight()
+    calls = []
+
+    def fail(release):
+        calls.append(1)
+        release.wait(5)
+        raise ConnectionError('Shopify unavailable')
+
+    outcomes = run_concurrently(flights, 'week', fail, 3)
+    assert len(calls) == 1
+    assert len(outcomes) == 3 and all(isinstance(outcome, ConnectionError) for outcome in outcomes)
+
+    # Nothing is remembered once the call completes
+    assert flights.in_flight() == 0
+    assert flights.do('week', lambda: 'fresh') == ('fresh', False)
+
+
+def test_different_keys_run_separately():
+    flights = SingleFlight()
+    assert flights.do('a', lambda: 1) == (1, False)
+    assert flights.do('b', lambda: 2) == (2, False)
+    with pytest.raises(ValueError):
+        flights.do('a', int, 'not a number')
@@ -0,0 +1,33 @@
+import threading
+import time
+
+import pytest
+
+from src.stage_graph import StageError, StageGraph
+
+
+def test_dependencies_are_passed_by_name():
+    graph = StageGraph('test')
+    graph.add('a', lambda: 2)
+    graph.add('b', lambda: 3)
+    graph.add('product', lambda a, b: a * b, deps=('a', 'b'))
+    assert graph.run() == {'a': 2, 'b': 3, 'product': 6}
+    assert set(graph.timings) == {'a', 'b', 'product'}
+
+
+def test_failure_does_not_wait_for_slow_siblings():
+    release = threading.Event()
+    graph = StageGraph('test')
+    graph.add('slow', lambda: release.wait(5))
+    graph.add('broken', lambda: 1 / 0)
+    graph.add('after', lambda slow, broken: None, deps=('slow', 'broken'))
+
+    started = time.perf_counter()
+    try:
+        with pytest.raises(StageError) as raised:
+            graph.run()
+        assert time.perf_counter() - started < 1
+    finally:
+        release.set()
+    assert raised.value.stage == 'broken'
+    assert isinstance(raised.value.__cause__, ZeroDivisionError)
@@ -0,0 +1,58 @@
+from datetime import datetime, timezone
+
+from src import time_buckets
+from src.time_buckets import parse_timestamps
+
+SHOPIFY_STAMPS = [
+    '2024-01-06T15:08:50-05:00',
+    '2024-03-10T03:30:00-04:00',
+    '2024-01-01T00:00:00+00:00',
+    '2024-02-29T23:59:59+05:30',
+    '1999-12-31T23:00:00-09:30',
+]
+
+
+def expected(stamps):
+    epoch, local = [], []
+    for stamp in stamps:
+        parsed = datetime.fromisoformat(stamp)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        epoch.append(int(parsed.timestamp()))
+        local.append(int(parsed.replace(tzinfo=timezone.utc).timestamp()))
+    return epoch, local
+
+
+def test_fixed_width_matches_fromisoformat():
+    assert time_buckets._parse_fixed_width(SHOPIFY_STAMPS) is not None
+    epoch, local = parse_timestamps(SHOPIFY_STAMPS)
+    assert (epoch.tolist(), local.tolist()) == expected(SHOPIFY_STAMPS)
+
+
+def test_other_forms_fall_back():
+    stamps = SHOPIFY_STAMPS + ['2024-01-06T20:08:50Z', '2024-01-06T15:08:50.250-05:00', '2024-01-06T15:08:50']
+    assert time_buckets._parse_fixed_width(stamps) is None
+    epoch, local = parse_timestamps(stamps)
+    assert (epoch.tolist(), local.tolist()) == expected(stamps)
+
+
+def test_malformed_fixed_width_falls_back():
+    # 25 characters, but not Shopify's layout
+    stamps = ['2024-01-06 15:08:50-05:00', '2024-01-06T15:08:50-0500 ']
+    assert time_buckets._parse_fixed_width(stamps) is None
+    assert time_buckets._parse_fixed_width(['2024-01-0AT15:08:50-05:00']) is None
+
+
+def test_buckets_use_local_time():
+    epoch, local = parse_timestamps(['2024-01-07T22:15:00-05:00'])
+    # Sunday 22:00 in the store is Monday 03:00 UTC
+    assert time_buckets.weekdays(local).tolist() == [6]
+    assert time_buckets.hours(local).tolist() == [22]
+    assert time_buckets.weekdays(epoch).tolist() == [0]
+    assert time_buckets.week_index(local, datetime(2024, 1, 1)).tolist() == [0]
+    assert time_buckets.week_index(epoch, datetime(2024, 1, 1)).tolist() == [1]
+
+
+def test_empty_batch():
+    epoch, local = parse_timestamps([])
+    assert len(epoch) == len(local) == 0
@@ -0,0 +1,39 @@
+import base64
+import hashlib
+import hmac
+
+from src import webhook_ingest
+from src.webhook_ingest import verify_webhook
+
+SECRET = 'shpss_test'
+BODY = b'{"id": 450789469, "total_price": "199.65"}'
+
+
+def sign(body, secret=SECRET):
+    return base64.b64encode(hmac.new(secret.encode('utf-8'), body, hashlib.sha256).digest()).decode('utf-8')
+
+
+def test_valid_signature():
+    assert verify_webhook(BODY, sign(BODY), SECRET)
+
+
+def test_bad_signatures_are_rejected():
+    assert not verify_webhook(BODY, sign(BODY, 'other secret'), SECRET)
+    assert not verify_webhook(BODY + b' ', sign(BODY), SECRET)
+    assert not verify_webhook(BODY, 'not base64 at all', SECRET)
+    assert not verify_webhook(BODY, None, SECRET)
+    assert not verify_webhook(BODY, '', SECRET)
+    # Without a configured secret nothing verifies
+    assert not verify_webhook(BODY, sign(BODY, ''), None)
+
+
+def test_signatures_are_compared_in_constant_time(monkeypatch):
+    compared = []
+
+    def compare_digest(a, b):
+        compared.append((a, b))
+        return a == b
+
+    monkeypatch.setattr(webhook_ingest.hmac, 'compare_digest', compare_digest)
+    assert verify_webhook(BODY, sign(BODY), SECRET)
+    assert compared == [(sign(BODY), sign(BODY))]